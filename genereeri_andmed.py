@@ -0,0 +1,353 @@
+#Pealkiri: Sünteetiliste poodide ja ostukorvide generaator
+#Käivitamiseks tuleb panna bash terminali:
+# python genereeri_andmed.py -n 1000000 --poode 20 --korve 1000 -o suur
+# cd suur && python ../poed.py
+#
+# Tooted tehakse data/*.json toodete järgi: päris nimest võetakse "mall"
+# (nimi ilma kaubamärgi ja suuruseta), kaubamärk valitakse päris kaubamärkide
+# sagedusega, pakendi suurus sama ühikuga päris suuruste hulgast ja hind
+# malli kilo/liitri/tüki hinna järgi. Igal poel on oma hinnatase, hinna
+# kirjutamise viis ("1.99 €" või "1,89 €") ja suuruse kirjutamise viis
+# ("500g" või "500 g"). Ostukorvides on trükivigu ja poolikuid nimesid.
+# Sama seeme annab alati samad failid.
+#
+# Väljund: <kaust>/data/<pood>_products.json(l) ja <kaust>/korvid.jsonl
+# (hinda_korvid.py sisend).
+
+import argparse
+import bisect
+import json
+import math
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from itertools import accumulate
+from typing import Dict, Iterator, List, Tuple
+
+from poed import (
+    KOGUSE_MUSTER,
+    hind_tekstist_arvuks,
+    kaubamargid,
+    loe_kogus,
+    normaliseeri_tekst,
+    poodide_failid,
+    toote_sonad,
+)
+
+# Poodide nimed; kui poode on rohkem, lisatakse number
+POODIDE_NIMED = ["rimi", "selver", "maxima", "lidl", "konsum", "grossi", "meie", "mini_rimi",
+                 "comarket", "prisma", "coop", "stockmann", "kaubamaja", "solaris", "akropol"]
+
+# Mitu protsenti kõigist toodetest on ühes poes (ülejäänud on teistes)
+KATVUS = 0.6
+
+# Mitu toodet on ühes ostukorvis (vahemik)
+KORVI_SUURUS = (5, 25)
+
+# Klaviatuuril kõrvuti olevad tähed (trükivigade jaoks)
+NAABRID = {}
+for _rida in ("qwertyuiopüõ", "asdfghjklöä", "zxcvbnm"):
+    for _i, _taht in enumerate(_rida):
+        NAABRID[_taht] = _rida[max(0, _i - 1):_i] + _rida[_i + 1:_i + 2]
+
+
+@dataclass
+class Mall:
+    # Üks päris toode ilma kaubamärgi ja suuruseta
+    enne: str                      # sõnad enne suurust ("hapukoor 20%")
+    parast: str                    # sõnad pärast suurust ("viilutatud")
+    kaubamargiga: bool
+    pohiuhik: str | None           # "g", "ml", "tk" või None (suurus puudub)
+    maht: float | None             # päris toote suurus põhiühikus
+    uhiku_hind: float              # € põhiühiku kohta (või tüki hind, kui suurust pole)
+
+
+@dataclass
+class Jaotused:
+    # Päris andmetest loetud jaotused
+    mallid: List[Mall] = field(default_factory=list)
+    margid: List[str] = field(default_factory=list)
+    margi_kaalud: List[float] = field(default_factory=list)  # kumulatiivsed
+    kogused: Dict[str, List[float]] = field(default_factory=dict)  # põhiühik -> päris suurused
+
+
+def _loe_tooted(faili_teed: List[str]) -> Iterator[Tuple[str, float]]:
+    for faili_tee in sorted(faili_teed):
+        with open(faili_tee, encoding="utf-8") as f:
+            if faili_tee.endswith(".jsonl"):
+                read = (json.loads(rida) for rida in f if rida.strip())
+            else:
+                read = json.load(f)
+            for rida in read:
+                hind = hind_tekstist_arvuks(rida.get("hind"))
+                if rida.get("nimi") and hind:
+                    yield " ".join(rida["nimi"].split()), hind
+
+
+def loe_jaotused(faili_teed: List[str]) -> Jaotused:
+    # Mallid, kaubamärgid ja suurused päris poodide failidest
+    tooted = list(_loe_tooted(faili_teed))
+    esimesed: Dict[str, int] = {}
+    for nimi, _hind in tooted:
+        esimene = nimi.split()[0]
+        esimesed[esimene] = esimesed.get(esimene, 0) + 1
+    # Kaubamärgid nagu poed.py-s (vt kaubamargid); kaaluks esinemiste arv
+    teadaolevad = kaubamargid(normaliseeri_tekst(nimi) for nimi, _hind in tooted)
+    margid = {}
+    for sona, arv in esimesed.items():
+        sonad = toote_sonad(normaliseeri_tekst(sona))
+        if sonad and sonad[0] in teadaolevad:
+            margid[sona] = arv
+
+    jaotused = Jaotused()
+    for nimi, hind in tooted:
+        sonad = nimi.split()
+        kaubamargiga = len(sonad) > 1 and sonad[0] in margid
+        if kaubamargiga:
+            nimi = " ".join(sonad[1:])
+
+        # Suurus lõigatakse välja (lower() ei muuda eesti tähtede arvu)
+        vaste = KOGUSE_MUSTER.search(nimi.lower())
+        kogus = loe_kogus(nimi.lower())
+        if vaste and kogus and len(nimi) == len(nimi.lower()):
+            enne, parast = nimi[:vaste.start()].strip(" ,"), nimi[vaste.end():].strip(" ,")
+            maht, pohiuhik = kogus
+            jaotused.kogused.setdefault(pohiuhik, []).append(maht)
+            uhiku_hind = hind / maht
+        else:
+            enne, parast, pohiuhik, uhiku_hind = nimi, "", None, hind
+        if enne:
+            jaotused.mallid.append(Mall(enne, parast, kaubamargiga, pohiuhik,
+                                        kogus[0] if pohiuhik else None, uhiku_hind))
+
+    jaotused.margid = list(margid)
+    jaotused.margi_kaalud = list(accumulate(margid.values()))
+    return jaotused
+
+
+# 1. Tooted
+
+def _arv_tekstina(arv: float, koma: bool) -> str:
+    tekst = f"{arv:.3f}".rstrip("0").rstrip(".")
+    return tekst.replace(".", ",") if koma else tekst
+
+
+def suurus_tekstina(maht: float, pohiuhik: str, tuhikuga: bool, koma: bool) -> str:
+    # (1500, "ml") -> "1.5L" / "1,5 l"; (500, "g") -> "500g" / "500 g"
+    if pohiuhik == "g" and maht >= 1000:
+        arv, uhik = maht / 1000, "kg"
+    elif pohiuhik == "ml" and maht >= 1000:
+        arv, uhik = maht / 1000, "l" if tuhikuga else "L"
+    else:
+        arv, uhik = maht, pohiuhik
+    return _arv_tekstina(arv, koma) + (" " if tuhikuga else "") + uhik
+
+
+@dataclass
+class Toode:
+    # Poest sõltumatu toode; poe nimi ja hind tehakse sellest (vt poe_rida)
+    mall: Mall
+    kaubamark: str
+    maht: float | None
+    lisa: str
+    hind: float
+
+
+def loo_toode(jaotused: Jaotused, rng: random.Random) -> Toode:
+    mall = rng.choice(jaotused.mallid)
+    # Kaubamärgita mallid (puuviljad jms) saavad mõnikord poe oma kaubamärgi
+    kaubamark = ""
+    if mall.kaubamargiga or rng.random() < 0.3:
+        kaubamark = jaotused.margid[bisect.bisect_right(
+            jaotused.margi_kaalud, rng.random() * jaotused.margi_kaalud[-1])]
+
+    maht = None
+    hind = mall.uhiku_hind
+    if mall.pohiuhik is not None:
+        maht = rng.choice(jaotused.kogused[mall.pohiuhik])
+        # Suurem pakk on kilo kohta veidi odavam
+        hind = mall.uhiku_hind * maht * (maht / mall.maht) ** -0.1
+    # Sõnad pärast suurust ("viilutatud") jäävad mõnikord ära
+    lisa = mall.parast if rng.random() < 0.8 else ""
+    hind *= math.exp(rng.gauss(0, 0.15))
+    return Toode(mall, kaubamark, maht, lisa, max(0.05, hind))
+
+
+def toote_nimi(toode: Toode, tuhikuga: bool, koma: bool) -> str:
+    osad = [toode.kaubamark, toode.mall.enne]
+    if toode.maht is not None:
+        osad.append(suurus_tekstina(toode.maht, toode.mall.pohiuhik, tuhikuga, koma))
+    osad.append(toode.lisa)
+    nimi = " ".join(osa for osa in osad if osa)
+    return nimi[:1].upper() + nimi[1:]
+
+
+@dataclass
+class PoeStiil:
+    nimi: str
+    hinnatase: float
+    koma: bool      # "1,89 €" ja "1,5 l"
+    tuhikuga: bool  # "500 g"
+
+
+def loo_poed(poode: int, rng: random.Random) -> List[PoeStiil]:
+    stiilid = []
+    for i in range(poode):
+        nimi = POODIDE_NIMED[i % len(POODIDE_NIMED)]
+        if i >= len(POODIDE_NIMED):
+            nimi += f"_{i // len(POODIDE_NIMED) + 1}"
+        koma = i % 2 == 1
+        stiilid.append(PoeStiil(nimi, rng.uniform(0.9, 1.15), koma, tuhikuga=koma))
+    return stiilid
+
+
+def poe_rida(toode: Toode, stiil: PoeStiil, rng: random.Random) -> Dict[str, str]:
+    # {"nimi": ..., "hind": ...} poe enda kirjutusviisiga
+    hind = max(0.05, round(toode.hind * stiil.hinnatase * math.exp(rng.gauss(0, 0.05)), 2))
+    hinna_tekst = f"{hind:.2f} €"
+    return {
+        "nimi": toote_nimi(toode, stiil.tuhikuga, stiil.koma),
+        "hind": hinna_tekst.replace(".", ",") if stiil.koma else hinna_tekst,
+    }
+
+
+def loo_tooted(jaotused: Jaotused, arv: int, rng: random.Random) -> List[Toode]:
+    # arv erinevat toodet (nimi ühes kirjutusviisis on unikaalne)
+    tooted: List[Toode] = []
+    nimed = set()
+    katseid = 0
+    while len(tooted) < arv and katseid < arv * 20:
+        katseid += 1
+        toode = loo_toode(jaotused, rng)
+        nimi = normaliseeri_tekst(toote_nimi(toode, False, False))
+        if nimi in nimed:
+            continue
+        nimed.add(nimi)
+        tooted.append(toode)
+    return tooted
+
+
+# 2. Ostukorvid
+
+def moonuta(nimi: str, rng: random.Random) -> str:
+    # Nagu kasutaja kirjutaks: täpne nimi, trükiviga, osa nimest või mõlemad
+    valik = rng.random()
+    if valik < 0.4:
+        return nimi
+    if valik >= 0.6:
+        nimi = _osa_nimest(nimi, rng)
+    if valik < 0.6 or valik >= 0.8:
+        nimi = _trukiviga(nimi, rng)
+    return nimi
+
+
+def _trukiviga(nimi: str, rng: random.Random) -> str:
+    if len(nimi) < 4:
+        return nimi
+    i = rng.randrange(1, len(nimi) - 1)
+    viga = rng.random()
+    if viga < 0.3:
+        return nimi[:i] + nimi[i + 1] + nimi[i] + nimi[i + 2:]   # vahetatud tähed
+    if viga < 0.55:
+        return nimi[:i] + nimi[i + 1:]                           # puuduv täht
+    if viga < 0.75:
+        return nimi[:i] + nimi[i] + nimi[i:]                     # topelt täht
+    naabrid = NAABRID.get(nimi[i].lower())
+    if not naabrid:
+        return nimi[:i] + nimi[i + 1:]
+    return nimi[:i] + rng.choice(naabrid) + nimi[i + 1:]         # kõrvalklahv
+
+
+def _osa_nimest(nimi: str, rng: random.Random) -> str:
+    sonad = nimi.split()
+    if len(sonad) < 2:
+        return nimi
+    valik = rng.random()
+    if valik < 0.4:
+        return " ".join(sonad[1:])                               # ilma kaubamärgita
+    if valik < 0.7:
+        ilma_suuruseta = KOGUSE_MUSTER.sub(" ", nimi.lower()).split()
+        return " ".join(ilma_suuruseta) or nimi
+    return " ".join(sonad[:max(1, len(sonad) // 2)])             # nime algus
+
+
+def loo_korvid(poodide_read: List[List[Dict[str, str]]], arv: int,
+               rng: random.Random) -> Iterator[dict]:
+    # {"id", "korv": {nimi: kogus}}; tooted on mõne poe tooted (moonutatud)
+    for korvi_id in range(1, arv + 1):
+        korv: Dict[str, int] = {}
+        for _ in range(rng.randint(*KORVI_SUURUS)):
+            read = rng.choice(poodide_read)
+            if not read:
+                continue
+            nimi = moonuta(rng.choice(read)["nimi"], rng)
+            korv[nimi] = korv.get(nimi, 0) + rng.choice((1, 1, 1, 2, 2, 3, 5))
+        yield {"id": korvi_id, "korv": korv}
+
+
+# 3. Failid
+
+def genereeri(kaust: str, tooteid: int, poode: int, korve: int = 0, seeme: int = 1,
+              jsonl: bool = False, allikad: List[str] | None = None) -> Dict[str, int]:
+    # Kirjutab kokku umbes `tooteid` poe rida `poode` poodi (kaust/data/)
+    # ja `korve` ostukorvi (kaust/korvid.jsonl)
+    rng = random.Random(seeme)
+    jaotused = loe_jaotused(allikad if allikad is not None else poodide_failid())
+    if not jaotused.mallid:
+        raise ValueError("Lähtefailides pole ühtegi toodet.")
+
+    poed = loo_poed(poode, rng)
+    katvus = KATVUS if poode > 1 else 1.0
+    tooted = loo_tooted(jaotused, math.ceil(tooteid / (poode * katvus)), rng)
+
+    andmete_kaust = os.path.join(kaust, "data")
+    os.makedirs(andmete_kaust, exist_ok=True)
+    poodide_read: List[List[Dict[str, str]]] = []
+    ridu = 0
+    for stiil in poed:
+        read = [poe_rida(toode, stiil, rng) for toode in tooted if rng.random() < katvus]
+        # Poes pole tooteid kataloogi järjekorras
+        rng.shuffle(read)
+        tee = os.path.join(andmete_kaust, f"{stiil.nimi}_products.json" + ("l" if jsonl else ""))
+        # Eelmise käivituse teises vormingus fail annaks sama nimega teise poe
+        vana = tee[:-1] if jsonl else tee + "l"
+        if os.path.exists(vana):
+            os.remove(vana)
+        with open(tee, "w", encoding="utf-8") as f:
+            if jsonl:
+                for rida in read:
+                    f.write(json.dumps(rida, ensure_ascii=False) + "\n")
+            else:
+                json.dump(read, f, ensure_ascii=False, indent=1)
+        ridu += len(read)
+        # Korvide jaoks piisab valimist, kõiki ridu pole vaja mälus hoida
+        poodide_read.append(read[:10000])
+
+    if korve:
+        with open(os.path.join(kaust, "korvid.jsonl"), "w", encoding="utf-8") as f:
+            for korv in loo_korvid(poodide_read, korve, rng):
+                f.write(json.dumps(korv, ensure_ascii=False) + "\n")
+
+    return {"poode": len(poed), "tooteid": len(tooted), "ridu": ridu, "korve": korve}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teeb data/*.json põhjal suured sünteetilised poed ja ostukorvid.")
+    parser.add_argument("-n", "--tooteid", type=int, default=100000, help="poe ridu kokku (kõik poed)")
+    parser.add_argument("--poode", type=int, default=10)
+    parser.add_argument("--korve", type=int, default=1000, help="ostukorvide arv (korvid.jsonl)")
+    parser.add_argument("--seeme", type=int, default=1)
+    parser.add_argument("--jsonl", action="store_true", help="poed JSON Lines failidena")
+    parser.add_argument("-o", "--kaust", default="sunteetiline", help="väljundkaust")
+    args = parser.parse_args()
+
+    algus = time.perf_counter()
+    kokku = genereeri(args.kaust, args.tooteid, args.poode, args.korve, args.seeme, args.jsonl)
+    print(f"Valmis ({time.perf_counter() - algus:.1f} s): {kokku['poode']} poodi, "
+          f"{kokku['tooteid']} erinevat toodet, {kokku['ridu']} rida, {kokku['korve']} korvi "
+          f"-> {args.kaust}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#Pealkiri: Ostukorvide hindamine ilma kasutajaliideseta
+#Käivitamiseks tuleb panna bash terminali:
+# python hinda_korvid.py korvid.jsonl > tulemused.jsonl
+#
+# Sisend (JSONL): igal real {"id": ..., "korv": {"toote nimi": kogus, ...}}
+# Sisend (CSV): veerud id,toode,kogus; sama id read peavad olema järjest
+# Väljund (JSONL): igal real ühe korvi odavaim pood ja kõigi poodide summad
+
+import argparse
+import csv
+import json
+import sys
+import time
+from itertools import groupby, islice
+from typing import Dict, Iterator, List, TextIO, Tuple
+
+from poed import (
+    HinnaMaatriks,
+    ParalleelneArvutaja,
+    VasteteVahemalu,
+    arvuta_poed,
+    lae_poed,
+    lae_vastavus,
+    normaliseeri_tekst,
+    np,
+)
+
+# Mitu korvi hinnatakse korraga (mälu ei sõltu sisendi suurusest)
+PARTII_SUURUS = 512
+
+
+def korv_sonastikuks(toorkorv) -> Dict[str, int]:
+    # Normaliseerib korvi: { toode_norm : kogus }
+    if isinstance(toorkorv, dict):
+        read = toorkorv.items()
+    else:
+        read = ((rida[0], rida[1]) if isinstance(rida, list) else (rida["nimi"], rida.get("kogus", 1))
+                for rida in toorkorv)
+
+    ostukorv: Dict[str, int] = {}
+    for nimi, kogus in read:
+        voti = normaliseeri_tekst(str(nimi))
+        if voti:
+            ostukorv[voti] = ostukorv.get(voti, 0) + int(kogus)
+    return ostukorv
+
+
+def loe_jsonl(sisend: TextIO) -> Iterator[Tuple[object, Dict[str, int] | None, str | None]]:
+    # (id, korv, viga) iga sisendrea kohta
+    for reanumber, rida in enumerate(sisend, start=1):
+        if not rida.strip():
+            continue
+        try:
+            kirje = json.loads(rida)
+            korvi_id = kirje.get("id", reanumber)
+            toorkorv = kirje.get("korv", kirje.get("ostukorv"))
+            if toorkorv is None:
+                raise ValueError("puudub väli 'korv'")
+            yield korvi_id, korv_sonastikuks(toorkorv), None
+        except (ValueError, TypeError, KeyError, IndexError, AttributeError) as viga:
+            yield reanumber, None, str(viga)
+
+
+def loe_csv(sisend: TextIO) -> Iterator[Tuple[object, Dict[str, int] | None, str | None]]:
+    # (id, korv, viga); järjestikused sama id-ga read on üks korv
+    lugeja = csv.DictReader(sisend)
+    for korvi_id, read in groupby(lugeja, key=lambda r: r.get("id")):
+        try:
+            yield korvi_id, korv_sonastikuks(
+                [[r["toode"], r.get("kogus") or 1] for r in read]
+            ), None
+        except (ValueError, TypeError, KeyError) as viga:
+            yield korvi_id, None, str(viga)
+
+
+def tulemus_kirjeks(korvi_id, tulemused: List[Tuple[str, float, List[str]]]) -> dict:
+    # Väljundi JSON-kirje ühe korvi kohta
+    parim_nimi, parim_hind, parim_puudu = tulemused[0] if tulemused else (None, 0.0, [])
+    return {
+        "id": korvi_id,
+        "parim_pood": parim_nimi,
+        "koguhind": round(parim_hind, 2),
+        "puudu": parim_puudu,
+        "poed": [
+            {"pood": nimi, "koguhind": round(hind, 2), "puudu": puudu}
+            for nimi, hind, puudu in tulemused
+        ],
+    }
+
+
+def _maatriksi_tulemused(maatriks: HinnaMaatriks, korvid: List[Dict[str, int]]):
+    # Terve partii ühe maatrikskorrutisega; puuduolevad tooted loetakse maatriksist
+    summad, _puuduvaid, puudub = maatriks.hinnad_korvidele(korvid)
+    for k, ostukorv in enumerate(korvid):
+        tulemused = []
+        for s, pood in enumerate(maatriks.poed):
+            puudu = [t for t in ostukorv if puudub[t][s]]
+            tulemused.append((pood.nimi, float(summad[k, s]), puudu))
+        tulemused.sort(key=lambda x: (len(x[2]) > 0, x[1]))
+        yield tulemused
+
+
+def hinda(sisend: TextIO, valjund: TextIO, formaat: str, protsesse: int, maatriksiga: bool) -> Dict[str, float]:
+    # Hindab kõik sisendi korvid partiide kaupa ja kirjutab tulemused kohe välja
+    poed = lae_poed()
+    if not poed:
+        raise SystemExit("Kaustas data/ ei ole ühtegi poodi.")
+
+    # Vastavustabel: poodidevahelised vasted ilma hägusa otsinguta
+    vahemalu = VasteteVahemalu(vastavus=lae_vastavus(poed))
+    arvutaja = ParalleelneArvutaja(protsesse=protsesse) if protsesse > 1 else None
+    maatriks = HinnaMaatriks(poed, vahemalu) if maatriksiga else None
+
+    kirjed = loe_csv(sisend) if formaat == "csv" else loe_jsonl(sisend)
+    korve = vigu = 0
+    algus = time.perf_counter()
+
+    try:
+        while True:
+            partii = list(islice(kirjed, PARTII_SUURUS))
+            if not partii:
+                break
+
+            korvid = [korv for _id, korv, viga in partii if viga is None]
+            if arvutaja is not None:
+                tulemused = arvutaja.arvuta_korvid(korvid)
+            elif maatriks is not None:
+                tulemused = _maatriksi_tulemused(maatriks, korvid)
+            else:
+                tulemused = (arvuta_poed(poed, korv, vahemalu) for korv in korvid)
+
+            # Väljund sisendi järjekorras: vigased read tulemuste vahel
+            tulemused = iter(tulemused)
+            for korvi_id, _korv, viga in partii:
+                if viga is None:
+                    kirje = tulemus_kirjeks(korvi_id, next(tulemused))
+                else:
+                    kirje = {"id": korvi_id, "viga": viga}
+                    vigu += 1
+                valjund.write(json.dumps(kirje, ensure_ascii=False))
+                valjund.write("\n")
+
+            korve += len(korvid)
+    finally:
+        if arvutaja is not None:
+            arvutaja.sulge()
+
+    kestus = time.perf_counter() - algus
+    return {
+        "korve": korve,
+        "vigu": vigu,
+        "sekundit": round(kestus, 3),
+        "korve_sekundis": round(korve / kestus, 1) if kestus > 0 else 0.0,
+        **vahemalu.statistika(),
+    }
+
+
+def main(argumendid: List[str] | None = None):
+    parser = argparse.ArgumentParser(description="Hindab ostukorvid kõigis poodides (ilma kasutajaliideseta).")
+    parser.add_argument("sisend", nargs="?", default="-", help="JSONL/CSV fail või - (stdin)")
+    parser.add_argument("-o", "--valjund", default="-", help="väljundi JSONL fail või - (stdout)")
+    parser.add_argument("--formaat", choices=("jsonl", "csv"), help="vaikimisi faili laiendi järgi")
+    parser.add_argument("-j", "--protsesse", type=int, default=1, help="protsesside arv (vaikimisi 1)")
+    parser.add_argument("--maatriks", action="store_true", help="vektoriseeritud hinnamaatriks (vajab numpy)")
+    args = parser.parse_args(argumendid)
+
+    formaat = args.formaat or ("csv" if args.sisend.lower().endswith(".csv") else "jsonl")
+    if args.maatriks and np is None:
+        parser.error("--maatriks vajab numpy paketti")
+
+    sisend = sys.stdin if args.sisend == "-" else open(args.sisend, encoding="utf-8", newline="")
+    valjund = sys.stdout if args.valjund == "-" else open(args.valjund, "w", encoding="utf-8")
+    try:
+        kokkuvote = hinda(sisend, valjund, formaat, args.protsesse, args.maatriks)
+    finally:
+        if sisend is not sys.stdin:
+            sisend.close()
+        if valjund is not sys.stdout:
+            valjund.close()
+
+    print(json.dumps(kokkuvote, ensure_ascii=False), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
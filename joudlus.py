@@ -0,0 +1,283 @@
+#Pealkiri: Laadimise, vastete, hinnastamise ja soovituste jõudlusmõõtmine
+#Käivitamiseks tuleb panna bash terminali:
+# python joudlus.py
+# python joudlus.py --korrad 1 10 100 --json tulemused.json
+#
+# Mõõdab ilma kasutajaliideseta data/ failidel ja nende põhjal tehtud
+# sünteetilistel kataloogidel (10x, 100x; vt genereeri_andmed.py). Iga
+# operatsiooni kohta: latentsuse protsentiilid (p50/p90/p99, ms) ja ühe
+# kutse tipp-mälu (tracemalloc). Võrdluseks ka poed2.py vanad variandid
+# (alamsõne otsing, list comprehension soovitusteks).
+# Suured kataloogid kirjutatakse ajutisse kausta; data/ ei muudeta.
+# 100x võtab mitu minutit (difflib ja hägus otsing ilma vahemäluta).
+
+import argparse
+import gc
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+import genereeri_andmed
+import poed
+import poed2
+
+# Kui kaua iga operatsiooni kõige rohkem mõõdetakse (sekundites)
+MOOTMISE_AEG_S = 2.0
+# Vähemalt nii mitu mõõtmist, isegi kui aeg saab otsa
+VAHIM_KORDUSI = 3
+# Mitu esimest kutset mõõdetakse ka tracemalloc-iga (see aeglustab;
+# vähemalt üks, edasi kuni mõõtmise aeg saab otsa)
+MALU_KORDUSI = 3
+
+# Päringute arv (ostukorvi read, otsingud) ja ühe korvi suurus
+PARINGUID = 200
+KORVI_SUURUS = 20
+
+# Mitme esimese päringu vasteid võrreldakse difflibiga alati (mõõtmise
+# ajapiirist sõltumata). Kordaja 100 juures võtab difflib umbes 5 s
+# päringu kohta, seega 30 päringu võrdlus kokku üle kahe minuti.
+VORDLUSE_VALIM = 30
+
+# Juhuarvude seeme, et kataloogid ja päringud oleksid iga kord samad
+SEEME = 1
+
+
+# 1. Kataloogid ja päringud
+
+def loo_andmed(kaust: str, kordaja: int):
+    # kaust/data/: 1x on data/ failid ise, suuremad on sünteetilised
+    # (genereeri_andmed.py) sama poodide arvuga
+    faili_teed = sorted(poed.poodide_failid())
+    andmete_kaust = os.path.join(kaust, poed.ANDMETE_KAUST)
+    if kordaja == 1:
+        os.makedirs(andmete_kaust, exist_ok=True)
+        for faili_tee in faili_teed:
+            shutil.copy(faili_tee, andmete_kaust)
+        return
+    ridu = sum(1 for faili_tee in faili_teed for _rida in poed.loe_tooteread(faili_tee))
+    genereeri_andmed.genereeri(kaust, ridu * kordaja, len(faili_teed), seeme=SEEME + kordaja,
+                               allikad=faili_teed)
+
+
+def loo_paringud(koik_poed: List[poed.Pood], rng: random.Random) -> List[str]:
+    # Ostukorvi read: pooled täpsed nimed, pooled moonutatud
+    nimed = sorted({nimi for pood in koik_poed for nimi in pood.kaubad.keys()})
+    valitud = rng.sample(nimed, min(PARINGUID, len(nimed)))
+    return [nimi if i % 2 == 0 else genereeri_andmed.moonuta(nimi, rng) for i, nimi in enumerate(valitud)]
+
+
+# 2. Mõõtmine
+
+def protsentiil(vaartused: List[float], p: float) -> float:
+    jarjestatud = sorted(vaartused)
+    return jarjestatud[min(len(jarjestatud) - 1, int(p / 100 * len(jarjestatud)))]
+
+
+def mooda(kutsed: List[Callable[[], object]], aeg_s: float = MOOTMISE_AEG_S,
+          vastused: List[object] | None = None) -> Dict[str, float]:
+    # Iga kutse aeg eraldi (kuni aeg saab otsa); mälu esimestel kutsetel.
+    # vastused: kui antud, lisatakse sinna mõõdetud kutsete tulemused
+    tipud = []
+    algus = time.perf_counter()
+    for kutse in kutsed[:MALU_KORDUSI]:
+        tracemalloc.start()
+        kutse()
+        tipud.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        if time.perf_counter() - algus >= aeg_s:
+            break
+
+    ajad = []
+    gc.collect()
+    algus = time.perf_counter()
+    for kutse in kutsed:
+        kutse_algus = time.perf_counter()
+        vastus = kutse()
+        ajad.append(time.perf_counter() - kutse_algus)
+        if vastused is not None:
+            vastused.append(vastus)
+        if len(ajad) >= VAHIM_KORDUSI and time.perf_counter() - algus >= aeg_s:
+            break
+
+    return {
+        "n": len(ajad),
+        "p50_ms": protsentiil(ajad, 50) * 1000,
+        "p90_ms": protsentiil(ajad, 90) * 1000,
+        "p99_ms": protsentiil(ajad, 99) * 1000,
+        "keskm_ms": statistics.fmean(ajad) * 1000,
+        "malu_kb": max(tipud) / 1024 if tipud else 0.0,
+    }
+
+
+def _kustuta_hetkeseis():
+    shutil.rmtree(poed.HETKESEISU_KAUST, ignore_errors=True)
+
+
+def mooda_laadimist(aeg_s: float) -> Dict[str, dict]:
+    # Töökaustas peab olema data/ (vt loo_andmed)
+    def kulm():
+        _kustuta_hetkeseis()
+        return poed.lae_poed()
+
+    tulemused = {"lae_poed (JSON)": mooda([kulm] * 50, aeg_s)}
+    poed.lae_poed()
+    tulemused["lae_poed (hetkeseis)"] = mooda([poed.lae_poed] * 50, aeg_s)
+    tulemused["poed2.lae_poed"] = mooda([poed2.lae_poed] * 50, aeg_s)
+    return tulemused
+
+
+def mooda_vasteid(koik_poed: List[poed.Pood], paringud: List[str], aeg_s: float,
+                  valim: int = VORDLUSE_VALIM) -> Dict[str, dict]:
+    # Üks päring = ühe ostukorvi rea vaste kõigis poodides
+    nimed = {pood.nimi: list(pood.kaubad.keys()) for pood in koik_poed}
+
+    def difflibiga(otsitav):
+        return [poed.leia_parim_vaste(otsitav, nimed[pood.nimi]) for pood in koik_poed]
+
+    def indeksiga(otsitav):
+        return [pood.indeks.leia(otsitav) for pood in koik_poed]
+
+    def alamsonega(otsitav):
+        return [poed2.leia_parim_vaste(otsitav, nimed[pood.nimi]) for pood in koik_poed]
+
+    tulemused = {}
+    vastused: Dict[str, List[object]] = {}
+    for nimi, leia in (("leia_parim_vaste (difflib)", difflibiga),
+                       ("HaguneIndeks.leia", indeksiga),
+                       ("poed2.leia_parim_vaste (alamsõne)", alamsonega)):
+        vastused[nimi] = []
+        tulemused[nimi] = mooda([lambda p=p: leia(p) for p in paringud], aeg_s, vastused[nimi])
+
+    # Kui sageli annavad kiired variandid sama vaste mis difflib: alati samal
+    # valimil (esimesed `valim` päringut), mitte ainult neil, mis ajapiiri
+    # sisse jõudsid. Mõõtmisel saadud vastuseid kasutatakse uuesti.
+    valim_paringud = paringud[:valim]
+    algus = time.perf_counter()
+    valimi_vastused = {}
+    for nimi, leia in (("leia_parim_vaste (difflib)", difflibiga),
+                       ("HaguneIndeks.leia", indeksiga),
+                       ("poed2.leia_parim_vaste (alamsõne)", alamsonega)):
+        olemas = vastused[nimi][:len(valim_paringud)]
+        valimi_vastused[nimi] = olemas + [leia(p) for p in valim_paringud[len(olemas):]]
+    vordluse_s = time.perf_counter() - algus
+
+    oiged = valimi_vastused["leia_parim_vaste (difflib)"]
+    for nimi in ("HaguneIndeks.leia", "poed2.leia_parim_vaste (alamsõne)"):
+        sama = sum(vastus == oige for vastus, oige in zip(valimi_vastused[nimi], oiged))
+        tulemused[nimi]["sama_mis_difflib"] = sama / len(oiged) if oiged else 0.0
+        tulemused[nimi]["vorreldud"] = len(oiged)
+        tulemused[nimi]["vordluse_s"] = vordluse_s
+    return tulemused
+
+
+def mooda_hinnastamist(koik_poed: List[poed.Pood], paringud: List[str], aeg_s: float) -> Dict[str, dict]:
+    # Korvid KORVI_SUURUS reaga; üks kutse = korv kõigis poodides
+    korvid = [
+        {toode: 1 + i % 3 for i, toode in enumerate(paringud[algus:algus + KORVI_SUURUS])}
+        for algus in range(0, len(paringud), KORVI_SUURUS)
+    ]
+    korvid = [korv for korv in korvid if korv]
+    tulemused = {
+        "arvuta_poe_korv (indeks)": mooda(
+            [lambda k=k: [poed.arvuta_poe_korv(p, k) for p in koik_poed] for k in korvid], aeg_s),
+    }
+
+    # Vahemälu soojendatakse ainult nende korvidega, mis eelmisena jõuti mõõta
+    # (suurel kataloogil on iga vahele jäänud vaste ise sekundeid)
+    korvid = korvid[:tulemused["arvuta_poe_korv (indeks)"]["n"]]
+    vahemalu = poed.VasteteVahemalu()
+    for korv in korvid:
+        poed.arvuta_poed(koik_poed, korv, vahemalu)
+    tulemused.update({
+        "arvuta_poe_korv (vahemälu)": mooda(
+            [lambda k=k: [poed.arvuta_poe_korv(p, k, vahemalu) for p in koik_poed] for k in korvid] * 20, aeg_s),
+        "poed2.arvuta_poe_korv": mooda(
+            [lambda k=k: [poed2.arvuta_poe_korv(p, k) for p in koik_poed] for k in korvid] * 20, aeg_s),
+    })
+    return tulemused
+
+
+def mooda_soovitusi(koik_poed: List[poed.Pood], paringud: List[str], aeg_s: float) -> Dict[str, dict]:
+    # Üks kutse = üks klahvivajutus: otsingu iga algus järjest (nagu trükkides)
+    koik_nimed = {nimi for pood in koik_poed for nimi in pood.kaubad.keys()}
+    indeks = poed.SoovitusteIndeks(koik_nimed)
+    nimekiri = list(koik_nimed)
+    klahvid = [paring[:n] for paring in paringud for n in range(1, len(paring) + 1)]
+
+    def vana(otsing):
+        return [t for t in nimekiri if otsing in t][:poed.SOOVITUSTE_ARV]
+
+    return {
+        "SoovitusteIndeks.otsi": mooda([lambda o=o: indeks.otsi(o) for o in klahvid], aeg_s),
+        "poed2 _uuenda_soovitusi filter": mooda([lambda o=o: vana(o) for o in klahvid], aeg_s),
+    }
+
+
+# 3. Väljund
+
+def tabel(kordaja: int, tooteid: int, tulemused: Dict[str, dict]):
+    print(f"\n== {kordaja}x ({tooteid} toodet) ==")
+    print(f"{'operatsioon':38} {'n':>5} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'mälu KB':>9}  märkus")
+    for nimi, tulemus in tulemused.items():
+        marge = ""
+        if "sama_mis_difflib" in tulemus:
+            marge = (f"{tulemus['sama_mis_difflib']:.0%} sama mis difflib "
+                     f"({tulemus['vorreldud']} päringut, võrdlus {tulemus['vordluse_s']:.1f} s)")
+        print(f"{nimi:38} {tulemus['n']:5d} {tulemus['p50_ms']:9.3f} {tulemus['p90_ms']:9.3f} "
+              f"{tulemus['p99_ms']:9.3f} {tulemus['malu_kb']:9.1f}  {marge}")
+
+
+def mooda_korda(kordaja: int, aeg_s: float, valim: int = VORDLUSE_VALIM) -> Tuple[int, Dict[str, dict]]:
+    # Kõik operatsioonid ühe kataloogi suuruse jaoks ajutises töökaustas
+    algne_kaust = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="joudlus-") as kaust:
+        loo_andmed(kaust, kordaja)
+        os.chdir(kaust)
+        try:
+            print(f"{kordaja}x: laadimine ...", file=sys.stderr)
+            tulemused = mooda_laadimist(aeg_s)
+            koik_poed = poed.lae_poed()
+            rng = random.Random(SEEME)
+            paringud = loo_paringud(koik_poed, rng)
+            print(f"{kordaja}x: vasted ...", file=sys.stderr)
+            tulemused.update(mooda_vasteid(koik_poed, paringud, aeg_s, valim))
+            print(f"{kordaja}x: hinnastamine ...", file=sys.stderr)
+            tulemused.update(mooda_hinnastamist(koik_poed, paringud, aeg_s))
+            print(f"{kordaja}x: soovitused ...", file=sys.stderr)
+            tulemused.update(mooda_soovitusi(koik_poed, paringud, aeg_s))
+        finally:
+            os.chdir(algne_kaust)
+    return sum(len(pood.kaubad) for pood in koik_poed), tulemused
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mõõdab laadimise, vastete, hinnastamise ja soovituste kiirust.")
+    parser.add_argument("--korrad", type=int, nargs="+", default=[1, 10, 100],
+                        help="kataloogi suurused data/ suhtes (vaikimisi 1 10 100)")
+    parser.add_argument("--aeg", type=float, default=MOOTMISE_AEG_S,
+                        help="kui kaua iga operatsiooni mõõdetakse (sekundites)")
+    parser.add_argument("--valim", type=int, default=VORDLUSE_VALIM,
+                        help="mitme päringu vasteid võrreldakse difflibiga (ajapiirist sõltumata)")
+    parser.add_argument("--json", metavar="FAIL", help="kirjuta tulemused ka JSON-faili")
+    args = parser.parse_args()
+
+    koik = {}
+    for kordaja in args.korrad:
+        tooteid, tulemused = mooda_korda(kordaja, args.aeg, args.valim)
+        tabel(kordaja, tooteid, tulemused)
+        koik[f"{kordaja}x"] = {"tooteid": tooteid, "tulemused": tulemused}
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(koik, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
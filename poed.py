@@ -3,25 +3,528 @@
 #Käivitamiseks tuleb panna bash terminali:
 # python poed.py
 
+import hashlib
+import heapq
 import json
+import math
+import mmap
 import os
+import queue
 import re
+import struct
+import threading
+import warnings
+import bisect
 import difflib
-from dataclasses import dataclass
-from typing import Dict, List, Tuple, Set
-
-import tkinter as tk
-from tkinter import ttk, messagebox
+from array import array
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import date
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple, Set
+
+try:
+    # Valikuline: ainult graafiline liides (Rakendus) vajab tkinterit;
+    # hinda_korvid.py ja teenus.py impordivad poed.py ka ilma selleta
+    import tkinter as tk
+    from tkinter import ttk, messagebox
+except ImportError:
+    tk = ttk = messagebox = None
+
+try:
+    # Valikuline: vektoriseeritud hinnamaatriks (HinnaMaatriks)
+    import numpy as np
+except ImportError:
+    np = None
 
 # Kaust, kus asuvad poodide JSON-failid
 ANDMETE_KAUST = "data"
 
+# Kaust, kuhu salvestatakse poodide kompileeritud hetkeseisud (.bin)
+HETKESEISU_KAUST = os.path.join(ANDMETE_KAUST, ".hetkeseis")
+
+# Hetkeseisu faili päis: tunnus, versioon, JSON-faili suurus, mtime ja
+# sha256, toodete arv, indeksi võtmete arv, nimede/võtmete baidid, postitusi.
+# Päisele järgnevad kataloogi veerud ja hägusa otsingu indeks.
+HETKESEISU_TUNNUS = b"ODAV"
+HETKESEISU_VERSIOON = 3
+HETKESEISU_PAIS = struct.Struct("<4sIQQ32sIIQQQ")
+
+# Sama piir, mida difflib.get_close_matches vaikimisi kasutab
+SARNASUSE_PIIR = 0.6
+
+# Mitu (pood, toode) vastet hoitakse vahemälus korraga
+VAHEMALU_SUURUS = 20000
+
+# Poed, kus on vähemalt nii palju tooteid, arvutatakse korvi tükkide kaupa
+SUURE_POE_PIIR = 20000
+
+# Mitu korvi rida ühes tükis (suurte poodide paralleelsel arvutamisel)
+KORVI_TUKI_SUURUS = 16
+
+# Mitu kataloogist puuduvat korvi rida HinnaMaatriks korraga veergudena
+# hoiab (kõige kauem kasutamata veerg antakse uuele reale)
+MAATRIKSI_LISAVEERGE = 4096
+
+# Mitu soovitust autocomplete näitab
+SOOVITUSTE_ARV = 12
+
+# Mitu millisekundit pärast viimast klahvivajutust soovitusi otsitakse
+SOOVITUSTE_VIIVITUS_MS = 120
+
+# Kui tihti põhilõim töölõime vastuseid kontrollib (ms)
+SOOVITUSTE_KONTROLL_MS = 15
+
+# Kui tihti põhilõim taustal laetud poode kontrollib (ms)
+LAADIMISE_KONTROLL_MS = 50
+
+# Poodidevaheline toodete vastavustabel (vt lahenda_tooted)
+VASTAVUSE_TEE = os.path.join(HETKESEISU_KAUST, "vastavus.tsv")
+VASTAVUSE_VERSIOON = 3
+# Vähim kaalutud sõnade kattuvus, et kaks toodet oleksid sama toode
+VASTAVUSE_PIIR = 0.5
+# Sõnu, mis esinevad rohkem kui nii paljudes toodetes, blokeerimiseks ei kasutata
+BLOKI_PIIR = 500
+
+# Odavamad asendused (vt UhikuHinnaIndeks.asendused): mitu igale ostukorvi
+# reale, vähim sõnade kattuvus ja sarnasuse kaal (ülejäänu on hinnavõit)
+ASENDUSTE_ARV = 3
+ASENDUSE_PIIR = 0.5
+ASENDUSE_KAAL = 0.6
+# Asenduse pakk võib olla kuni nii mitu korda suurem või väiksem
+ASENDUSE_SUURUSE_SUHE = 2.0
+
+# Hindade ajalugu (ainult lisatakse; vt HinnaAjalugu)
+AJALOO_KAUST = os.path.join(ANDMETE_KAUST, ".ajalugu")
+
+# Mitme päeva min/keskmist hinda ostukorvi juures näidatakse
+AJALOO_PAEVI = 30
+
+# Mitu märki suurest JSON-failist korraga loetakse
+LUGEMISE_PLOKK = 1 << 20
+
+# Kui tihti data/ kausta muudatusi kontrollitakse (sekundites)
+JALGIMISE_INTERVALL_S = 2.0
+
+# Eelmise päringu kõik vasted jäetakse kitsendamiseks meelde,
+# kui neid pole rohkem kui see
+KITSENDAMISE_PIIR = 5000
+
+
+class Kataloog:
+    # Kompaktne ühe poe tootekataloog. Nimed on ühes sorteeritud UTF-8
+    # stringitabelis (toote ID = järjekorranumber), nihked array("I") ja
+    # hinnad array("d") veerus. Käitub nagu Dict[str, float], kuid ei hoia
+    # iga toote kohta eraldi str/float objekte.
+    # Pakendi suurus loetakse nimest laadimisel: kogused array("d") põhiühikus
+    # (NaN = teadmata) ja uhikud array("B") (indeks UHIKUTE_KOODID-s).
+
+    def __init__(self, nimede_tabel: bytes, nihked: Sequence[int], hinnad: Sequence[float],
+                 kogused: Sequence[float] | None = None, uhikud: Sequence[int] | None = None):
+        self.nimede_tabel = nimede_tabel
+        self.nihked = nihked  # toote i nimi on tabel[nihked[i]:nihked[i + 1]]
+        self.hinnad = hinnad
+        if kogused is None or uhikud is None:
+            kogused, uhikud = array("d"), array("B")
+            for nimi in self.keys():
+                kogus = loe_kogus(nimi)
+                kogused.append(kogus[0] if kogus else math.nan)
+                uhikud.append(UHIKUTE_KOODID.index(kogus[1]) if kogus else 0)
+        self.kogused = kogused
+        self.uhikud = uhikud
+
+    @classmethod
+    def sonastikust(cls, kaubad: Dict[str, float]) -> "Kataloog":
+        # Ehitab kataloogi sõnastikust { normaliseeritud_nimi : hind }
+        # (sõnede järjestus on sama mis UTF-8 baitide järjestus). Vahepeal ei
+        # hoita iga toote kohta eraldi baitobjekte, et tipp-mälu jääks väikeseks.
+        nimed = sorted(kaubad)
+        tabel = bytearray()
+        nihked = array("I", [0])
+        for nimi in nimed:
+            tabel += nimi.encode("utf-8")
+            nihked.append(len(tabel))
+        return cls(bytes(tabel), nihked, array("d", (kaubad[nimi] for nimi in nimed)))
+
+    def __len__(self) -> int:
+        return len(self.hinnad)
+
+    def nimi(self, toote_id: int) -> str:
+        return self.nimede_tabel[self.nihked[toote_id]:self.nihked[toote_id + 1]].decode("utf-8")
+
+    def toote_id(self, nimi: str) -> int | None:
+        # Kahendotsing; UTF-8 baitide järjestus on sama mis tähtede järjestus
+        otsitav = nimi.encode("utf-8")
+        tabel, nihked = self.nimede_tabel, self.nihked
+        algus, lopp = 0, len(self.hinnad)
+        while algus < lopp:
+            keskel = (algus + lopp) // 2
+            if tabel[nihked[keskel]:nihked[keskel + 1]] < otsitav:
+                algus = keskel + 1
+            else:
+                lopp = keskel
+        if algus < len(self.hinnad) and tabel[nihked[algus]:nihked[algus + 1]] == otsitav:
+            return algus
+        return None
+
+    def __contains__(self, nimi) -> bool:
+        return isinstance(nimi, str) and self.toote_id(nimi) is not None
+
+    def __getitem__(self, nimi: str) -> float:
+        toote_id = self.toote_id(nimi)
+        if toote_id is None:
+            raise KeyError(nimi)
+        return self.hinnad[toote_id]
+
+    def get(self, nimi: str, vaikimisi: float | None = None) -> float | None:
+        toote_id = self.toote_id(nimi)
+        return vaikimisi if toote_id is None else self.hinnad[toote_id]
+
+    def __iter__(self) -> Iterator[str]:
+        return self.keys()
+
+    def keys(self) -> Iterator[str]:
+        return (self.nimi(i) for i in range(len(self.hinnad)))
+
+    def values(self) -> Iterator[float]:
+        return iter(self.hinnad)
+
+    def items(self) -> Iterator[Tuple[str, float]]:
+        return zip(self.keys(), self.hinnad)
+
+    def kogus(self, toote_id: int) -> Tuple[float, str] | None:
+        # Pakendi suurus põhiühikus, nt (500.0, "g"); None, kui nimes seda polnud
+        uhik = self.uhikud[toote_id]
+        return (self.kogused[toote_id], UHIKUTE_KOODID[uhik]) if uhik else None
+
+    def uhiku_hind(self, toote_id: int) -> Tuple[float, str] | None:
+        # Hind kilo, liitri või tüki kohta, nt (3.38, "kg")
+        kogus = self.kogus(toote_id)
+        if kogus is None:
+            return None
+        maht, pohiuhik = kogus
+        kordaja, hinna_uhik = HINNA_UHIKUD[pohiuhik]
+        return self.hinnad[toote_id] / maht * kordaja, hinna_uhik
+
+
+class HaguneIndeks:
+    # Tähemärkide pöördindeks ühe poe tootenimede jaoks.
+    # Annab sama vastuse kui difflib.get_close_matches(n=1), kuid kärbib
+    # kandidaadid enne SequenceMatcheri käivitamist: pikkuse aken
+    # (real_quick_ratio), ühiste tähtede arv (quick_ratio) ja LCS.
+
+    def __init__(self, kataloog: Kataloog, piir: float = SARNASUSE_PIIR):
+        self.piir = piir
+        self.kataloog = kataloog
+
+        # Toote ID-d nime pikkuse järgi, et pikkuse aken oleks üks järjestikune lõik
+        nimed = list(kataloog.keys())
+        self.jarjestus = array("I", sorted(range(len(nimed)), key=lambda i: len(nimed[i])))
+        self.pikkused = array("I", (len(nimed[i]) for i in self.jarjestus))
+
+        # (täht, k) -> positsioonid järjestuses, kus täht esineb vähemalt k korda
+        postitused: Dict[Tuple[str, int], List[int]] = {}
+        for j, toote_id in enumerate(self.jarjestus):
+            for taht, arv in Counter(nimed[toote_id]).items():
+                for k in range(1, arv + 1):
+                    postitused.setdefault((taht, k), []).append(j)
+        self.postitused: Dict[Tuple[str, int], Sequence[int]] = {
+            voti: array("I", positsioonid) for voti, positsioonid in postitused.items()
+        }
+
+    @classmethod
+    def valmis(
+        cls,
+        kataloog: Kataloog,
+        jarjestus: Sequence[int],
+        pikkused: Sequence[int],
+        postitused: Dict[Tuple[str, int], Sequence[int]],
+        piir: float = SARNASUSE_PIIR,
+    ) -> "HaguneIndeks":
+        # Loob indeksi juba ehitatud osadest (nt hetkeseisu failist)
+        indeks = cls.__new__(cls)
+        indeks.piir = piir
+        indeks.kataloog = kataloog
+        indeks.jarjestus = jarjestus
+        indeks.pikkused = pikkused
+        indeks.postitused = postitused
+        return indeks
+
+    def _pikkuse_aken(self, q: int) -> Tuple[int, int]:
+        # real_quick_ratio = 2 * min(q, L) / (q + L) >= piir
+        def sobib(pikkus: int) -> bool:
+            return 2.0 * min(q, pikkus) / (q + pikkus) >= self.piir
+
+        suurim = self.pikkused[-1]
+        vaikseim_l = q
+        while vaikseim_l > 1 and sobib(vaikseim_l - 1):
+            vaikseim_l -= 1
+        suurim_l = q
+        while suurim_l < suurim and sobib(suurim_l + 1):
+            suurim_l += 1
+
+        return (
+            bisect.bisect_left(self.pikkused, vaikseim_l),
+            bisect.bisect_right(self.pikkused, suurim_l),
+        )
+
+    def leia(self, otsitav: str) -> str | None:
+        # Leiab kõige sarnasema tootenime (nagu leia_parim_vaste)
+        if not self.pikkused:
+            return None
+
+        q = len(otsitav)
+        if q == 0:
+            return leia_parim_vaste(otsitav, list(self.kataloog.keys()))
+
+        algus, lopp = self._pikkuse_aken(q)
+        if algus >= lopp:
+            return None
+
+        # Vähim ühiste tähtede arv, mis võib quick_ratio piiri ületada
+        vaikseim_q_l = q + self.pikkused[algus]
+        vaja = 0
+        while 2.0 * vaja / vaikseim_q_l < self.piir:
+            vaja += 1
+
+        # (täht, k) paaride postitused pikkuse akna piires
+        loigud = []
+        for taht, arv in Counter(otsitav).items():
+            for k in range(1, arv + 1):
+                postitus = self.postitused.get((taht, k), [])
+                loigud.append(postitus[
+                    bisect.bisect_left(postitus, algus):bisect.bisect_left(postitus, lopp)
+                ])
+
+        # Prefiksfilter: kandidaat, millel on vähemalt `vaja` ühist tähte,
+        # peab esinema mõnes q - vaja + 1 lühimas postituses
+        if vaja == 0:
+            kandidaadid: Iterable[int] = range(algus, lopp)
+        else:
+            loigud.sort(key=len)
+            kandidaadid = set().union(*loigud[: q - vaja + 1])
+
+        # Ühiste tähtede arv ehk quick_ratio lugeja kõigile korraga
+        uhised = Counter()
+        for loik in loigud:
+            uhised.update(loik)
+
+        ulempiirid: List[Tuple[float, int]] = []
+        for i in kandidaadid:
+            ulempiir = 2.0 * uhised[i] / (q + self.pikkused[i])
+            if ulempiir >= self.piir:
+                ulempiirid.append((ulempiir, i))
+        ulempiirid.sort(reverse=True)
+
+        # Bitiparalleelse LCS-i jaoks: täht -> bitimask otsitavas
+        maskid: Dict[str, int] = {}
+        for j, taht in enumerate(otsitav):
+            maskid[taht] = maskid.get(taht, 0) | (1 << j)
+        koik_bitid = (1 << q) - 1
+
+        vordleja = difflib.SequenceMatcher()
+        vordleja.set_seq2(otsitav)
+        parim: Tuple[float, str] | None = None
+
+        # quick_ratio ja LCS on mõlemad ratio ülempiirid (difflibi sobivad
+        # plokid moodustavad ühise alamjada). Käime kandidaadid läbi
+        # ülempiiri kahanevas järjekorras ja lõpetame, kui parimat enam
+        # ületada ei saa.
+        for ulempiir, i in ulempiirid:
+            if parim is not None and ulempiir < parim[0]:
+                break
+
+            nimi = self.kataloog.nimi(self.jarjestus[i])
+            v = koik_bitid
+            for taht in nimi:
+                u = v & maskid.get(taht, 0)
+                v = ((v + u) | (v - u)) & koik_bitid
+            lcs_piir = 2.0 * (q - v.bit_count()) / (q + len(nimi))
+            if lcs_piir < self.piir or (parim is not None and lcs_piir < parim[0]):
+                continue
+
+            vordleja.set_seq1(nimi)
+            suhe = vordleja.ratio()
+            if suhe >= self.piir and (parim is None or (suhe, nimi) > parim):
+                parim = (suhe, nimi)
+
+        return parim[1] if parim else None
+
+
+class SoovitusteIndeks:
+    # Autocomplete indeks kõigi poodide tootenimede jaoks.
+    # Prefiksiga algavad nimed leitakse sorteeritud listist kahendotsinguga,
+    # ülejäänud alamsõne vasted bigrammide/trigrammide pöördindeksist.
+    # Kui kasutaja lisab otsingule tähe, kitsendatakse eelmise päringu vasteid.
+
+    def __init__(self, nimed: Iterable[str]):
+        self.nimed: List[str] = sorted(set(nimed))
+
+        # n-gramm -> nende nimede indeksid (kasvavas järjekorras)
+        ngrammid: Dict[str, List[int]] = {}
+        for i, nimi in enumerate(self.nimed):
+            for n in (2, 3):
+                for gramm in {nimi[j:j + n] for j in range(len(nimi) - n + 1)}:
+                    ngrammid.setdefault(gramm, []).append(i)
+        self.ngrammid: Dict[str, Sequence[int]] = {
+            gramm: array("I", indeksid) for gramm, indeksid in ngrammid.items()
+        }
+
+        self._eelmine_otsing: str | None = None
+        self._eelmised_vasted: List[int] | None = None
+
+    def _kandidaadid(self, otsing: str) -> Sequence[int]:
+        # Lühim n-grammi postitus, mis peab sisaldama kõiki vasteid
+        n = min(3, len(otsing))
+        if n == 1:
+            return range(len(self.nimed))
+        return min(
+            (self.ngrammid.get(otsing[j:j + n], []) for j in range(len(otsing) - n + 1)),
+            key=len,
+        )
+
+    def otsi(self, otsing: str, arv: int = SOOVITUSTE_ARV) -> List[str]:
+        # Tagastab kuni `arv` soovitust: enne prefiksi vasted, siis muud
+        if not otsing:
+            self._eelmine_otsing = self._eelmised_vasted = None
+            return []
+
+        nimed = self.nimed
+        prefiksid: List[str] = []
+        i = bisect.bisect_left(nimed, otsing)
+        while i < len(nimed) and len(prefiksid) < arv and nimed[i].startswith(otsing):
+            prefiksid.append(nimed[i])
+            i += 1
+
+        if (
+            self._eelmised_vasted is not None
+            and otsing.startswith(self._eelmine_otsing)
+        ):
+            kandidaadid: Sequence[int] = self._eelmised_vasted
+        else:
+            kandidaadid = self._kandidaadid(otsing)
+
+        muud: List[str] = []
+        if len(kandidaadid) <= KITSENDAMISE_PIIR:
+            vasted = [j for j in kandidaadid if otsing in nimed[j]]
+            self._eelmine_otsing, self._eelmised_vasted = otsing, vasted
+            for j in vasted:
+                if len(prefiksid) + len(muud) >= arv:
+                    break
+                if not nimed[j].startswith(otsing):
+                    muud.append(nimed[j])
+        else:
+            # Liiga palju kandidaate meelde jätmiseks: lõpetame varakult
+            self._eelmine_otsing = self._eelmised_vasted = None
+            for j in kandidaadid:
+                if len(prefiksid) + len(muud) >= arv:
+                    break
+                nimi = nimed[j]
+                if otsing in nimi and not nimi.startswith(otsing):
+                    muud.append(nimi)
+
+        return prefiksid + muud
+
+
+class SoovitusteKogum:
+    # Mitu SoovitusteIndeksit (nt poodide kaupa laetud nimed) ühe indeksina:
+    # annab sama tulemuse kui SoovitusteIndeks kõigist nimedest, kuid uue
+    # poe lisamisel indekseeritakse ainult selle poe uued nimed. Kogumit ei
+    # muudeta: lisa annab uue kogumi, mille saab teise lõime kasutusse vahetada.
+
+    def __init__(self, osad: Sequence[SoovitusteIndeks] = (), nimed: Set[str] = frozenset()):
+        self.osad = list(osad)
+        self._nimed = nimed
+
+    def lisa(self, nimed: Iterable[str]) -> "SoovitusteKogum":
+        # Uus kogum, kus on ka need nimed (juba olemasolevad jäetakse välja)
+        uued = set(nimed) - self._nimed
+        if not uued:
+            return self
+        return SoovitusteKogum(self.osad + [SoovitusteIndeks(uued)], self._nimed | uued)
+
+    def otsi(self, otsing: str, arv: int = SOOVITUSTE_ARV) -> List[str]:
+        # Osade nimed ei kattu ja iga osa vasted on sorteeritud: ühine tulemus
+        # on osade prefiksivastete ja muude vastete liitmine
+        prefiksid: List[List[str]] = []
+        muud: List[List[str]] = []
+        for osa in self.osad:
+            vasted = osa.otsi(otsing, arv)
+            prefiksid.append([nimi for nimi in vasted if nimi.startswith(otsing)])
+            muud.append([nimi for nimi in vasted if not nimi.startswith(otsing)])
+        koik_prefiksid = list(islice(heapq.merge(*prefiksid), arv))
+        return koik_prefiksid + list(islice(heapq.merge(*muud), arv - len(koik_prefiksid)))
+
 
 @dataclass
 class Pood:
     # Ühe poe andmed
     nimi: str
-    kaubad: Dict[str, float]  # normaliseeritud_nimi -> hind
+    kaubad: Kataloog  # normaliseeritud_nimi -> hind
+    indeks: HaguneIndeks | None = field(default=None, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Sõnastik teisendatakse kompaktseks kataloogiks
+        if isinstance(self.kaubad, dict):
+            self.kaubad = Kataloog.sonastikust(self.kaubad)
+        # Hägusa otsingu indeks ehitatakse üks kord poe laadimisel
+        if self.indeks is None:
+            self.indeks = HaguneIndeks(self.kaubad)
+
+
+class VasteteVahemalu:
+    # LRU-vahemälu hägusate vastete jaoks:
+    # (poe nimi, normaliseeritud toode) -> poe tootenimi või None (puudub).
+    # Poe kirjed kustutatakse ainult siis, kui selle poe kaubad laetakse uuesti.
+
+    def __init__(self, suurus: int = VAHEMALU_SUURUS, vastavus: "TooteVastavus | None" = None):
+        self.suurus = suurus
+        # Kui toode on vastavustabelis, pole hägusat otsingut vaja
+        self.vastavus = vastavus
+        self._kirjed: OrderedDict[Tuple[str, str], str | None] = OrderedDict()
+        # Poe nimi -> kaubad, mille põhjal selle poe kirjed arvutati
+        self._kataloogid: Dict[str, Kataloog] = {}
+        self.tabamused = 0
+        self.moodalaskmised = 0
+
+    def leia(self, pood: Pood, toode_norm: str) -> str | None:
+        # Tagastab poe vastava tootenime, arvutades selle vajadusel indeksist
+        if self._kataloogid.get(pood.nimi) is not pood.kaubad:
+            self.unusta_pood(pood.nimi)
+            self._kataloogid[pood.nimi] = pood.kaubad
+
+        if self.vastavus is not None:
+            teada, vaste = self.vastavus.poe_vaste(pood, toode_norm)
+            if teada:
+                return vaste
+
+        voti = (pood.nimi, toode_norm)
+        if voti in self._kirjed:
+            self._kirjed.move_to_end(voti)
+            self.tabamused += 1
+            return self._kirjed[voti]
+
+        self.moodalaskmised += 1
+        vaste = pood.indeks.leia(toode_norm)
+        self._kirjed[voti] = vaste
+        if len(self._kirjed) > self.suurus:
+            self._kirjed.popitem(last=False)
+        return vaste
+
+    def unusta_pood(self, poe_nimi: str):
+        # Kustutab ühe poe kõik kirjed (nt pärast kaupade uuesti laadimist)
+        for voti in [v for v in self._kirjed if v[0] == poe_nimi]:
+            del self._kirjed[voti]
+        self._kataloogid.pop(poe_nimi, None)
+
+    def statistika(self) -> Dict[str, int]:
+        # Tabamuste ja möödalaskmiste loendurid
+        return {
+            "kirjeid": len(self._kirjed),
+            "tabamused": self.tabamused,
+            "moodalaskmised": self.moodalaskmised,
+        }
 
 
 def normaliseeri_tekst(tekst: str) -> str:
@@ -43,71 +546,975 @@ def hind_tekstist_arvuks(hinna_tekst: str) -> float | None:
     return float(vaste.group(1).replace(",", "."))
 
 
-def lae_poed() -> List[Pood]:
-    #Loeb poodide andmed kaustast data/
+def _joonda(nihe: int) -> int:
+    # Järgmine 8-ga jaguv nihe (et massiive saaks mmap-ist otse lugeda)
+    return (nihe + 7) & ~7
+
+
+def _faili_rasi(faili_tee: str) -> bytes:
+    # JSON-faili sisu sha256
+    rasi = hashlib.sha256()
+    with open(faili_tee, "rb") as f:
+        for tukk in iter(lambda: f.read(1 << 20), b""):
+            rasi.update(tukk)
+    return rasi.digest()
+
+
+def kirjuta_hetkeseis(pood: Pood, hetkeseisu_tee: str, faili_tee: str):
+    # Kirjutab poe kataloogi veerud ja hägusa otsingu indeksi kompaktsesse
+    # binaarfaili, mida saab järgmisel käivitusel mmap-ida
+    kataloog = pood.kaubad
+    indeks = pood.indeks
+
+    votmed = sorted(indeks.postitused)
+    tahed = "".join(taht for taht, _k in votmed).encode("utf-8")
+    korrad = array("I", (k for _taht, k in votmed))
+    votmete_nihked = array("Q", [0])
+    postitused = array("I")
+    for voti in votmed:
+        postitused.extend(indeks.postitused[voti])
+        votmete_nihked.append(len(postitused))
+
+    allika_info = os.stat(faili_tee)
+    pais = HETKESEISU_PAIS.pack(
+        HETKESEISU_TUNNUS, HETKESEISU_VERSIOON,
+        allika_info.st_size, allika_info.st_mtime_ns, _faili_rasi(faili_tee),
+        len(kataloog), len(votmed), len(kataloog.nimede_tabel), len(tahed), len(postitused),
+    )
+
+    osad = (
+        pais, kataloog.nimede_tabel, kataloog.nihked, kataloog.hinnad,
+        kataloog.kogused, kataloog.uhikud, indeks.jarjestus, indeks.pikkused, tahed, korrad, votmete_nihked, postitused,
+    )
+
+    os.makedirs(os.path.dirname(hetkeseisu_tee), exist_ok=True)
+    # Protsessi ja lõime järgi eraldi ajutine fail: sama poodi võivad korraga
+    # kirjutada põhiprotsess, töötajad ja uuesti laadimise lõim
+    ajutine = f"{hetkeseisu_tee}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(ajutine, "wb") as f:
+        for osa in osad:
+            f.write(bytes(osa))
+            f.write(b"\0" * (_joonda(f.tell()) - f.tell()))
+    os.replace(ajutine, hetkeseisu_tee)
+
+
+def loe_hetkeseis(hetkeseisu_tee: str, faili_tee: str, poe_nimi: str) -> Pood | None:
+    # Loeb poe hetkeseisust, kui see vastab JSON-failile; muidu None
+    if not os.path.isfile(hetkeseisu_tee):
+        return None
+
+    with open(hetkeseisu_tee, "rb") as f:
+        sisu = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(sisu) < HETKESEISU_PAIS.size:
+        return None
+    (tunnus, versioon, suurus, mtime, rasi, tooteid, votmeid,
+     nimede_baite, tahtede_baite, postitusi) = HETKESEISU_PAIS.unpack_from(sisu)
+    if tunnus != HETKESEISU_TUNNUS or versioon != HETKESEISU_VERSIOON:
+        return None
+
+    # Päises antud osade suurused peavad faili suurusega klappima (nt katkenud
+    # kopeerimise järel poolik fail on aegunud hetkeseis)
+    osade_baidid = (
+        nimede_baite, (tooteid + 1) * 4, tooteid * 8, tooteid * 8, tooteid,
+        tooteid * 4, tooteid * 4, tahtede_baite, votmeid * 4, (votmeid + 1) * 8, postitusi * 4,
+    )
+    oodatud = _joonda(HETKESEISU_PAIS.size)
+    for baite in osade_baidid:
+        oodatud = _joonda(oodatud + baite)
+    if len(sisu) != oodatud:
+        return None
+
+    allika_info = os.stat(faili_tee)
+    if (suurus, mtime) != (allika_info.st_size, allika_info.st_mtime_ns):
+        # mtime muutus, aga sisu võib olla sama: võrdleme räsi
+        if _faili_rasi(faili_tee) != rasi:
+            return None
+        with open(hetkeseisu_tee, "r+b") as f:
+            f.write(HETKESEISU_PAIS.pack(
+                tunnus, versioon, allika_info.st_size, allika_info.st_mtime_ns, rasi,
+                tooteid, votmeid, nimede_baite, tahtede_baite, postitusi,
+            ))
+
+    vaade = memoryview(sisu)
+    nihe = _joonda(HETKESEISU_PAIS.size)
+
+    def loe(baite: int) -> memoryview:
+        nonlocal nihe
+        osa = vaade[nihe:nihe + baite]
+        nihe = _joonda(nihe + baite)
+        return osa
+
+    # Nimede tabel kopeeritakse üheks bytes-objektiks (võrdlemiseks),
+    # arvulised veerud jäävad mmap-i vaadeteks
+    kataloog = Kataloog(
+        bytes(loe(nimede_baite)),
+        loe((tooteid + 1) * 4).cast("I"),
+        loe(tooteid * 8).cast("d"),
+        loe(tooteid * 8).cast("d"),
+        loe(tooteid).cast("B"),
+    )
+    jarjestus = loe(tooteid * 4).cast("I")
+    pikkused = loe(tooteid * 4).cast("I")
+    tahed = bytes(loe(tahtede_baite)).decode("utf-8")
+    korrad = loe(votmeid * 4).cast("I")
+    votmete_nihked = loe((votmeid + 1) * 8).cast("Q")
+    postitused = loe(postitusi * 4).cast("I")
+    if kataloog.nihked[tooteid] != nimede_baite or votmete_nihked[votmeid] != postitusi:
+        return None
+
+    indeks = HaguneIndeks.valmis(kataloog, jarjestus, pikkused, {
+        (tahed[j], korrad[j]): postitused[votmete_nihked[j]:votmete_nihked[j + 1]]
+        for j in range(votmeid)
+    })
+    return Pood(nimi=poe_nimi, kaubad=kataloog, indeks=indeks)
+
+
+# Märgid, mis võivad JSON-arvu jätkata (vt _json_massiivi_read)
+ARVU_MUSTER = re.compile(r"[-+.eE0-9]*")
+
+
+def _json_massiivi_read(f) -> Iterator[object]:
+    # Loeb JSON-massiivi elemente ükshaaval, ilma tervet dokumenti mällu
+    # parsimata: puhvris on korraga ainult üks plokk ja pooleli olev element
+    dekooder = json.JSONDecoder()
+    puhver = f.read(LUGEMISE_PLOKK)
+    faili_lopp = not puhver
+    asukoht = 0
+
+    def jargmine_mark() -> str:
+        # Järgmine mittetühi märk (vajadusel loeb juurde); "" faili lõpus
+        nonlocal puhver, asukoht, faili_lopp
+        while True:
+            while asukoht < len(puhver) and puhver[asukoht].isspace():
+                asukoht += 1
+            if asukoht < len(puhver) or faili_lopp:
+                return puhver[asukoht:asukoht + 1]
+            puhver, asukoht = f.read(LUGEMISE_PLOKK), 0
+            faili_lopp = not puhver
+
+    # Ainult list-formaadis failid
+    if jargmine_mark() != "[":
+        return
+    asukoht += 1
+    if jargmine_mark() == "]":
+        return
+
+    while True:
+        jargmine_mark()
+        try:
+            element, lopp = dekooder.raw_decode(puhver, asukoht)
+        except json.JSONDecodeError:
+            lopp = None
+        # Element võib plokipiiril pooleli olla: loeme juurde. Arv "1|.5e3"
+        # dekodeeritakse ka poolikuna ("1"), seega kui element lõpeb arvu
+        # märkidega puhvri lõpus, ei tea me veel, kus see tegelikult lõpeb.
+        if lopp is None or (ARVU_MUSTER.match(puhver, lopp).end() == len(puhver) and not faili_lopp):
+            if faili_lopp:
+                raise ValueError(f"{getattr(f, 'name', 'JSON')}: vigane või poolik JSON")
+            lisa = f.read(LUGEMISE_PLOKK)
+            faili_lopp = not lisa
+            puhver, asukoht = puhver[asukoht:] + lisa, 0
+            continue
+
+        yield element
+        asukoht = lopp
+        mark = jargmine_mark()
+        if mark == "]":
+            return
+        if mark != ",":
+            raise ValueError(f"{getattr(f, 'name', 'JSON')}: oodati ',' või ']'")
+        asukoht += 1
+
+
+def _json_lines_read(f) -> Iterator[object]:
+    # JSON Lines: üks toode rea kohta, tühjad read jäetakse vahele
+    for rea_nr, rida in enumerate(f, 1):
+        if rida.strip():
+            try:
+                yield json.loads(rida)
+            except ValueError:
+                raise ValueError(f"{getattr(f, 'name', 'JSONL')}:{rea_nr}: vigane JSON")
+
+
+def loe_tooteread(faili_tee: str) -> Iterator[object]:
+    # Poe faili tooted ükshaaval: .jsonl rida-realt, .json voogedastusega
+    with open(faili_tee, "r", encoding="utf-8") as f:
+        if faili_tee.lower().endswith(".jsonl"):
+            yield from _json_lines_read(f)
+        else:
+            yield from _json_massiivi_read(f)
+
+
+def loe_json_pood(faili_tee: str, poe_nimi: str) -> Pood | None:
+    # Loeb ühe poe JSON- või JSON Lines-failist; None, kui failis pole
+    # kasutatavaid tooteid. Mällu jääb ainult nimi -> hind, mitte toorandmed.
+    kaubad: Dict[str, float] = {}
+
+    for rida in loe_tooteread(faili_tee):
+        if not isinstance(rida, dict):
+            continue
+
+        toote_nimi = rida.get("nimi") or rida.get("name")
+        hinna_tekst = rida.get("hind") or rida.get("price")
+
+        if not toote_nimi:
+            continue
+
+        hind = hind_tekstist_arvuks(hinna_tekst)
+        if hind is None:
+            continue
+
+        kaubad[normaliseeri_tekst(toote_nimi)] = hind
+
+    if not kaubad:
+        return None
+    return Pood(nimi=poe_nimi, kaubad=kaubad)
+
+
+def lae_pood(faili_tee: str) -> Pood | None:
+    # Laeb ühe poe: hetkeseisust, kui see on värske, muidu JSON-ist
+    # (ja kirjutab siis uue hetkeseisu)
+    poe_nimi = poe_nimi_failist(faili_tee)
+    hetkeseisu_tee = os.path.join(HETKESEISU_KAUST, poe_nimi + ".bin")
+
+    try:
+        pood = loe_hetkeseis(hetkeseisu_tee, faili_tee, poe_nimi)
+    except (OSError, ValueError, struct.error):
+        pood = None
+    if pood is not None:
+        return pood
+
+    pood = loe_json_pood(faili_tee, poe_nimi)
+    if pood is not None:
+        try:
+            kirjuta_hetkeseis(pood, hetkeseisu_tee, faili_tee)
+        except OSError:
+            # Nt kirjutuskaitstud kaust: töötame ka ilma hetkeseisuta
+            pass
+    return pood
+
+
+def poodide_failid() -> List[str]:
+    # Kõigi poodide JSON- ja JSON Lines-failide teed kaustas data/. Poe nimi
+    # ja hetkeseis tulevad faili nimest ilma laiendita: kui sama nimega on
+    # mitu faili (nt x.json ja x.jsonl), kasutatakse ainult .json faili.
     if not os.path.isdir(ANDMETE_KAUST):
         raise FileNotFoundError(f"Kausta '{ANDMETE_KAUST}' ei leitud.")
 
+    teed: Dict[str, str] = {}
+    for faili_nimi in sorted(os.listdir(ANDMETE_KAUST)):
+        if not faili_nimi.lower().endswith((".json", ".jsonl")):
+            continue
+        poe_nimi = poe_nimi_failist(faili_nimi)
+        if poe_nimi in teed:
+            warnings.warn(
+                f"Pood '{poe_nimi}' on juba failis {os.path.basename(teed[poe_nimi])}, "
+                f"{faili_nimi} jäetakse vahele."
+            )
+            continue
+        teed[poe_nimi] = os.path.join(ANDMETE_KAUST, faili_nimi)
+    return list(teed.values())
+
+
+def lae_poed() -> List[Pood]:
+    #Loeb poodide andmed kaustast data/
     poed: List[Pood] = []
 
-    for faili_nimi in os.listdir(ANDMETE_KAUST):
-        if not faili_nimi.lower().endswith(".json"):
-            continue
+    for faili_tee in poodide_failid():
+        pood = lae_pood(faili_tee)
+        if pood is not None:
+            poed.append(pood)
 
-        faili_tee = os.path.join(ANDMETE_KAUST, faili_nimi)
-        with open(faili_tee, "r", encoding="utf-8") as f:
-            sisu = json.load(f)
+    return poed
 
-        # Loeme ainult list-formaadis faile
-        if not isinstance(sisu, list):
+
+# Pakendi suurus nimes: "500g", "1,5 l", "10tk", "2x100g"
+KOGUSE_MUSTER = re.compile(
+    r"(?<![\w.,])(?:(\d+)\s*[x×*]\s*)?(\d+(?:[.,]\d+)?)\s*(kg|g|mg|l|dl|cl|ml|tk|pk)(?!\w)"
+)
+# Ühik -> (põhiühik, kordaja)
+UHIKUD = {"kg": ("g", 1000), "g": ("g", 1), "mg": ("g", 0.001),
+          "l": ("ml", 1000), "dl": ("ml", 100), "cl": ("ml", 10), "ml": ("ml", 1),
+          "tk": ("tk", 1), "pk": ("tk", 1)}
+# Kataloogi uhikud-veeru koodid (0 = suurus teadmata)
+UHIKUTE_KOODID = ("", "g", "ml", "tk")
+# Põhiühik -> (kordaja, hinna ühik): ühikuhind on €/kg, €/l või €/tk
+HINNA_UHIKUD = {"g": (1000, "kg"), "ml": (1000, "l"), "tk": (1, "tk")}
+SONA_MUSTER = re.compile(r"\d+(?:[.,]\d+)?%|[^\W\d_]+|\d+(?:[.,]\d+)?")
+
+
+def loe_kogus(toode_norm: str) -> Tuple[float, str] | None:
+    # Pakendi kogus põhiühikus: (500.0, "g"), (1500.0, "ml"), (10.0, "tk").
+    # Kaal/maht on eelistatud tükkidele ("6tk 300g" -> 300 g).
+    parim = None
+    for vaste in KOGUSE_MUSTER.finditer(toode_norm):
+        kordi, arv, uhik = vaste.groups()
+        pohiuhik, kordaja = UHIKUD[uhik]
+        kogus = float(arv.replace(",", ".")) * kordaja * (int(kordi) if kordi else 1)
+        if kogus <= 0:
+            continue
+        if pohiuhik != "tk":
+            return kogus, pohiuhik
+        if parim is None:
+            parim = (kogus, pohiuhik)
+    return parim
+
+
+def toote_sonad(toode_norm: str) -> List[str]:
+    # Nime sõnad ilma pakendi suuruseta ("tere või 82% 200g" -> tere, või, 82%)
+    return [sona.replace(",", ".") for sona in SONA_MUSTER.findall(KOGUSE_MUSTER.sub(" ", toode_norm))]
+
+
+def kaubamargid(nimed: Iterable[str]) -> Set[str]:
+    # Kaubamärgid: sõnad, millega algab mitu nime ja mis nime keskel või
+    # lõpus esinevad vähem kui poole nii tihti ("alma", "tere"). Tootesõnad
+    # nagu "piim" või "sealiha" algavad samuti mitut nime, kuid esinevad
+    # sagedamini teiste sõnade järel ("alma piim").
+    esimesena: Counter = Counter()
+    mujal: Counter = Counter()
+    for nimi in nimed:
+        sonad = toote_sonad(nimi)
+        if not sonad:
             continue
+        if not sonad[0][0].isdigit():
+            esimesena[sonad[0]] += 1
+        mujal.update(set(sonad[1:]))
+    return {sona for sona, arv in esimesena.items() if arv > 1 and 2 * mujal[sona] < arv}
+
+
+class TooteVastavus:
+    # Poodidevaheline vastavustabel: iga tootenimi kuulub ühte kanoonilisse
+    # tootesse (id) ja iga kanooniline toode on igas poes kõige rohkem üks kord.
+
+    def __init__(self, read: Iterable[Tuple[int, str, str]], allkiri: str = ""):
+        self.allkiri = allkiri
+        self._kanoonid: Dict[str, int] = {}
+        self._liikmed: Dict[int, Dict[str, str]] = {}
+        for kanoon, poe_nimi, toode_norm in read:
+            self._kanoonid.setdefault(toode_norm, kanoon)
+            self._liikmed.setdefault(kanoon, {})[poe_nimi] = toode_norm
+
+    def __len__(self) -> int:
+        return len(self._liikmed)
+
+    def kanoon(self, toode_norm: str) -> int | None:
+        return self._kanoonid.get(toode_norm)
+
+    def liikmed(self, kanoon: int) -> Dict[str, str]:
+        # { poe nimi: poe tootenimi }
+        return self._liikmed.get(kanoon, {})
+
+    def poe_vaste(self, pood: Pood, toode_norm: str) -> Tuple[bool, str | None]:
+        # (kas tabel teab vastust, poe tootenimi). Tabel teab ainult leitud
+        # vasteid: kui toote klastris seda poodi pole, võib toode poes siiski
+        # olla teise nimega, mida ühendamine ei julgenud siduda. Siis, nagu
+        # ka tabelist puuduva toote või pärast tabeli koostamist muutunud poe
+        # korral, on vaja hägusat otsingut.
+        kanoon = self._kanoonid.get(toode_norm)
+        if kanoon is None:
+            return False, None
+        vaste = self._liikmed[kanoon].get(pood.nimi)
+        if vaste is None or vaste not in pood.kaubad:
+            return False, None
+        return True, vaste
+
+    def read(self) -> Iterator[Tuple[int, str, str]]:
+        for kanoon, liikmed in self._liikmed.items():
+            for poe_nimi, toode_norm in liikmed.items():
+                yield kanoon, poe_nimi, toode_norm
+
+
+def vastavuse_allkiri(poed: List[Pood]) -> str:
+    # Muutub ainult siis, kui mõne poe tootenimed muutuvad (mitte hinnad)
+    rasi = hashlib.sha256(str(VASTAVUSE_VERSIOON).encode())
+    for pood in sorted(poed, key=lambda p: p.nimi):
+        rasi.update(pood.nimi.encode("utf-8") + b"\0")
+        rasi.update(pood.kaubad.nimede_tabel)
+        rasi.update(pood.kaubad.nihked.tobytes())
+    return rasi.hexdigest()
+
+
+def _erinev_variant(sonad_a: List[str], sonad_b: List[str]) -> bool:
+    # Kas mõlemas nimes on ühiste sõnade vahel sõna, mida teises pole:
+    # "a. le coq saaremaa tuulik hele õlu" ja "a. le coq premium hele õlu"
+    # on sama tootja eri tooted. Lõppu lisatud sõna ("... piiritusjook",
+    # "... viil") ainult täpsustab nime ega välista.
+    uhised = set(sonad_a) & set(sonad_b)
+
+    def vahel_erinev(sonad: List[str]) -> bool:
+        kohad = [k for k, sona in enumerate(sonad) if sona in uhised]
+        return bool(kohad) and any(sona not in uhised for sona in sonad[kohad[0]:kohad[-1]])
+
+    return vahel_erinev(sonad_a) and vahel_erinev(sonad_b)
+
+
+def lahenda_tooted(poed: List[Pood]) -> TooteVastavus:
+    # Leiab poodide vahel samad tooted:
+    # 1) nimi -> sõnad (ilma suuruseta), pakendi suurus ja kaubamärk (esimene
+    #    sõna, kui see on kaubamärk, vt kaubamargid);
+    # 2) blokeerimine: võrreldakse ainult teise poe tooteid, millel on ühine
+    #    haruldane sõna, mitte kõiki paare;
+    # 3) skoor: sõnade kattuvus IDF-kaaludega; erinev suurus, puuduv
+    #    kaubamärk või eri variandi sõnad kummaski nimes (vt _erinev_variant)
+    #    välistavad;
+    # 4) kaks toodet ühendatakse, kui kumbki on teise poes teise parim vaste.
+    tooted: List[Tuple[str, str]] = []
+    for pood in poed:
+        tooted.extend((pood.nimi, nimi) for nimi in pood.kaubad.keys())
+
+    sonade_read = [toote_sonad(nimi) for _p, nimi in tooted]
+    sonad = [set(read) for read in sonade_read]
+    kogused = [loe_kogus(nimi) for _p, nimi in tooted]
+    margid = kaubamargid(nimi for _p, nimi in tooted)
+    toodete_margid = []
+    for _p, nimi in tooted:
+        esimene = toote_sonad(nimi)[:1]
+        toodete_margid.append(esimene[0] if esimene and esimene[0] in margid else None)
+
+    sagedus: Counter = Counter()
+    postitused: Dict[str, List[int]] = {}
+    for i, toote_sonad_ in enumerate(sonad):
+        for sona in toote_sonad_:
+            sagedus[sona] += 1
+            postitused.setdefault(sona, []).append(i)
+    kokku = len(tooted)
+    idf = {sona: 1.0 + math.log(kokku / arv) for sona, arv in sagedus.items()}
+
+    def skoor(i: int, j: int) -> float:
+        if kogused[i] and kogused[j]:
+            (kogus_i, uhik_i), (kogus_j, uhik_j) = kogused[i], kogused[j]
+            if uhik_i != uhik_j or abs(kogus_i - kogus_j) > 0.01 * max(kogus_i, kogus_j):
+                return 0.0
+        for mark, teised in ((toodete_margid[i], sonad[j]), (toodete_margid[j], sonad[i])):
+            if mark is not None and mark not in teised:
+                return 0.0
+        uhised = sum(idf[sona] for sona in sonad[i] & sonad[j])
+        if not uhised:
+            return 0.0
+        tulemus = uhised / sum(idf[sona] for sona in sonad[i] | sonad[j])
+        if tulemus >= VASTAVUSE_PIIR and _erinev_variant(sonade_read[i], sonade_read[j]):
+            return 0.0
+        # Ühel on suurus, teisel mitte: võib olla sama toode, kuid väiksema kindlusega
+        return tulemus * 0.9 if (kogused[i] is None) != (kogused[j] is None) else tulemus
+
+    # Iga toote parim vaste igas teises poes
+    parimad: Dict[Tuple[int, str], Tuple[float, int]] = {}
+    for i, (poe_nimi, _nimi) in enumerate(tooted):
+        haruldased = sorted(sonad[i], key=lambda sona: sagedus[sona])
+        bloki_sonad = [sona for sona in haruldased if sagedus[sona] <= BLOKI_PIIR][:3] or haruldased[:1]
+        kandidaadid = {j for sona in bloki_sonad for j in postitused[sona] if tooted[j][0] != poe_nimi}
+        for j in kandidaadid:
+            tulemus = skoor(i, j)
+            if tulemus < VASTAVUSE_PIIR:
+                continue
+            voti = (i, tooted[j][0])
+            # Võrdse skoori korral nimi, et tulemus ei sõltuks järjestusest
+            if voti not in parimad or (tulemus, tooted[j][1]) > (parimad[voti][0], tooted[parimad[voti][1]][1]):
+                parimad[voti] = (tulemus, j)
+
+    # Ühend-leia: ühendame ainult vastastikku parimad paarid
+    vanem = list(range(kokku))
+    klastri_poed = [{poe_nimi} for poe_nimi, _n in tooted]
+
+    def juur(i: int) -> int:
+        while vanem[i] != i:
+            vanem[i] = vanem[vanem[i]]
+            i = vanem[i]
+        return i
+
+    for (i, teine_pood), (_tulemus, j) in sorted(parimad.items(), key=lambda kirje: -kirje[1][0]):
+        if i > j or parimad.get((j, tooted[i][0]), (0, -1))[1] != i:
+            continue
+        juur_i, juur_j = juur(i), juur(j)
+        if juur_i == juur_j or klastri_poed[juur_i] & klastri_poed[juur_j]:
+            continue
+        vanem[juur_j] = juur_i
+        klastri_poed[juur_i] |= klastri_poed[juur_j]
+
+    klastrid: Dict[int, List[int]] = {}
+    for i in range(kokku):
+        klastrid.setdefault(juur(i), []).append(i)
+    # Kanoonilised id-d järjestatud nimede järgi, et tabel oleks korratav
+    jarjestus = sorted(klastrid.values(), key=lambda liikmed: min(tooted[i][1] for i in liikmed))
+    read = [(kanoon, *tooted[i]) for kanoon, liikmed in enumerate(jarjestus) for i in liikmed]
+    return TooteVastavus(read, vastavuse_allkiri(poed))
+
+
+def kirjuta_vastavus(vastavus: TooteVastavus, tee: str = VASTAVUSE_TEE):
+    os.makedirs(os.path.dirname(tee) or ".", exist_ok=True)
+    # Protsessi järgi eraldi ajutine fail: mitu töötajat võivad kirjutada korraga
+    ajutine = f"{tee}.{os.getpid()}.tmp"
+    with open(ajutine, "w", encoding="utf-8", newline="\n") as f:
+        f.write(f"# {vastavus.allkiri}\n")
+        for kanoon, poe_nimi, toode_norm in vastavus.read():
+            f.write(f"{kanoon}\t{poe_nimi}\t{toode_norm}\n")
+    os.replace(ajutine, tee)
+
+
+def lae_vastavus(poed: List[Pood], tee: str = VASTAVUSE_TEE, arvuta: bool = True) -> TooteVastavus | None:
+    # Vastavustabel failist, kui see on tehtud samade poodide põhjal;
+    # muidu arvutatakse uus ja salvestatakse. arvuta=False: ainult loetakse
+    # (None, kui fail puudub või on aegunud), nt protsessikogumi töötajates.
+    allkiri = vastavuse_allkiri(poed)
+    try:
+        with open(tee, encoding="utf-8") as f:
+            if f.readline().strip() == f"# {allkiri}":
+                read = []
+                for rida in f:
+                    kanoon, poe_nimi, toode_norm = rida.rstrip("\n").split("\t", 2)
+                    read.append((int(kanoon), poe_nimi, toode_norm))
+                return TooteVastavus(read, allkiri)
+    except (OSError, ValueError):
+        pass
+    if not arvuta:
+        return None
 
-        kaubad: Dict[str, float] = {}
+    vastavus = lahenda_tooted(poed)
+    try:
+        kirjuta_vastavus(vastavus, tee)
+    except OSError:
+        pass
+    return vastavus
+
+
+def toote_kategooria(toode_norm: str, margid: Set[str] = frozenset()) -> List[str]:
+    # Tootekategooria sõnad ühikuhindade võrdlemiseks: nime pikim sõna
+    # (eesti tootenimedes tavaliselt liitsõnaline põhisõna, nt "hapukoor")
+    # ja protsendid ("või 82%"). Suurus jääb välja, samuti esimene sõna, kui
+    # see on teadaolev kaubamärk (vt kaubamargid) ja nimes on teisi sõnu.
+    sonad = toote_sonad(toode_norm)
+    if sonad and sonad[0] in margid and any(sona.isalpha() for sona in sonad[1:]):
+        sonad = sonad[1:]
+    tahtedega = [sona for sona in sonad if sona.isalpha()]
+    if not tahtedega:
+        return []
+    pohisona = max(tahtedega, key=len)
+    return [pohisona] + [sona for sona in sonad if sona.endswith("%")]
 
-        for rida in sisu:
-            if not isinstance(rida, dict):
+
+@dataclass
+class Asendus:
+    # Odavam asendus ostukorvi tootele
+    pood: str
+    toode: str
+    hind: float
+    saast: float     # võit sama koguse kohta (€)
+    sarnasus: float  # kaalutud sõnade kattuvus 0..1
+    skoor: float
+
+
+class UhikuHinnaIndeks:
+    # Kõigi poodide tooted kasvava ühikuhinna (€/kg, €/l, €/tk) järgi;
+    # pakendi suuruseta tooted (ühikukood 0) riiulihinna järgi. Iga (nime
+    # sõna, ühikukood) kohta on postitusnimekiri, mis on samuti hinna järgi
+    # sorteeritud, nii et "odavaim kilohind" on nimekirja algus. Sama indeks
+    # leiab ka odavamad asendused (vt asendused).
+
+    def __init__(self, poed: List[Pood]):
+        self.poed = list(poed)
+        # Kaubamärgid toote_kategooria ja asenduste sarnasuse jaoks
+        self.kaubamargid = kaubamargid(nimi for pood in self.poed for nimi in pood.kaubad.keys())
+        read = []
+        for poe_nr, pood in enumerate(self.poed):
+            kaubad = pood.kaubad
+            for toote_id in range(len(kaubad)):
+                # Nullhinnaga read (vigased andmed) ei ole kunagi "odavaimad"
+                if kaubad.hinnad[toote_id] <= 0:
+                    continue
+                uhiku_hind = kaubad.uhiku_hind(toote_id)
+                hind = uhiku_hind[0] if uhiku_hind is not None else kaubad.hinnad[toote_id]
+                read.append((hind, poe_nr, toote_id))
+        read.sort()
+
+        self.hinnad = array("d", (hind for hind, _p, _t in read))
+        self.poe_nrid = array("H", (poe_nr for _h, poe_nr, _t in read))
+        self.toote_idd = array("I", (toote_id for _h, _p, toote_id in read))
+        self.postitused: Dict[Tuple[str, int], array] = {}
+        # Sõnade sagedus ilma kaubamärgita (asenduste IDF-kaalud)
+        sagedus: Counter = Counter()
+        for i, (_hind, poe_nr, toote_id) in enumerate(read):
+            kaubad = self.poed[poe_nr].kaubad
+            uhik = kaubad.uhikud[toote_id]
+            sonad = toote_sonad(kaubad.nimi(toote_id))
+            for sona in set(sonad):
+                postitus = self.postitused.get((sona, uhik))
+                if postitus is None:
+                    postitus = self.postitused[(sona, uhik)] = array("I")
+                postitus.append(i)
+            sagedus.update(self._sonad(sonad))
+        kokku = max(1, len(read))
+        self.idf = {sona: 1.0 + math.log(kokku / arv) for sona, arv in sagedus.items()}
+
+    def _sonad(self, sonad: List[str]) -> Set[str]:
+        # Nime sõnad ilma kaubamärgita: asendus võibki olla teise tootja oma
+        if len(sonad) > 1 and sonad[0] in self.kaubamargid:
+            sonad = sonad[1:]
+        return set(sonad)
+
+    def odavaimad(self, otsing: str, arv: int = 5,
+                  uhik: str | None = None) -> List[Tuple[str, str, float, str]]:
+        # Odavaimad tooted ühikuhinna järgi, mille nimes on kõik otsingu sõnad:
+        # [(poe nimi, toode, ühikuhind, "kg"/"l"/"tk")]. Kui ühikut ei anta,
+        # võetakse see, milles sellel kategoorial on kõige rohkem tooteid.
+        sonad = set(toote_sonad(otsing))
+        if not sonad:
+            return []
+        koodid = [UHIKUTE_KOODID.index(uhik)] if uhik else range(1, len(UHIKUTE_KOODID))
+
+        parim = None
+        for kood in koodid:
+            postitused = [self.postitused.get((sona, kood)) for sona in sonad]
+            if not all(postitused):
+                continue
+            lyhim = min(postitused, key=len)
+            if parim is None or len(lyhim) > len(parim[1]):
+                parim = (kood, lyhim)
+        if parim is None:
+            return []
+
+        kood, postitus = parim
+        hinna_uhik = HINNA_UHIKUD[UHIKUTE_KOODID[kood]][1]
+        tulemused = []
+        # Postitus on hinna järgi sorteeritud: esimesed sobivad ongi odavaimad
+        for i in postitus:
+            pood = self.poed[self.poe_nrid[i]]
+            nimi = pood.kaubad.nimi(self.toote_idd[i])
+            if len(sonad) > 1 and not sonad <= set(toote_sonad(nimi)):
+                continue
+            tulemused.append((pood.nimi, nimi, self.hinnad[i], hinna_uhik))
+            if len(tulemused) >= arv:
+                break
+        return tulemused
+
+    def asendused(self, poe_nimi: str, toode: str, arv: int = ASENDUSTE_ARV) -> List[Asendus]:
+        # Kuni `arv` odavamat sarnast toodet kõigist poodidest (ka samast),
+        # parimad eespool. `toode` on poe tootenimi, mille hinda võrreldakse.
+        #
+        # Skoor = ASENDUSE_KAAL * sarnasus + (1 - ASENDUSE_KAAL) * suhteline võit.
+        # Postitused käiakse läbi hinna järgi ühiselt (heapq.merge); iga uue rea
+        # hind on senistest suurem, seega ülejäänute skoor ei saa ületada
+        # ASENDUSE_KAAL + (1 - ASENDUSE_KAAL) * (1 - hind / võrdlushind).
+        # Kui k-s parim on sellest parem (või hind ei ole enam odavam), lõpetame.
+        pood = next((p for p in self.poed if p.nimi == poe_nimi), None)
+        toote_id = pood.kaubad.toote_id(toode) if pood is not None else None
+        if toote_id is None or arv <= 0:
+            return []
+        kaubad = pood.kaubad
+        hind = kaubad.hinnad[toote_id]
+        uhik = kaubad.uhikud[toote_id]
+        # Võrdlushind indeksi ühikus (€/kg, €/l, €/tk või riiulihind)
+        maht, kordaja = 1.0, 1.0
+        if uhik:
+            maht = kaubad.kogused[toote_id]
+            kordaja = HINNA_UHIKUD[UHIKUTE_KOODID[uhik]][0]
+        vordlushind = hind / maht * kordaja
+        sonad = self._sonad(toote_sonad(toode))
+        kaalud = {sona: self.idf.get(sona, 1.0) for sona in sonad}
+        kogukaal = sum(kaalud.values())
+        if vordlushind <= 0 or not kogukaal:
+            return []
+
+        # Prefiksfilter: kattuvus >= ASENDUSE_PIIR * kogukaal on võimalik ainult
+        # siis, kui kandidaadil on mõni haruldasematest sõnadest; sagedaste
+        # sõnade pikki postitusi pole vaja läbi käia
+        jarjestus = sorted(sonad, key=lambda sona: (-kaalud[sona], sona))
+        jaak = kogukaal
+        loigud = []
+        for sona in jarjestus:
+            loigud.append(self.postitused.get((sona, uhik), ()))
+            jaak -= kaalud[sona]
+            if jaak < ASENDUSE_PIIR * kogukaal:
+                break
+
+        parimad: List[Tuple[float, int, float]] = []  # kuhi: (skoor, rida, sarnasus)
+        eelmine = -1
+        for i in heapq.merge(*loigud):
+            if i == eelmine:
                 continue
+            eelmine = i
+            rea_hind = self.hinnad[i]
+            if rea_hind >= vordlushind:
+                break
+            ulempiir = ASENDUSE_KAAL + (1 - ASENDUSE_KAAL) * (1 - rea_hind / vordlushind)
+            if len(parimad) >= arv and parimad[0][0] >= ulempiir:
+                break
+
+            teine = self.poed[self.poe_nrid[i]].kaubad
+            teise_id = self.toote_idd[i]
+            if uhik:
+                suhe = teine.kogused[teise_id] / maht
+                if not 1 / ASENDUSE_SUURUSE_SUHE <= suhe <= ASENDUSE_SUURUSE_SUHE:
+                    continue
+            teise_sonad = self._sonad(toote_sonad(teine.nimi(teise_id)))
+            uhised = sum(kaalud[sona] for sona in sonad & teise_sonad)
+            sarnasus = uhised / (kogukaal + sum(self.idf.get(sona, 1.0) for sona in teise_sonad - sonad))
+            if sarnasus < ASENDUSE_PIIR:
+                continue
+            skoor = ASENDUSE_KAAL * sarnasus + (1 - ASENDUSE_KAAL) * (1 - rea_hind / vordlushind)
+            if len(parimad) < arv:
+                heapq.heappush(parimad, (skoor, i, sarnasus))
+            elif skoor > parimad[0][0]:
+                heapq.heapreplace(parimad, (skoor, i, sarnasus))
 
-            toote_nimi = rida.get("nimi") or rida.get("name")
-            hinna_tekst = rida.get("hind") or rida.get("price")
+        tulemused = []
+        for skoor, i, sarnasus in sorted(parimad, reverse=True):
+            teine_pood = self.poed[self.poe_nrid[i]]
+            teine = teine_pood.kaubad
+            teise_id = self.toote_idd[i]
+            tulemused.append(Asendus(
+                pood=teine_pood.nimi,
+                toode=teine.nimi(teise_id),
+                hind=teine.hinnad[teise_id],
+                saast=(vordlushind - self.hinnad[i]) * maht / kordaja,
+                sarnasus=sarnasus,
+                skoor=skoor,
+            ))
+        return tulemused
+
+
+class HinnaAjalugu:
+    # Poodide hindade ajalugu võtmega (pood, normaliseeritud toode).
+    # Failid ainult kasvavad: kirje lisatakse ainult siis, kui toote hind muutus
+    # või toode kadus/ilmus, nii et aasta igapäevaseid hetkeseise võtab vähe ruumi.
+    # Veerud (ühepikkused failid): paevad.bin (I, date.toordinal()), votmed.bin
+    # (I, võtme rida failis votmed.txt), sendid.bin (i, hind sentides, -1 = pole
+    # müügil). Mälus on iga võtme kohta päevade ja hindade massiiv kahendotsinguks.
+
+    VEERUD = (("paevad.bin", "I"), ("votmed.bin", "I"), ("sendid.bin", "i"))
+    POLE_MUUGIL = -1
+
+    def __init__(self, kaust: str = AJALOO_KAUST):
+        self.kaust = kaust
+        self._lukk = threading.Lock()
+        self._votmed: Dict[Tuple[str, str], int] = {}
+        self._poe_votmed: Dict[str, List[int]] = {}
+        self._paevad: List[array] = []
+        self._sendid: List[array] = []
+        self._viimane_paev: Dict[str, int] = {}
+        self._loe()
+
+    def _tee(self, nimi: str) -> str:
+        return os.path.join(self.kaust, nimi)
+
+    def _lisa_voti(self, poe_nimi: str, toode_norm: str) -> int:
+        voti_id = len(self._paevad)
+        self._votmed[(poe_nimi, toode_norm)] = voti_id
+        self._poe_votmed.setdefault(poe_nimi, []).append(voti_id)
+        self._paevad.append(array("I"))
+        self._sendid.append(array("i"))
+        return voti_id
+
+    def _loe(self):
+        # Loeb ajaloo mällu; katkenud kirjutamise poolikud read/kirjed lõigatakse ära
+        votmete_tee = self._tee("votmed.txt")
+        if not os.path.exists(votmete_tee):
+            return
 
-            if not toote_nimi:
+        with open(votmete_tee, "rb") as f:
+            sisu = f.read()
+        terve = sisu.rfind(b"\n") + 1
+        if terve < len(sisu):
+            with open(votmete_tee, "r+b") as f:
+                f.truncate(terve)
+        for rida in sisu[:terve].decode("utf-8").splitlines():
+            poe_nimi, _, toode_norm = rida.partition("\t")
+            self._lisa_voti(poe_nimi, toode_norm)
+
+        veerud = []
+        for faili_nimi, tyyp in self.VEERUD:
+            veerg = array(tyyp)
+            try:
+                with open(self._tee(faili_nimi), "rb") as f:
+                    andmed = f.read()
+            except FileNotFoundError:
+                andmed = b""
+            veerg.frombytes(andmed[:len(andmed) - len(andmed) % veerg.itemsize])
+            veerud.append(veerg)
+
+        kirjeid = min(len(veerg) for veerg in veerud)
+        for (faili_nimi, _tyyp), veerg in zip(self.VEERUD, veerud):
+            tee = self._tee(faili_nimi)
+            if os.path.exists(tee) and os.path.getsize(tee) != kirjeid * veerg.itemsize:
+                with open(tee, "r+b") as f:
+                    f.truncate(kirjeid * veerg.itemsize)
+
+        paevad, votmed, sendid = veerud
+        poe_nimed = {voti_id: poe_nimi for (poe_nimi, _t), voti_id in self._votmed.items()}
+        for i in range(kirjeid):
+            voti_id = votmed[i]
+            if voti_id >= len(self._paevad):
                 continue
+            self._paevad[voti_id].append(paevad[i])
+            self._sendid[voti_id].append(sendid[i])
+            poe_nimi = poe_nimed[voti_id]
+            self._viimane_paev[poe_nimi] = max(self._viimane_paev.get(poe_nimi, 0), paevad[i])
+
+    def lisa_pood(self, pood: Pood, paev: date) -> int:
+        # Lisab poe hetkeseisu (nt päeva kraapimise tulemus). Salvestatakse
+        # ainult muutused; tagastab lisatud kirjete arvu.
+        paeva_nr = paev.toordinal()
+        with self._lukk:
+            if paeva_nr < self._viimane_paev.get(pood.nimi, 0):
+                raise ValueError(f"{pood.nimi}: hetkeseis {paev} on vanem kui ajaloo viimane kirje")
+
+            uued_votmed: List[str] = []
+            kirjed: List[Tuple[int, int]] = []
+            nahtud: Set[int] = set()
+            for toode_norm, hind in pood.kaubad.items():
+                voti_id = self._votmed.get((pood.nimi, toode_norm))
+                if voti_id is None:
+                    voti_id = self._lisa_voti(pood.nimi, toode_norm)
+                    uued_votmed.append(f"{pood.nimi}\t{toode_norm}\n")
+                nahtud.add(voti_id)
+                sendid = round(hind * 100)
+                eelmised = self._sendid[voti_id]
+                if not eelmised or eelmised[-1] != sendid:
+                    kirjed.append((voti_id, sendid))
+
+            # Tooted, mida selles hetkeseisus enam pole
+            for voti_id in self._poe_votmed.get(pood.nimi, []):
+                eelmised = self._sendid[voti_id]
+                if voti_id not in nahtud and eelmised and eelmised[-1] != self.POLE_MUUGIL:
+                    kirjed.append((voti_id, self.POLE_MUUGIL))
+
+            if not kirjed:
+                return 0
+
+            # Võtmed enne kirjeid: kirje ei viita kunagi puuduvale võtmele
+            os.makedirs(self.kaust, exist_ok=True)
+            if uued_votmed:
+                with open(self._tee("votmed.txt"), "a", encoding="utf-8", newline="\n") as f:
+                    f.write("".join(uued_votmed))
+            veerud = (
+                array("I", [paeva_nr] * len(kirjed)),
+                array("I", (voti_id for voti_id, _s in kirjed)),
+                array("i", (sendid for _v, sendid in kirjed)),
+            )
+            for (faili_nimi, _tyyp), veerg in zip(self.VEERUD, veerud):
+                with open(self._tee(faili_nimi), "ab") as f:
+                    f.write(veerg.tobytes())
+
+            for voti_id, sendid in kirjed:
+                self._paevad[voti_id].append(paeva_nr)
+                self._sendid[voti_id].append(sendid)
+            self._viimane_paev[pood.nimi] = paeva_nr
+            return len(kirjed)
+
+    def hind_kuupaeval(self, poe_nimi: str, toode_norm: str, paev: date) -> float | None:
+        # Toote hind antud päeval; None, kui seda tol päeval ei müüdud (või ajalugu puudub)
+        voti_id = self._votmed.get((poe_nimi, toode_norm))
+        if voti_id is None:
+            return None
+        i = bisect.bisect_right(self._paevad[voti_id], paev.toordinal()) - 1
+        if i < 0 or self._sendid[voti_id][i] == self.POLE_MUUGIL:
+            return None
+        return self._sendid[voti_id][i] / 100
+
+    def vahemiku_hinnad(self, poe_nimi: str, toode_norm: str, paevi: int = AJALOO_PAEVI,
+                        tana: date | None = None) -> Tuple[float, float] | None:
+        # (min, keskmine) viimase `paevi` päeva jooksul; keskmine on päevade
+        # järgi kaalutud (hind kehtib kuni järgmise muutuseni)
+        voti_id = self._votmed.get((poe_nimi, toode_norm))
+        if voti_id is None:
+            return None
+        paevad, sendid = self._paevad[voti_id], self._sendid[voti_id]
+        lopp = (tana or date.today()).toordinal() + 1
+        algus = lopp - paevi
+
+        i = max(0, bisect.bisect_right(paevad, algus) - 1)
+        vahim = None
+        summa = paevi_kokku = 0
+        while i < len(paevad) and paevad[i] < lopp:
+            loigu_lopp = paevad[i + 1] if i + 1 < len(paevad) else lopp
+            paeve = min(loigu_lopp, lopp) - max(paevad[i], algus)
+            if paeve > 0 and sendid[i] != self.POLE_MUUGIL:
+                vahim = sendid[i] if vahim is None else min(vahim, sendid[i])
+                summa += sendid[i] * paeve
+                paevi_kokku += paeve
+            i += 1
+
+        if vahim is None:
+            return None
+        return vahim / 100, summa / paevi_kokku / 100
+
+
+def faili_paev(faili_tee: str) -> date:
+    # Poe faili kuupäev (kraapimise päev) ajaloo jaoks
+    return date.fromtimestamp(os.stat(faili_tee).st_mtime)
+
+
+class KaustaJalgija:
+    # Jälgib data/ kausta poodide faile (mtime ja suurus), et muutunud poe
+    # saaks uuesti laadida ilma rakendust taaskäivitamata
 
-            hind = hind_tekstist_arvuks(hinna_tekst)
-            if hind is None:
+    def __init__(self):
+        self._seis: Dict[str, Tuple[int, int]] = self._loe_seis()
+
+    def _loe_seis(self) -> Dict[str, Tuple[int, int]]:
+        seis: Dict[str, Tuple[int, int]] = {}
+        for faili_tee in poodide_failid():
+            try:
+                info = os.stat(faili_tee)
+            except OSError:
                 continue
+            seis[faili_tee] = (info.st_mtime_ns, info.st_size)
+        return seis
+
+    def kontrolli(self) -> Tuple[List[str], List[str]]:
+        # (muutunud või uued failid, eemaldatud failid) alates eelmisest kinnitusest
+        uus = self._loe_seis()
+        muutunud = [tee for tee, info in uus.items() if self._seis.get(tee) != info]
+        eemaldatud = [tee for tee in self._seis if tee not in uus]
+        return muutunud, eemaldatud
+
+    def kinnita(self, faili_tee: str, info: Tuple[int, int] | None):
+        # Jätab faili seisu meelde (None = fail eemaldati). Kui laadimine
+        # ebaõnnestus (nt kraapija kirjutab faili veel), ei kinnitata ja
+        # järgmine kontroll proovib uuesti.
+        if info is None:
+            self._seis.pop(faili_tee, None)
+        else:
+            self._seis[faili_tee] = info
 
-            kaubad[normaliseeri_tekst(toote_nimi)] = hind
 
-        if kaubad:
-            poe_nimi = os.path.splitext(faili_nimi)[0]
-            poed.append(Pood(nimi=poe_nimi, kaubad=kaubad))
+def faili_seis(faili_tee: str) -> Tuple[int, int] | None:
+    # (mtime, suurus) KaustaJalgija jaoks; None, kui faili pole
+    try:
+        info = os.stat(faili_tee)
+    except OSError:
+        return None
+    return info.st_mtime_ns, info.st_size
 
-    return poed
+
+def poe_nimi_failist(faili_tee: str) -> str:
+    # "data/coop_products.json" -> "coop_products"
+    return os.path.splitext(os.path.basename(faili_tee))[0]
 
 
 def leia_parim_vaste(otsitav: str, valikud: List[str]) -> str | None:
     # Leiab kõige sarnasema tootenime
-    vasted = difflib.get_close_matches(otsitav, valikud, n=1, cutoff=0.6)
+    vasted = difflib.get_close_matches(otsitav, valikud, n=1, cutoff=SARNASUSE_PIIR)
     return vasted[0] if vasted else None
 
 
 def arvuta_poe_korv(
     pood: Pood,
-    ostukorv: Dict[str, int]
+    ostukorv: Dict[str, int],
+    vahemalu: VasteteVahemalu | None = None
 ) -> Tuple[float, List[str]]:
     # Arvutab ühe poe ostukorvi hinna ja puuduolevad tooted
     koguhind = 0.0
     puuduolevad: List[str] = []
 
-    saadaolevad_tooted = list(pood.kaubad.keys())
-
     for toode_norm, kogus in ostukorv.items():
         if toode_norm in pood.kaubad:
             koguhind += pood.kaubad[toode_norm] * kogus
         else:
-            vaste = leia_parim_vaste(toode_norm, saadaolevad_tooted)
+            if vahemalu is not None:
+                vaste = vahemalu.leia(pood, toode_norm)
+            else:
+                vaste = pood.indeks.leia(toode_norm)
             if vaste:
                 koguhind += pood.kaubad[vaste] * kogus
             else:
@@ -116,7 +1523,556 @@ def arvuta_poe_korv(
     return koguhind, puuduolevad
 
 
-class Rakendus(tk.Tk):
+def arvuta_poed(
+    poed: List[Pood],
+    ostukorv: Dict[str, int],
+    vahemalu: VasteteVahemalu | None = None,
+    arvutaja: "ParalleelneArvutaja | HinnaMaatriks | None" = None
+) -> List[Tuple[str, float, List[str]]]:
+    # Arvutab korvi kõigis poodides; enne täielikud korvid, siis hinna järgi
+    if arvutaja is not None:
+        tulemused = arvutaja.arvuta(poed, ostukorv)
+    else:
+        tulemused = []
+        for pood in poed:
+            koguhind, puudu = arvuta_poe_korv(pood, ostukorv, vahemalu)
+            tulemused.append((pood.nimi, koguhind, puudu))
+
+    tulemused.sort(key=lambda x: (len(x[2]) > 0, x[1]))
+    return tulemused
+
+
+# Protsessikogumi töötaja poed ja vahemälu (igas protsessis oma)
+_tootaja_poed: Dict[str, Pood] = {}
+_tootaja_vahemalu: VasteteVahemalu | None = None
+
+
+def _valmista_tootajad(faili_teed: List[str]):
+    # Vanemprotsessis enne töötajate käivitamist: hetkeseisud ja vastavustabel
+    # tehakse (vajadusel) üks kord valmis, töötajad ainult loevad neid
+    poed = []
+    for faili_tee in faili_teed:
+        try:
+            pood = lae_pood(faili_tee)
+        except (OSError, ValueError):
+            continue
+        if pood is not None:
+            poed.append(pood)
+    lae_vastavus(poed)
+
+
+def _alusta_tootajat(faili_teed: List[str]):
+    # Töötaja käivitamine: poed laetakse üks kord (hetkeseisust mmap-iga),
+    # et neid ei peaks iga päringuga üle protsesside piiri saatma. Vastavustabel
+    # loetakse failist; kui see on aegunud (fail muutus vahepeal), töötab
+    # töötaja ilma selleta (hägusa otsinguga), mitte ei arvuta seda uuesti.
+    global _tootaja_vahemalu
+    for faili_tee in faili_teed:
+        pood = lae_pood(faili_tee)
+        if pood is not None:
+            _tootaja_poed[pood.nimi] = pood
+    _tootaja_vahemalu = VasteteVahemalu(
+        vastavus=lae_vastavus(list(_tootaja_poed.values()), arvuta=False))
+
+
+def _arvuta_korv_tootajas(ostukorv: Dict[str, int]) -> List[Tuple[str, float, List[str]]]:
+    # Töötajas: terve korv kõigis töötaja poodides
+    return arvuta_poed(list(_tootaja_poed.values()), ostukorv, _tootaja_vahemalu)
+
+
+def _arvuta_tukk(poe_nimi: str, korvi_tukk: Dict[str, int]) -> Tuple[float, List[str]]:
+    # Töötajas: ühe poe ja korvi tüki hind
+    pood = _tootaja_poed.get(poe_nimi)
+    if pood is None:
+        # Töötaja ei laadinud seda poodi: arvutaja arvutab selle ise
+        raise KeyError(poe_nimi)
+    return arvuta_poe_korv(pood, korvi_tukk, _tootaja_vahemalu)
+
+
+class ParalleelneArvutaja:
+    # Jagab arvuta_poe_korv töö protsessikogumile: iga pood on eraldi töö,
+    # suured poed jagatakse veel korvi tükkideks. Hägus otsing on puhas
+    # Python, seega lõimed ei aitaks, protsessid aga küll.
+    # Töötajate poed vastavad failide seisule kogumi loomisel; kui mõni fail
+    # on vahepeal muutunud, lisandunud või kadunud, luuakse kogum uuesti.
+
+    def __init__(self, faili_teed: List[str] | None = None, protsesse: int | None = None):
+        # Ilma failideta jälgitakse kogu data/ kausta
+        self._koik_failid = faili_teed is None
+        if faili_teed is None:
+            faili_teed = poodide_failid()
+        self._faili_teed = list(faili_teed)
+        self._protsesse = protsesse
+        self._seisud: Dict[str, Tuple[int, int] | None] = {}
+        self._kogum = self._loo_kogum()
+
+    def _loo_kogum(self) -> ProcessPoolExecutor:
+        # Seis võetakse enne töötajate laadimist: kui fail laadimise ajal
+        # muutub, märgatakse seda järgmisel kontrollil
+        self._seisud = {faili_tee: faili_seis(faili_tee) for faili_tee in self._faili_teed}
+        _valmista_tootajad(self._faili_teed)
+        return ProcessPoolExecutor(
+            max_workers=self._protsesse,
+            initializer=_alusta_tootajat,
+            initargs=(self._faili_teed,),
+        )
+
+    def taaskaivita(self, faili_teed: List[str] | None = None):
+        # Uued töötajad värskete poodidega (nt pärast poe faili muutumist);
+        # pooleli olevad tööd lõpetatakse veel vanade töötajatega
+        if faili_teed is not None:
+            self._faili_teed = list(faili_teed)
+        vana, self._kogum = self._kogum, self._loo_kogum()
+        vana.shutdown(wait=False)
+
+    def _kontrolli_seisu(self):
+        # Taaskäivitab töötajad, kui poodide failid pole enam samas seisus
+        try:
+            faili_teed = poodide_failid() if self._koik_failid else self._faili_teed
+        except OSError:
+            return
+        seisud = {faili_tee: faili_seis(faili_tee) for faili_tee in faili_teed}
+        if seisud != self._seisud:
+            self.taaskaivita(faili_teed)
+
+    def arvuta(
+        self,
+        poed: List[Pood],
+        ostukorv: Dict[str, int]
+    ) -> List[Tuple[str, float, List[str]]]:
+        # Poodide summad ja puuduolevad tooted (järjestamata). Poed, mida
+        # töötajad pole laadinud, arvutatakse siin protsessis.
+        self._kontrolli_seisu()
+        read = list(ostukorv.items())
+        tood = []
+        for pood in poed:
+            if len(pood.kaubad) >= SUURE_POE_PIIR:
+                tukid = [read[i:i + KORVI_TUKI_SUURUS] for i in range(0, len(read), KORVI_TUKI_SUURUS)]
+            else:
+                tukid = [read]
+            tood.append((pood, [
+                self._kogum.submit(_arvuta_tukk, pood.nimi, dict(tukk)) for tukk in tukid
+            ]))
+
+        tulemused = []
+        for pood, tukkide_tood in tood:
+            koguhind = 0.0
+            puudu: List[str] = []
+            try:
+                for too in tukkide_tood:
+                    tuki_hind, tuki_puudu = too.result()
+                    koguhind += tuki_hind
+                    puudu.extend(tuki_puudu)
+            except KeyError:
+                koguhind, puudu = arvuta_poe_korv(pood, ostukorv)
+            tulemused.append((pood.nimi, koguhind, puudu))
+        return tulemused
+
+    def esita_korv(self, ostukorv: Dict[str, int]) -> Future:
+        # Üks korv kõigis poodides töötajas; Future annab järjestatud tulemused
+        self._kontrolli_seisu()
+        return self._kogum.submit(_arvuta_korv_tootajas, ostukorv)
+
+    def arvuta_korvid(
+        self,
+        korvid: Iterable[Dict[str, int]],
+        tuki_suurus: int = 8
+    ) -> Iterator[List[Tuple[str, float, List[str]]]]:
+        # Paljud korvid: iga töötaja hindab terveid korve (järjestatud tulemused
+        # samas järjekorras nagu korvid)
+        self._kontrolli_seisu()
+        return self._kogum.map(_arvuta_korv_tootajas, korvid, chunksize=tuki_suurus)
+
+    def sulge(self):
+        # Peatab töötajad
+        self._kogum.shutdown(cancel_futures=True)
+
+
+class HinnaMaatriks:
+    # Poodide × toodete hinnamaatriks (NaN = poes pole). Veerud on kõigi
+    # poodide normaliseeritud tootenimed ehk kanoonilised ID-d. Kui poes
+    # täpset nime pole, lahendatakse veerg hägusalt üks kord ja kirjutatakse
+    # maatriksisse; edasi on korvi hind ainult kogusevektor × maatriks.
+    # Kataloogis puuduvad korvi read saavad lisaveeru; neid hoitakse
+    # LRU-na kuni lisaveerge tükki, et maatriks ei kasvaks lõputult.
+
+    def __init__(
+        self,
+        poed: List[Pood],
+        vahemalu: VasteteVahemalu | None = None,
+        lisaveerge: int = MAATRIKSI_LISAVEERGE
+    ):
+        if np is None:
+            raise RuntimeError("HinnaMaatriks vajab numpy paketti (pip install numpy).")
+
+        self.poed = list(poed)
+        self.vahemalu = vahemalu
+        self._read = {pood.nimi: s for s, pood in enumerate(self.poed)}
+
+        nimed = sorted(set().union(*(pood.kaubad.keys() for pood in self.poed)))
+        self.veerud: Dict[str, int] = {nimi: j for j, nimi in enumerate(nimed)}
+
+        self._maatriks = np.full((len(self.poed), max(1, len(nimed))), np.nan)
+        for s, pood in enumerate(self.poed):
+            veerud = np.fromiter(
+                (self.veerud[nimi] for nimi in pood.kaubad.keys()),
+                dtype=np.intp, count=len(pood.kaubad),
+            )
+            self._maatriks[s, veerud] = np.asarray(pood.kaubad.hinnad, dtype=float)
+
+        # Veerud, mille puuduvad lahtrid on juba hägusalt lahendatud
+        self._lahendatud = np.zeros(self._maatriks.shape[1], dtype=bool)
+
+        # Kataloogist puuduvate nimede veerud kasutamise järjekorras
+        self.lisaveerge = max(1, lisaveerge)
+        self._lisaveerud: OrderedDict[str, int] = OrderedDict()
+
+    @property
+    def maatriks(self):
+        # Kasutusel olev osa maatriksist (poed × veerud)
+        return self._maatriks[:, :len(self.veerud)]
+
+    def _veerg(self, toode_norm: str) -> int:
+        # Korvi rea veerg; uus nimi saab lisaveeru, puuduvad lahtrid
+        # täidetakse hägusa vastega (nagu arvuta_poe_korv). Lisaveeru number
+        # kehtib ainult järgmise _veerg kutseni.
+        j = self.veerud.get(toode_norm)
+        if j is None:
+            if len(self._lisaveerud) >= self.lisaveerge:
+                vana, j = self._lisaveerud.popitem(last=False)
+                del self.veerud[vana]
+                self._maatriks[:, j] = np.nan
+                self._lahendatud[j] = False
+            else:
+                j = len(self.veerud)
+                if j >= self._maatriks.shape[1]:
+                    laius = min(max(64, len(self._lisaveerud)), self.lisaveerge - len(self._lisaveerud))
+                    lisa = np.full((len(self.poed), laius), np.nan)
+                    self._maatriks = np.hstack([self._maatriks, lisa])
+                    self._lahendatud = np.concatenate(
+                        [self._lahendatud, np.zeros(laius, dtype=bool)]
+                    )
+            self.veerud[toode_norm] = j
+            self._lisaveerud[toode_norm] = j
+        elif toode_norm in self._lisaveerud:
+            self._lisaveerud.move_to_end(toode_norm)
+
+        if not self._lahendatud[j]:
+            for s in np.flatnonzero(np.isnan(self._maatriks[:, j])):
+                pood = self.poed[s]
+                if self.vahemalu is not None:
+                    vaste = self.vahemalu.leia(pood, toode_norm)
+                else:
+                    vaste = pood.indeks.leia(toode_norm)
+                if vaste:
+                    self._maatriks[s, j] = pood.kaubad[vaste]
+            self._lahendatud[j] = True
+        return j
+
+    def hinnad_korvidele(self, korvid: List[Dict[str, int]]):
+        # Paljude korvide hinnad korraga: (summad, puuduvate arv, puudub).
+        # Summad ja puuduvate arv on kujuga korvid × poed, puudub on
+        # { toode_norm : poodide tõeväärtused }. Üks maatrikskorrutis kõigi
+        # korvide jaoks; veerud kopeeritakse kohe, sest lisaveerg võib
+        # partii jooksul uuele nimele minna.
+        veerud: Dict[str, int] = {}
+        tulbad_hinnad = []
+        read, tulbad, kogused = [], [], []
+        for k, ostukorv in enumerate(korvid):
+            for toode_norm, kogus in ostukorv.items():
+                if toode_norm not in veerud:
+                    veerud[toode_norm] = len(veerud)
+                    j = self._veerg(toode_norm)
+                    tulbad_hinnad.append(self._maatriks[:, j].copy())
+                read.append(k)
+                tulbad.append(veerud[toode_norm])
+                kogused.append(kogus)
+
+        kogusmaatriks = np.zeros((len(korvid), len(veerud)))
+        np.add.at(kogusmaatriks, (read, tulbad), kogused)
+
+        if tulbad_hinnad:
+            hinnad = np.column_stack(tulbad_hinnad)
+        else:
+            hinnad = np.empty((len(self.poed), 0))
+        puudub = np.isnan(hinnad)
+        summad = kogusmaatriks @ np.where(puudub, 0.0, hinnad).T
+        puuduvaid = (kogusmaatriks > 0) @ puudub.T.astype(np.intp)
+        return summad, puuduvaid, {t: puudub[:, j] for t, j in veerud.items()}
+
+    def arvuta(
+        self,
+        poed: List[Pood],
+        ostukorv: Dict[str, int]
+    ) -> List[Tuple[str, float, List[str]]]:
+        # Ühe korvi tulemused antud poodidele (järjestamata, nagu arvuta_poed ootab)
+        tooted = list(ostukorv)
+        kogused = np.array([ostukorv[t] for t in tooted], dtype=float)
+
+        read = [self._read[pood.nimi] for pood in poed]
+        hinnad = np.empty((len(read), len(tooted)))
+        for r, toode_norm in enumerate(tooted):
+            j = self._veerg(toode_norm)
+            hinnad[:, r] = self._maatriks[read, j]
+        puudub = np.isnan(hinnad)
+        summad = np.where(puudub, 0.0, hinnad) @ kogused
+
+        return [
+            (pood.nimi, float(summad[s]), [t for t, p in zip(tooted, puudub[s]) if p])
+            for s, pood in enumerate(poed)
+        ]
+
+
+@dataclass
+class KorviJaotus:
+    # Ostukorv jagatuna mitme poe vahel
+    poed: List[str]                     # külastatavad poed
+    read: Dict[str, Tuple[str, float]]  # toode_norm -> (poe nimi, rea hind)
+    koguhind: float                     # toodete hind + külastuste hind
+    puudu: List[str]                    # tooted, mida ükski valitud pood ei müü
+
+
+def toote_hind(
+    pood: Pood,
+    toode_norm: str,
+    vahemalu: VasteteVahemalu | None = None
+) -> float | None:
+    # Toote ühiku hind poes (täpne nimi või hägus vaste), None kui puudub
+    if toode_norm in pood.kaubad:
+        return pood.kaubad[toode_norm]
+    if vahemalu is not None:
+        vaste = vahemalu.leia(pood, toode_norm)
+    else:
+        vaste = pood.indeks.leia(toode_norm)
+    return pood.kaubad[vaste] if vaste else None
+
+
+def korvi_hinnatabel(
+    poed: List[Pood],
+    ostukorv: Dict[str, int],
+    vahemalu: VasteteVahemalu | None = None
+) -> Dict[str, Dict[str, float | None]]:
+    # { toode_norm : { poe nimi : ühiku hind või None } }
+    return {
+        toode_norm: {pood.nimi: toote_hind(pood, toode_norm, vahemalu) for pood in poed}
+        for toode_norm in ostukorv
+    }
+
+
+def jaota_korv(
+    poodide_nimed: List[str],
+    hinnatabel: Dict[str, Dict[str, float | None]],
+    ostukorv: Dict[str, int],
+    max_poode: int = 2,
+    kulastuse_hind: float | Dict[str, float] = 0.0
+) -> KorviJaotus:
+    # Leiab kuni max_poode poodi, mille vahel korv on kõige odavam: iga rida
+    # ostetakse valitud poodidest sealt, kus see on odavaim. Eelkõige
+    # kaetakse võimalikult palju ridu, seejärel minimeeritakse hinda
+    # (koos poe külastuse hinnaga). Täpne harude ja piiride meetod.
+    if isinstance(kulastuse_hind, dict):
+        kulastused = [kulastuse_hind.get(nimi, 0.0) for nimi in poodide_nimed]
+    else:
+        kulastused = [kulastuse_hind] * len(poodide_nimed)
+
+    tooted = list(ostukorv)
+    lopmatu = float("inf")
+    # hinnad[s][r] = poe s rea r hind (kogus × ühiku hind) või inf
+    hinnad = []
+    for nimi in poodide_nimed:
+        rida = []
+        for toode_norm in tooted:
+            hind = hinnatabel.get(toode_norm, {}).get(nimi)
+            rida.append(lopmatu if hind is None else hind * ostukorv[toode_norm])
+        hinnad.append(rida)
+
+    def hinda(miinimumid: List[float], kulastus: float) -> Tuple[int, float]:
+        # (katmata ridade arv, hind)
+        katmata = sum(1 for h in miinimumid if h == lopmatu)
+        return katmata, kulastus + sum(h for h in miinimumid if h != lopmatu)
+
+    # Poed järjestatakse üksikult parimast halvimani, et head lahendused
+    # leitaks varakult ja kärpimine töötaks
+    jarjekord = sorted(
+        range(len(poodide_nimed)),
+        key=lambda s: hinda(hinnad[s], kulastused[s]),
+    )
+
+    # Järelejäänud poodide ridade miinimumid alumise piiri jaoks
+    jargmised = [[lopmatu] * len(tooted) for _ in range(len(jarjekord) + 1)]
+    for i in range(len(jarjekord) - 1, -1, -1):
+        s = jarjekord[i]
+        jargmised[i] = [min(a, b) for a, b in zip(jargmised[i + 1], hinnad[s])]
+
+    parim: Tuple[Tuple[int, float], List[int]] = ((len(tooted) + 1, lopmatu), [])
+
+    def otsi(i: int, valitud: List[int], miinimumid: List[float], kulastus: float):
+        nonlocal parim
+        if valitud:
+            tulemus = hinda(miinimumid, kulastus)
+            if tulemus < parim[0]:
+                parim = (tulemus, list(valitud))
+        if len(valitud) >= max_poode:
+            return
+
+        for j in range(i, len(jarjekord)):
+            s = jarjekord[j]
+            uued = [min(a, b) for a, b in zip(miinimumid, hinnad[s])]
+            # Alumine piir: valitud poed + see pood + kõik järgmised poed
+            piir = hinda([min(a, b) for a, b in zip(uued, jargmised[j + 1])], kulastus + kulastused[s])
+            if piir >= parim[0]:
+                continue
+            valitud.append(s)
+            otsi(j + 1, valitud, uued, kulastus + kulastused[s])
+            valitud.pop()
+
+    otsi(0, [], [lopmatu] * len(tooted), 0.0)
+
+    (_katmata, koguhind), valitud = parim
+    read: Dict[str, Tuple[str, float]] = {}
+    puudu: List[str] = []
+    for r, toode_norm in enumerate(tooted):
+        hind, s = min(((hinnad[s][r], s) for s in valitud), default=(lopmatu, -1))
+        if hind == lopmatu:
+            puudu.append(toode_norm)
+        else:
+            read[toode_norm] = (poodide_nimed[s], hind)
+
+    # Poed, millest tegelikult midagi ei osteta, jäävad välja
+    kasutatud = {poe_nimi for poe_nimi, _hind in read.values()}
+    return KorviJaotus(
+        poed=[poodide_nimed[s] for s in valitud if poodide_nimed[s] in kasutatud],
+        read=read,
+        koguhind=koguhind if koguhind != lopmatu else 0.0,
+        puudu=puudu,
+    )
+
+
+class KorviArvestus:
+    # Hoiab iga poe jooksvat korvi hinda ja puuduolevaid tooteid.
+    # Ostukorvi muutmisel rakendatakse ainult muutuse mõju (delta),
+    # seega odavaim pood on pärast igat muudatust teada O(poode) ajaga.
+
+    def __init__(self, poed: List[Pood], vahemalu: VasteteVahemalu | None = None):
+        self.poed: List[Pood] = []
+        self.vahemalu = vahemalu
+
+        # Ostukorv: { toode_norm : kogus }
+        self.ostukorv: Dict[str, int] = {}
+
+        # Poe nimi -> { toode_norm : ühiku hind või None (puudub) }
+        self._hinnad: Dict[str, Dict[str, float | None]] = {}
+        self.koguhinnad: Dict[str, float] = {}
+        # Poe nimi -> puuduolevad tooted (dict hoiab lisamise järjekorda)
+        self.puudu: Dict[str, Dict[str, None]] = {}
+
+        for pood in poed:
+            self.lisa_pood(pood)
+
+    def lisa_pood(self, pood: Pood):
+        # Lisab poe ja arvutab sellele olemasoleva ostukorvi summa
+        self.poed.append(pood)
+        self._alusta_poodi(pood)
+
+        hinnad = self._hinnad[pood.nimi]
+        for toode_norm, kogus in self.ostukorv.items():
+            hind = hinnad[toode_norm] = self._uhiku_hind(pood, toode_norm)
+            if hind is None:
+                self.puudu[pood.nimi][toode_norm] = None
+            else:
+                self.koguhinnad[pood.nimi] += hind * kogus
+
+    def vaheta_pood(self, pood: Pood):
+        # Asendab sama nimega poe (uuesti laetud kaubad) ja arvutab ainult
+        # selle poe summa uuesti; uue nime korral lisab poe
+        for i, vana in enumerate(self.poed):
+            if vana.nimi == pood.nimi:
+                del self.poed[i]
+                break
+        else:
+            i = len(self.poed)
+        self.lisa_pood(pood)
+        self.poed.insert(i, self.poed.pop())
+
+    def eemalda_pood(self, poe_nimi: str):
+        # Eemaldab poe (nt selle fail kustutati)
+        self.poed = [pood for pood in self.poed if pood.nimi != poe_nimi]
+        self._hinnad.pop(poe_nimi, None)
+        self.koguhinnad.pop(poe_nimi, None)
+        self.puudu.pop(poe_nimi, None)
+
+    def _alusta_poodi(self, pood: Pood):
+        self._hinnad[pood.nimi] = {}
+        self.koguhinnad[pood.nimi] = 0.0
+        self.puudu[pood.nimi] = {}
+
+    def _uhiku_hind(self, pood: Pood, toode_norm: str) -> float | None:
+        # Leiab toote hinna selles poes (täpne nimi või hägus vaste)
+        return toote_hind(pood, toode_norm, self.vahemalu)
+
+    def muuda(self, toode_norm: str, kogus: int):
+        # Seab toote koguse; kogus 0 eemaldab rea ostukorvist
+        vana = self.ostukorv.get(toode_norm, 0)
+        if kogus == vana:
+            return
+
+        for pood in self.poed:
+            hinnad = self._hinnad[pood.nimi]
+            if toode_norm not in hinnad:
+                hinnad[toode_norm] = self._uhiku_hind(pood, toode_norm)
+            hind = hinnad[toode_norm]
+
+            if hind is None:
+                if kogus > 0:
+                    self.puudu[pood.nimi][toode_norm] = None
+                else:
+                    self.puudu[pood.nimi].pop(toode_norm, None)
+            else:
+                self.koguhinnad[pood.nimi] += hind * (kogus - vana)
+
+            if kogus <= 0:
+                del hinnad[toode_norm]
+
+        if kogus > 0:
+            self.ostukorv[toode_norm] = kogus
+        else:
+            self.ostukorv.pop(toode_norm, None)
+            if not self.ostukorv:
+                # Tühja korvi korral nullime ujukomavea kogunemise
+                self.tyhjenda()
+
+    def lisa(self, toode_norm: str, kogus: int):
+        # Lisab tootele koguse juurde
+        self.muuda(toode_norm, self.ostukorv.get(toode_norm, 0) + kogus)
+
+    def eemalda(self, toode_norm: str):
+        # Eemaldab rea ostukorvist
+        self.muuda(toode_norm, 0)
+
+    def tyhjenda(self):
+        # Tühjendab ostukorvi ja kõigi poodide summad
+        self.ostukorv.clear()
+        for pood in self.poed:
+            self._alusta_poodi(pood)
+
+    def hinnatabel(self) -> Dict[str, Dict[str, float | None]]:
+        # Korvi ridade ühiku hinnad poodides (vt korvi_hinnatabel), juba arvutatud
+        return {
+            toode_norm: {pood.nimi: self._hinnad[pood.nimi][toode_norm] for pood in self.poed}
+            for toode_norm in self.ostukorv
+        }
+
+    def tulemused(self) -> List[Tuple[str, float, List[str]]]:
+        # Poed järjestatuna: enne täielikud korvid, siis hinna järgi
+        tulemused = [
+            (pood.nimi, self.koguhinnad[pood.nimi], list(self.puudu[pood.nimi]))
+            for pood in self.poed
+        ]
+        tulemused.sort(key=lambda x: (len(x[2]) > 0, x[1]))
+        return tulemused
+
+
+class Rakendus(tk.Tk if tk is not None else object):
     def __init__(self):
         super().__init__()
         # Akna põhiandmed
@@ -124,19 +2080,55 @@ class Rakendus(tk.Tk):
         self.geometry("920x560")
         self.minsize(880, 520)
 
-        # Laeme poed sisse (JSON-failidest)
+        # Poodide failid; poed ise laetakse taustal pärast akna avamist
         try:
-            self.poed = lae_poed()
+            self._poodide_failid = poodide_failid()
         except Exception as viga:
             messagebox.showerror("Viga", str(viga))
             self.destroy()
             return
+        self.poed: List[Pood] = []
+        # Failide seis enne laadimist, et laadimise ajal tehtud muudatused ei kaoks
+        self._jalgija = KaustaJalgija()
+        self._uuendused: queue.Queue = queue.Queue()
+        # Failid, mida taustal praegu uuesti laetakse (üks lõim faili kohta)
+        self._laeb: Set[str] = set()
+        self._laetud_faile = 0
+        self._laadimise_vead: List[str] = []
+        self._laadimise_vastused: queue.Queue = queue.Queue()
+
+        # Poodidevaheline vastavustabel ning ühikuhindade ja asenduste indeks;
+        # koostatakse taustal pärast laadimist. jrk järgi võetakse kasutusse
+        # ainult viimase koostamise tulemus.
+        self._vastavuse_vastused: queue.Queue = queue.Queue()
+        self._vastavuse_jrk = 0
+        self._rakendatud_vastavuse_jrk = 0
+        self.uhikuhinnad: UhikuHinnaIndeks | None = None
+
+        # Hindade ajalugu; loetakse taustal koos poodidega
+        self.hinnaajalugu: HinnaAjalugu | None = None
+
+        # Hägusate vastete vahemälu, et korduv arvutamine oleks odav
+        self.vahemalu = VasteteVahemalu()
+
+        # Poodide jooksvad summad; uuenevad iga ostukorvi muudatusega
+        self.arvestus = KorviArvestus(self.poed, self.vahemalu)
 
         # Ostukorv: { toode_norm : kogus }
-        self.ostukorv: Dict[str, int] = {}
+        self.ostukorv: Dict[str, int] = self.arvestus.ostukorv
+
+        # Kõik tooted kõigist laetud poodidest (autocomplete indeks)
+        self.soovituste_indeks = SoovitusteIndeks([])
 
-        # Kõik tooted kõigist poodidest (autocomplete jaoks)
-        self.koik_tooted: List[str] = sorted(self._kogu_koik_tooted())
+        # Soovitusi otsitakse töölõimes; jrk muudab vanemad päringud aegunuks
+        self._soovituste_jrk = 0
+        self._soovituste_ootel: str | None = None
+        self._saadetud_jrk = -1
+        self._ootan_vastust = False
+        self._soovituste_paringud: queue.Queue = queue.Queue()
+        self._soovituste_vastused: queue.Queue = queue.Queue()
+        self._soovituste_lukk = threading.Lock()
+        threading.Thread(target=self._soovituste_tootaja, daemon=True).start()
 
         # UI muutujad (Entry + kogus)
         self.kogus_muuttuja = tk.IntVar(value=1)
@@ -145,12 +2137,200 @@ class Rakendus(tk.Tk):
         # Ehitame kasutajaliidese
         self._ehita_ui()
 
-    def _kogu_koik_tooted(self) -> Set[str]:
-        # Koondab kõik toodete võtmed kõikidest poodidest
-        koik: Set[str] = set()
-        for pood in self.poed:
-            koik.update(pood.kaubad.keys())
-        return koik
+        # Laeme poed taustal, aken on juba nähtav
+        threading.Thread(target=self._laadija, daemon=True).start()
+        self.after(LAADIMISE_KONTROLL_MS, self._kontrolli_laadimist)
+
+    def _laadija(self):
+        # Taustalõim: laeb poed paralleelselt ja lisab iga poe järel selle
+        # uued nimed soovituste kogumisse (vanu nimesid uuesti ei indekseerita);
+        # põhilõim vahetab kogumi välja, nii et soovitused töötavad kohe
+        soovitused = SoovitusteKogum()
+        try:
+            self.hinnaajalugu = HinnaAjalugu()
+        except (OSError, ValueError):
+            # Ajaloota töötab rakendus edasi, lihtsalt ajalugu ei näidata
+            self.hinnaajalugu = None
+
+        with ThreadPoolExecutor(max_workers=max(1, len(self._poodide_failid))) as taitja:
+            tood = {taitja.submit(lae_pood, tee): tee for tee in self._poodide_failid}
+            for too in as_completed(tood):
+                try:
+                    pood = too.result()
+                except Exception as viga:
+                    self._laadimise_vastused.put((tood[too], None, None, viga))
+                    continue
+
+                if pood is not None:
+                    self._salvesta_ajalukku(pood, tood[too])
+                    soovitused = soovitused.lisa(pood.kaubad.keys())
+                self._laadimise_vastused.put((tood[too], pood, soovitused, None))
+
+    def _salvesta_ajalukku(self, pood: Pood, faili_tee: str):
+        # Taustalõim: poe hetkeseis ajalukku (muutumata hindu ei kirjutata)
+        if self.hinnaajalugu is None:
+            return
+        try:
+            self.hinnaajalugu.lisa_pood(pood, faili_paev(faili_tee))
+        except (OSError, ValueError):
+            pass
+
+    def _kontrolli_laadimist(self):
+        # Põhilõim: võtab valmis poed ja täienenud soovitused kasutusse kohe,
+        # kui need on laetud
+        while not self._laadimise_vastused.empty():
+            faili_tee, pood, indeks, viga = self._laadimise_vastused.get_nowait()
+            self._laetud_faile += 1
+            if indeks is not None:
+                with self._soovituste_lukk:
+                    self.soovituste_indeks = indeks
+
+            if viga is not None:
+                self._laadimise_vead.append(f"{os.path.basename(faili_tee)}: {viga}")
+            if pood is None:
+                continue
+
+            self.poed.append(pood)
+            self.arvestus.lisa_pood(pood)
+            self.arvuta_nupp.state(["!disabled"])
+            self.jaota_nupp.state(["!disabled"])
+            self._naita_parimat()
+
+        self._uuenda_jalust()
+        if self._laetud_faile < len(self._poodide_failid):
+            self.after(LAADIMISE_KONTROLL_MS, self._kontrolli_laadimist)
+            return
+
+        if self._laadimise_vead:
+            messagebox.showerror("Viga", "\n".join(self._laadimise_vead))
+        # Kõik poed on laetud: edasi jälgime failide muutumist
+        self.after(int(JALGIMISE_INTERVALL_S * 1000), self._jalgi_kausta)
+        self._ehita_vastavus()
+
+    def _ehita_vastavus(self, soovitused: bool = False):
+        # Vastavustabel (failist või uuesti arvutatuna) ja ühikuhindade indeks
+        # taustal praeguste poodide põhjal. Soovituste indeks ehitatakse eraldi
+        # lõimes: see ei pea ootama aeglast toodete ühendamist.
+        poed = list(self.poed)
+        self._vastavuse_jrk += 1
+        jrk = self._vastavuse_jrk
+
+        def ehita():
+            self._vastavuse_vastused.put((jrk, lae_vastavus(poed), UhikuHinnaIndeks(poed)))
+
+        def ehita_soovitused():
+            indeks = SoovitusteIndeks(nimi for pood in poed for nimi in pood.kaubad.keys())
+            with self._soovituste_lukk:
+                # Vahepeal alustatud koostamine on uuemate poodide põhjal
+                if jrk == self._vastavuse_jrk:
+                    self.soovituste_indeks = indeks
+
+        threading.Thread(target=ehita, daemon=True).start()
+        if soovitused:
+            threading.Thread(target=ehita_soovitused, daemon=True).start()
+        self.after(LAADIMISE_KONTROLL_MS, self._kontrolli_vastavust)
+
+    def _kontrolli_vastavust(self):
+        # Põhilõim: võtab viimase vastavustabeli kasutusse ja arvutab poodide
+        # summad uuesti; vahepeal poode muutnud koostamiste tulemused jäetakse ära
+        while not self._vastavuse_vastused.empty():
+            jrk, vastavus, uhikuhinnad = self._vastavuse_vastused.get_nowait()
+            if jrk != self._vastavuse_jrk:
+                continue
+            self.vahemalu.vastavus = vastavus
+            with self._soovituste_lukk:
+                self.uhikuhinnad = uhikuhinnad
+            for pood in self.poed:
+                self.arvestus.vaheta_pood(pood)
+            self._naita_parimat()
+            self._rakendatud_vastavuse_jrk = jrk
+
+        if self._rakendatud_vastavuse_jrk != self._vastavuse_jrk:
+            self.after(LAADIMISE_KONTROLL_MS, self._kontrolli_vastavust)
+
+    def _jalgi_kausta(self):
+        # Põhilõim: kui mõni poe fail muutus, laeme ainult selle taustal uuesti
+        try:
+            muutunud, eemaldatud = self._jalgija.kontrolli()
+        except OSError:
+            muutunud, eemaldatud = [], []
+
+        for faili_tee in eemaldatud:
+            self._jalgija.kinnita(faili_tee, None)
+            self._eemalda_pood(poe_nimi_failist(faili_tee))
+
+        # Faili, mida juba laetakse, ei laeta teist korda: kui see vahepeal
+        # uuesti muutus, märkab järgmine kontroll seda pärast kinnitamist
+        for faili_tee in muutunud:
+            if faili_tee in self._laeb:
+                continue
+            self._laeb.add(faili_tee)
+            threading.Thread(target=self._lae_uuesti, args=(faili_tee,), daemon=True).start()
+
+        self._rakenda_uuendused(muudetud=bool(eemaldatud))
+        self.after(int(JALGIMISE_INTERVALL_S * 1000), self._jalgi_kausta)
+
+    def _lae_uuesti(self, faili_tee: str):
+        # Taustalõim: loeb muutunud poe (seis võetakse enne lugemist)
+        seis = faili_seis(faili_tee)
+        try:
+            pood = lae_pood(faili_tee)
+        except Exception:
+            # Fail võib olla poolenisti kirjutatud; proovime järgmisel kontrollil
+            self._uuendused.put((faili_tee, None, None, False))
+            return
+        if pood is not None:
+            self._salvesta_ajalukku(pood, faili_tee)
+        self._uuendused.put((faili_tee, seis, pood, True))
+
+    def _rakenda_uuendused(self, muudetud: bool = False):
+        # Põhilõim: vahetab uuesti laetud poed välja; soovituste indeks ja
+        # vastavustabel ehitatakse lõpuks üks kord kõigi poodide põhjal
+        while not self._uuendused.empty():
+            faili_tee, seis, pood, korras = self._uuendused.get_nowait()
+            self._laeb.discard(faili_tee)
+            if not korras:
+                continue
+            muudetud = True
+            self._jalgija.kinnita(faili_tee, seis)
+            poe_nimi = poe_nimi_failist(faili_tee)
+
+            if pood is None:
+                self._eemalda_pood(poe_nimi)
+                continue
+
+            if any(p.nimi == poe_nimi for p in self.poed):
+                self.poed = [pood if p.nimi == poe_nimi else p for p in self.poed]
+            else:
+                self.poed = self.poed + [pood]
+            self.vahemalu.unusta_pood(poe_nimi)
+            self.arvestus.vaheta_pood(pood)
+            self.arvuta_nupp.state(["!disabled"])
+            self.jaota_nupp.state(["!disabled"])
+
+        if muudetud:
+            self._uuenda_jalust()
+            self._naita_parimat()
+            self._ehita_vastavus(soovitused=True)
+
+    def _eemalda_pood(self, poe_nimi: str):
+        # Eemaldab poe, mille fail kustutati või mis jäi tühjaks (indeksid
+        # ehitab uuesti _rakenda_uuendused)
+        self.poed = [p for p in self.poed if p.nimi != poe_nimi]
+        self.vahemalu.unusta_pood(poe_nimi)
+        self.arvestus.eemalda_pood(poe_nimi)
+
+    def _uuenda_jalust(self):
+        # Jalus: laetud poed ja laadimise edenemine
+        poed_rida = ", ".join(p.nimi for p in self.poed)
+        kokku = len(self._poodide_failid)
+        if self._laetud_faile < kokku:
+            self.poodide_silt.config(
+                text=f"Laetud poed: {poed_rida} (laen {self._laetud_faile}/{kokku})")
+            self.laadimise_riba.config(maximum=kokku, value=self._laetud_faile)
+        else:
+            self.poodide_silt.config(text=f"Laetud poed: {poed_rida}")
+            self.laadimise_riba.pack_forget()
 
     def _ehita_ui(self):
         # Tkinteri stii
@@ -181,6 +2361,10 @@ class Rakendus(tk.Tk):
         self.sisestus.pack(fill="x", pady=(6, 4))
         self.sisestus.focus_set()
 
+        # Otsitava kategooria odavaim kilo/liitri hind kõigis poodides
+        self.uhikuhinna_silt = ttk.Label(vasak, text="", wraplength=380, justify="left")
+        self.uhikuhinna_silt.pack(anchor="w")
+
         # Autocomplete list
         self.soovituste_kast = tk.Listbox(vasak, height=6)
         self.soovituste_kast.pack(fill="x")
@@ -214,7 +2398,10 @@ class Rakendus(tk.Tk):
 
         ttk.Separator(vasak).pack(fill="x", pady=12)
 
-        ttk.Button(vasak, text="Arvuta odavaim pood", command=self.arvuta).pack(fill="x")
+        self.arvuta_nupp = ttk.Button(vasak, text="Arvuta odavaim pood", command=self.arvuta)
+        self.arvuta_nupp.pack(fill="x")
+        # Lubatakse siis, kui esimene pood on laetud
+        self.arvuta_nupp.state(["disabled"])
 
         # Tulemuse sildid
         self.parim_silt = ttk.Label(vasak, text="", font=("Segoe UI", 11, "bold"))
@@ -223,6 +2410,29 @@ class Rakendus(tk.Tk):
         self.puudu_silt = ttk.Label(vasak, text="", wraplength=380, justify="left")
         self.puudu_silt.pack(anchor="w")
 
+        # Iga ostukorvi toote kategooria odavaim kilo/liitri/tüki hind
+        self.kilohinna_silt = ttk.Label(vasak, text="", wraplength=380, justify="left")
+        self.kilohinna_silt.pack(anchor="w", pady=(6, 0))
+
+        # Iga ostukorvi rea jaoks parim odavam asendus (vt UhikuHinnaIndeks.asendused)
+        self.asenduste_silt = ttk.Label(vasak, text="", wraplength=380, justify="left")
+        self.asenduste_silt.pack(anchor="w", pady=(6, 0))
+
+        # Korvi jagamine mitme poe vahel
+        jaotuse_rida = ttk.Frame(vasak)
+        jaotuse_rida.pack(fill="x", pady=(12, 0))
+        ttk.Label(jaotuse_rida, text="Max poode").pack(side="left")
+        self.max_poode_muuttuja = tk.IntVar(value=2)
+        ttk.Spinbox(
+            jaotuse_rida, from_=1, to=10, width=4, textvariable=self.max_poode_muuttuja
+        ).pack(side="left", padx=(10, 10))
+        self.jaota_nupp = ttk.Button(jaotuse_rida, text="Jaota poodide vahel", command=self.jaota)
+        self.jaota_nupp.pack(side="left", fill="x", expand=True)
+        self.jaota_nupp.state(["disabled"])
+
+        self.jaotuse_silt = ttk.Label(vasak, text="", wraplength=380, justify="left")
+        self.jaotuse_silt.pack(anchor="w", pady=(6, 0))
+
         # Parem paneel: ostukorv
         parem = ttk.LabelFrame(sisu, text="Ostukorv", padding=12)
         parem.pack(side="right", fill="both", expand=True, padx=(14, 0))
@@ -234,6 +2444,11 @@ class Rakendus(tk.Tk):
         self.tabel.column("Toode", width=360, anchor="w")
         self.tabel.column("Kogus", width=80, anchor="center")
         self.tabel.pack(fill="both", expand=True)
+        self.tabel.bind("<<TreeviewSelect>>", lambda _e: self._naita_ajalugu())
+
+        # Valitud toote hind igas poes ja viimaste päevade min/keskmine
+        self.ajaloo_silt = ttk.Label(parem, text="", wraplength=440, justify="left")
+        self.ajaloo_silt.pack(anchor="w", pady=(8, 0))
 
         # Ostukorvi nupud
         nupurea = ttk.Frame(parem)
@@ -241,35 +2456,133 @@ class Rakendus(tk.Tk):
         ttk.Button(nupurea, text="Eemalda valitu", command=self.eemalda_valitu).pack(side="left")
         ttk.Button(nupurea, text="Tühjenda ostukorv", command=self.tyhjenda_ostukorv).pack(side="left", padx=(8, 0))
 
-        # Jalus: laetud poed
-        poed_rida = ", ".join(p.nimi for p in self.poed)
-        ttk.Label(juur, text=f"Laetud poed: {poed_rida}").pack(anchor="w", pady=(12, 0))
+        # Jalus: laetud poed ja laadimise edenemine
+        jalus = ttk.Frame(juur)
+        jalus.pack(fill="x", pady=(12, 0))
+        self.poodide_silt = ttk.Label(jalus, text="")
+        self.poodide_silt.pack(side="left")
+        self.laadimise_riba = ttk.Progressbar(jalus, length=160, mode="determinate")
+        self.laadimise_riba.pack(side="right")
+        self._uuenda_jalust()
 
     def _uuenda_soovitusi(self):
-        # Uuendab autocomplete soovitusi sisestuse põhjal
+        # Kirjutamisel: otsime soovitusi alles siis, kui trükkimine peatub
+        self._tuhista_soovitused()
+        self._soovituste_ootel = self.after(
+            SOOVITUSTE_VIIVITUS_MS, self._saada_soovituste_paring
+        )
+
+    def _tuhista_soovitused(self):
+        # Muudab kõik pooleli olevad soovituste päringud aegunuks
+        self._soovituste_jrk += 1
+        if self._soovituste_ootel is not None:
+            self.after_cancel(self._soovituste_ootel)
+            self._soovituste_ootel = None
+
+    def _saada_soovituste_paring(self):
+        # Saadab sisestuse töölõimele
+        self._soovituste_ootel = None
+        otsing = normaliseeri_tekst(self.toode_muuttuja.get())
+        if not otsing:
+            self._peida_soovitused()
+            return
+
+        self._saadetud_jrk = self._soovituste_jrk
+        self._soovituste_paringud.put((self._soovituste_jrk, otsing))
+        if not self._ootan_vastust:
+            self._ootan_vastust = True
+            self.after(SOOVITUSTE_KONTROLL_MS, self._kontrolli_soovitusi)
+
+    def _soovituste_tootaja(self):
+        # Töölõim: arvutab ainult kõige värskema päringu soovitused
+        while True:
+            jrk, otsing = self._soovituste_paringud.get()
+            while not self._soovituste_paringud.empty():
+                jrk, otsing = self._soovituste_paringud.get_nowait()
+            if jrk != self._soovituste_jrk:
+                continue
+
+            with self._soovituste_lukk:
+                vasted = self.soovituste_indeks.otsi(otsing)
+                odavaimad = self._odavaim_uhikuhind(otsing)
+            self._soovituste_vastused.put((jrk, vasted, odavaimad))
+
+    def _kontrolli_soovitusi(self):
+        # Põhilõim: võtab töölõime vastused ja näitab viimast kehtivat
+        ootan = self._saadetud_jrk == self._soovituste_jrk
+        while not self._soovituste_vastused.empty():
+            jrk, vasted, odavaimad = self._soovituste_vastused.get_nowait()
+            if jrk == self._soovituste_jrk:
+                self._naita_soovitusi(vasted, odavaimad)
+                ootan = False
+
+        # Aegunud päringu korral alustab uue kontrolli _saada_soovituste_paring
+        if ootan:
+            self.after(SOOVITUSTE_KONTROLL_MS, self._kontrolli_soovitusi)
+        else:
+            self._ootan_vastust = False
+
+    def _soovitused_kohe(self):
+        # Arvutab soovitused kohe põhilõimes (nt Enteri vajutamisel)
+        self._tuhista_soovitused()
         otsing = normaliseeri_tekst(self.toode_muuttuja.get())
         if not otsing:
             self._peida_soovitused()
             return
+        with self._soovituste_lukk:
+            vasted = self.soovituste_indeks.otsi(otsing)
+            odavaimad = self._odavaim_uhikuhind(otsing)
+        self._naita_soovitusi(vasted, odavaimad)
+
+    def _odavaim_uhikuhind(self, otsing: str) -> List[Tuple[str, str, float, str]]:
+        # Otsingu kategooria odavaim toode kilo/liitri/tüki hinna järgi
+        if self.uhikuhinnad is None:
+            return []
+        return self.uhikuhinnad.odavaimad(otsing, 1)
+
+    def _naita_soovitusi(self, vasted: List[str], odavaimad: List[Tuple[str, str, float, str]] = ()):
+        # Uuendab Listboxis ainult neid ridu, mis tegelikult muutusid
+        if odavaimad:
+            poe_nimi, toode, hind, uhik = odavaimad[0]
+            ilus_poe_nimi = poe_nimi.replace("_products", "").capitalize()
+            self.uhikuhinna_silt.config(
+                text=f"Odavaim €/{uhik}: {toode} ({ilus_poe_nimi}) {hind:.2f} €/{uhik}")
+        else:
+            self.uhikuhinna_silt.config(text="")
 
-        vasted = [t for t in self.koik_tooted if otsing in t][:12]
         if not vasted:
             self._peida_soovitused()
             return
 
-        self.soovituste_kast.delete(0, tk.END)
-        for v in vasted:
-            self.soovituste_kast.insert(tk.END, v)
+        olemas = self.soovituste_kast.get(0, tk.END)
+        muutus = list(olemas) != vasted
+        if muutus:
+            for i, v in enumerate(vasted):
+                if i >= len(olemas):
+                    self.soovituste_kast.insert(tk.END, v)
+                elif olemas[i] != v:
+                    self.soovituste_kast.delete(i)
+                    self.soovituste_kast.insert(i, v)
+            if len(olemas) > len(vasted):
+                self.soovituste_kast.delete(len(vasted), tk.END)
 
         if not self.soovituste_kast.winfo_ismapped():
             self.soovituste_kast.pack(fill="x", pady=(0, 6))
+            muutus = True
+
+        if muutus:
+            self.soovituste_kast.selection_clear(0, tk.END)
+            self.soovituste_kast.selection_set(0)
+            self.soovituste_kast.activate(0)
 
-        self.soovituste_kast.selection_clear(0, tk.END)
-        self.soovituste_kast.selection_set(0)
-        self.soovituste_kast.activate(0)
+    def _soovitused_ootel(self) -> bool:
+        # Kas sisestusele vastavad soovitused on veel arvutamata
+        return self._soovituste_ootel is not None or self._ootan_vastust
 
     def _enter_sisestuses(self, _e):
         # Enter: kui on soovitusi, vali esimene ja lisa ostukorvi
+        if self._soovitused_ootel():
+            self._soovitused_kohe()
         if self.soovituste_kast.winfo_ismapped() and self.soovituste_kast.size() > 0:
             self.soovituste_kast.selection_clear(0, tk.END)
             self.soovituste_kast.selection_set(0)
@@ -280,12 +2593,16 @@ class Rakendus(tk.Tk):
         self.lisa_ostukorvi()
 
     def _peida_soovitused(self):
-        # Peidab autocomplete kasti
+        # Peidab autocomplete kasti ja tühistab pooleli olevad päringud
+        self._tuhista_soovitused()
         if self.soovituste_kast.winfo_ismapped():
             self.soovituste_kast.pack_forget()
+        self.uhikuhinna_silt.config(text="")
 
     def _fookus_soovitustele(self):
         # Viib fookuse soovituste listile
+        if self._soovitused_ootel():
+            self._soovitused_kohe()
         if self.soovituste_kast.winfo_ismapped() and self.soovituste_kast.size() > 0:
             self.soovituste_kast.focus_set()
             self.soovituste_kast.selection_clear(0, tk.END)
@@ -321,12 +2638,13 @@ class Rakendus(tk.Tk):
             return
 
         voti = normaliseeri_tekst(toote_nimi)
-        self.ostukorv[voti] = self.ostukorv.get(voti, 0) + kogus
+        self.arvestus.lisa(voti, kogus)
 
         self.toode_muuttuja.set("")
         self.kogus_muuttuja.set(1)
         self._peida_soovitused()
         self._uuenda_ostukorvi_vaadet()
+        self._naita_parimat()
 
     def _uuenda_ostukorvi_vaadet(self):
         # Värskendab ostukorvi tabelit
@@ -334,6 +2652,38 @@ class Rakendus(tk.Tk):
         for toode_norm, kogus in sorted(self.ostukorv.items()):
             self.tabel.insert("", "end", values=(toode_norm, kogus))
 
+    def _naita_ajalugu(self):
+        # Näitab valitud toote praegust hinda ja hinnaajalugu igas poes
+        valitud = self.tabel.selection()
+        if not valitud or not self.poed:
+            self.ajaloo_silt.config(text="")
+            return
+        toode_norm = self.tabel.item(valitud[0], "values")[0]
+
+        read = []
+        for pood in self.poed:
+            ilus_poe_nimi = pood.nimi.replace("_products", "").capitalize()
+            vaste = self.vahemalu.leia(pood, toode_norm)
+            if vaste is None:
+                read.append(f"{ilus_poe_nimi}: ei leidu")
+                continue
+            rida = f"{ilus_poe_nimi}: {vaste} — {pood.kaubad[vaste]:.2f} €"
+            vahemik = None
+            if self.hinnaajalugu is not None:
+                vahemik = self.hinnaajalugu.vahemiku_hinnad(pood.nimi, vaste, AJALOO_PAEVI)
+            if vahemik is not None:
+                rida += f" ({AJALOO_PAEVI} p: min {vahemik[0]:.2f} €, keskm {vahemik[1]:.2f} €)"
+            read.append(rida)
+
+        asendused = self._rea_asendused(toode_norm, ASENDUSTE_ARV)
+        if asendused:
+            read.append("Odavamad asendused:")
+        for asendus in asendused:
+            ilus_poe_nimi = asendus.pood.replace("_products", "").capitalize()
+            read.append(f"  {asendus.toode} ({ilus_poe_nimi}) {asendus.hind:.2f} € — "
+                        f"säästad {asendus.saast:.2f} €")
+        self.ajaloo_silt.config(text="\n".join(read))
+
     def eemalda_valitu(self):
         # Eemaldab tabelist valitud tooted ostukorvist
         valitud = self.tabel.selection()
@@ -341,15 +2691,20 @@ class Rakendus(tk.Tk):
             return
         for iid in valitud:
             toode_norm = self.tabel.item(iid, "values")[0]
-            self.ostukorv.pop(toode_norm, None)
+            self.arvestus.eemalda(toode_norm)
         self._uuenda_ostukorvi_vaadet()
+        self._naita_parimat()
 
     def tyhjenda_ostukorv(self):
         # Tühjendab ostukorvi ja tulemused
-        self.ostukorv.clear()
+        self.arvestus.tyhjenda()
         self._uuenda_ostukorvi_vaadet()
         self.parim_silt.config(text="")
         self.puudu_silt.config(text="")
+        self.jaotuse_silt.config(text="")
+        self.ajaloo_silt.config(text="")
+        self.kilohinna_silt.config(text="")
+        self.asenduste_silt.config(text="")
         self._peida_soovitused()
 
     def arvuta(self):
@@ -358,13 +2713,101 @@ class Rakendus(tk.Tk):
             messagebox.showwarning("Hoiatus", "Ostukorv on tühi.")
             return
 
-        tulemused = []
-        for pood in self.poed:
-            koguhind, puudu = arvuta_poe_korv(pood, self.ostukorv)
-            tulemused.append((pood.nimi, koguhind, puudu))
+        self._naita_parimat()
+        self._naita_kilohindu()
+        self._naita_asendusi()
 
-        tulemused.sort(key=lambda x: (len(x[2]) > 0, x[1]))
-        parim_nimi, parim_hind, parim_puudu = tulemused[0]
+    def _naita_kilohindu(self):
+        # Võrdleb eri suuruses pakke: iga toote kategooria odavaim ühikuhind
+        if self.uhikuhinnad is None:
+            self.kilohinna_silt.config(text="")
+            return
+        read = []
+        for toode_norm in sorted(self.ostukorv):
+            kogus = loe_kogus(toode_norm)
+            odavaimad = self.uhikuhinnad.odavaimad(
+                " ".join(toote_kategooria(toode_norm, self.uhikuhinnad.kaubamargid)), 1,
+                kogus[1] if kogus else None)
+            if not odavaimad:
+                continue
+            poe_nimi, toode, hind, uhik = odavaimad[0]
+            ilus_poe_nimi = poe_nimi.replace("_products", "").capitalize()
+            if toode == toode_norm:
+                read.append(f"{toode_norm}: juba odavaim ({hind:.2f} €/{uhik})")
+            else:
+                read.append(f"{toode_norm}: {toode} ({ilus_poe_nimi}) {hind:.2f} €/{uhik}")
+        if read:
+            read.insert(0, "Odavaim kilo/liitri hinna järgi:")
+        self.kilohinna_silt.config(text="\n".join(read))
+
+    def _rea_asendused(self, toode_norm: str, arv: int) -> List[Asendus]:
+        # Odavamad asendused tootele, mida ostetaks praegu odavaimas poes
+        # (kui seal toodet pole, siis järgmises poes, kus see on)
+        if self.uhikuhinnad is None:
+            return []
+        poed = {pood.nimi: pood for pood in self.poed}
+        for poe_nimi, _hind, puudu in self.arvestus.tulemused():
+            if toode_norm in puudu or poe_nimi not in poed:
+                continue
+            vaste = self.vahemalu.leia(poed[poe_nimi], toode_norm)
+            if vaste is not None:
+                return self.uhikuhinnad.asendused(poe_nimi, vaste, arv)
+        return []
+
+    def _naita_asendusi(self):
+        # "Säästad X €, kui võtad Y": iga rea parim asendus ja kokku
+        read = []
+        kokku = 0.0
+        for toode_norm, kogus in sorted(self.ostukorv.items()):
+            asendused = self._rea_asendused(toode_norm, 1)
+            if not asendused:
+                continue
+            asendus = asendused[0]
+            ilus_poe_nimi = asendus.pood.replace("_products", "").capitalize()
+            kokku += asendus.saast * kogus
+            read.append(f"{toode_norm}: säästad {asendus.saast * kogus:.2f} €, kui võtad "
+                        f"{asendus.toode} ({ilus_poe_nimi}, {asendus.hind:.2f} €)")
+        if read:
+            read.insert(0, f"Odavamad asendused (kokku kuni {kokku:.2f} €):")
+        self.asenduste_silt.config(text="\n".join(read))
+
+    def jaota(self):
+        # Leiab odavaima jaotuse kuni "Max poode" poe vahel
+        if not self.ostukorv:
+            messagebox.showwarning("Hoiatus", "Ostukorv on tühi.")
+            return
+
+        try:
+            max_poode = max(1, int(self.max_poode_muuttuja.get()))
+        except (tk.TclError, ValueError):
+            max_poode = 1
+
+        jaotus = jaota_korv(
+            [pood.nimi for pood in self.poed],
+            self.arvestus.hinnatabel(),
+            self.ostukorv,
+            max_poode=max_poode,
+        )
+
+        read = []
+        for poe_nimi in jaotus.poed:
+            tooted = [t for t, (p, _h) in jaotus.read.items() if p == poe_nimi]
+            summa = sum(h for p, h in jaotus.read.values() if p == poe_nimi)
+            ilus_poe_nimi = poe_nimi.replace("_products", "").capitalize()
+            read.append(f"{ilus_poe_nimi} ({summa:.2f} €): " + ", ".join(tooted))
+        read.append(f"Kokku: {jaotus.koguhind:.2f} €")
+        if jaotus.puudu:
+            read.append("Ei leidu üheski poes: " + ", ".join(jaotus.puudu))
+        self.jaotuse_silt.config(text="\n".join(read))
+
+    def _naita_parimat(self):
+        # Näitab jooksvalt odavaimat poodi (summad on juba arvutatud)
+        if not self.ostukorv or not self.poed:
+            self.parim_silt.config(text="")
+            self.puudu_silt.config(text="")
+            return
+
+        parim_nimi, parim_hind, parim_puudu = self.arvestus.tulemused()[0]
 
         ilus_poe_nimi = parim_nimi.replace("_products", "").capitalize()
 
@@ -381,4 +2824,6 @@ class Rakendus(tk.Tk):
 
 
 if __name__ == "__main__":
+    if tk is None:
+        raise SystemExit("Graafiline liides vajab tkinterit (nt apt install python3-tk).")
     Rakendus().mainloop()
@@ -10,6 +10,8 @@ from typing import Dict, List, Set
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+from poed import Kataloog
+
 # Kaust, kus asuvad poodide JSON-failid
 ANDMETE_KAUST = "data"
 
@@ -17,7 +19,7 @@ ANDMETE_KAUST = "data"
 class Pood:
     def __init__(self, nimi, kaubad):
         # nimi: poe nimi stringina
-        # kaubad: { "tootenimi": hind}
+        # kaubad: Kataloog, käitub nagu { "tootenimi": hind}
         self.nimi = nimi
         self.kaubad = kaubad
 
@@ -72,7 +74,7 @@ def lae_poed():
         poe_nimi = faili_nimi.replace(".json", "")
         
         if kaubad:
-            poed.append(Pood(poe_nimi, kaubad))
+            poed.append(Pood(poe_nimi, Kataloog.sonastikust(kaubad)))
 
     return poed
 
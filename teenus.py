@@ -0,0 +1,304 @@
+#Pealkiri: Odavaima ostukorvi kohalik HTTP-teenus
+#Käivitamiseks tuleb panna bash terminali:
+# python teenus.py --port 8765
+#
+# Poed laetakse üks kord ja hoitakse mälus. Otspunktid:
+#   GET  /soovitused?q=piim&n=12      autocomplete (nagu _uuenda_soovitusi)
+#   POST /arvuta   {"korv": {...}}     ühe korvi odavaim pood (nagu arvuta)
+#   POST /partii   {"korvid": [{"id": ..., "korv": {...}}, ...]}
+#   GET  /statistika                   otspunktide latentsus ja vahemälu
+#
+# data/ kausta muutunud poe fail laetakse taustal uuesti ilma teenust peatamata.
+
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, Dict, List, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from hinda_korvid import korv_sonastikuks, tulemus_kirjeks
+from poed import (
+    JALGIMISE_INTERVALL_S,
+    SOOVITUSTE_ARV,
+    KaustaJalgija,
+    ParalleelneArvutaja,
+    Pood,
+    SoovitusteIndeks,
+    VasteteVahemalu,
+    arvuta_poed,
+    faili_seis,
+    lae_pood,
+    lae_poed,
+    lae_vastavus,
+    normaliseeri_tekst,
+    poe_nimi_failist,
+    poodide_failid,
+)
+
+# Mitu viimast päringut otspunkti kohta latentsuse arvutamisel arvestatakse
+LATENTSUSE_AKEN = 2000
+
+# Suurim lubatud päringu keha (baitides)
+SUURIM_KEHA = 16 * 1024 * 1024
+
+OLEKUD = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+          413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HttpViga(Exception):
+    def __init__(self, olek: int, teade: str):
+        super().__init__(teade)
+        self.olek = olek
+
+
+class Teenus:
+    # Hoiab poode, indekseid ja latentsuse statistikat
+
+    def __init__(self, protsesse: int = 1):
+        self.jalgija = KaustaJalgija()
+        self.poed = lae_poed()
+        self.vahemalu = VasteteVahemalu(vastavus=lae_vastavus(self.poed))
+        self.soovituste_indeks = SoovitusteIndeks(
+            nimi for pood in self.poed for nimi in pood.kaubad.keys()
+        )
+
+        # Hägus otsing on CPU-töö: see ei tohi sündmustsüklit blokeerida.
+        # Üks lõim hoiab vahemälu ühe lõime käes, protsessid töötavad paralleelselt.
+        self.arvutaja = ParalleelneArvutaja(protsesse=protsesse) if protsesse > 1 else None
+        self._loim = ThreadPoolExecutor(max_workers=1)
+
+        self.latentsused: Dict[str, Deque[float]] = {}
+        self.paringuid: Dict[str, int] = {}
+
+    async def _hinda(self, ostukorv: Dict[str, int]) -> List[Tuple[str, float, List[str]]]:
+        # Ühe korvi tulemused ilma sündmustsüklit blokeerimata
+        if self.arvutaja is not None:
+            return await asyncio.wrap_future(self.arvutaja.esita_korv(ostukorv))
+        return await asyncio.get_running_loop().run_in_executor(
+            self._loim, arvuta_poed, self.poed, ostukorv, self.vahemalu
+        )
+
+    async def jalgi_kausta(self):
+        # Taustatöö: laeb muutunud poe uuesti ja vahetab poodide listi ning
+        # indeksi korraga; pooleli olevad päringud lõpetavad vana listiga
+        tsukkel = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(JALGIMISE_INTERVALL_S)
+            try:
+                muutunud, eemaldatud = self.jalgija.kontrolli()
+            except OSError:
+                continue
+            if not muutunud and not eemaldatud:
+                continue
+
+            poed = {pood.nimi: pood for pood in self.poed}
+            for faili_tee in eemaldatud:
+                poed.pop(poe_nimi_failist(faili_tee), None)
+                self.jalgija.kinnita(faili_tee, None)
+            for faili_tee in muutunud:
+                seis = faili_seis(faili_tee)
+                try:
+                    pood: Pood | None = await tsukkel.run_in_executor(None, lae_pood, faili_tee)
+                except Exception as viga:
+                    # Fail võib olla poolenisti kirjutatud; proovime järgmisel korral
+                    print(f"{faili_tee} uuesti laadimine ebaõnnestus: {viga}")
+                    continue
+                self.jalgija.kinnita(faili_tee, seis)
+                if pood is None:
+                    poed.pop(poe_nimi_failist(faili_tee), None)
+                else:
+                    poed[pood.nimi] = pood
+
+            uued_poed = list(poed.values())
+            indeks = await tsukkel.run_in_executor(
+                None, SoovitusteIndeks,
+                [nimi for pood in uued_poed for nimi in pood.kaubad.keys()],
+            )
+            vastavus = await tsukkel.run_in_executor(None, lae_vastavus, uued_poed)
+            vanad = {pood.nimi: pood for pood in self.poed}
+            self.poed = uued_poed
+            self.soovituste_indeks = indeks
+            self.vahemalu.vastavus = vastavus
+            # Vahemälu kasutab ainult hindamise lõim: unustame muutunud poed seal
+            for nimi, vana in vanad.items():
+                if poed.get(nimi) is not vana:
+                    self._loim.submit(self.vahemalu.unusta_pood, nimi)
+            if self.arvutaja is not None:
+                self.arvutaja.taaskaivita(poodide_failid())
+            print(f"Poed uuendatud: {', '.join(p.nimi for p in self.poed)}")
+
+    async def soovitused(self, paring: Dict[str, List[str]], _keha: dict | None) -> dict:
+        otsing = normaliseeri_tekst(paring.get("q", [""])[0])
+        try:
+            arv = int(paring.get("n", [SOOVITUSTE_ARV])[0])
+        except ValueError:
+            raise HttpViga(400, "n peab olema täisarv")
+        return {"q": otsing, "soovitused": self.soovituste_indeks.otsi(otsing, arv)}
+
+    async def arvuta(self, _paring: Dict[str, List[str]], keha: dict | None) -> dict:
+        if not isinstance(keha, dict) or "korv" not in keha:
+            raise HttpViga(400, "oodatud JSON: {\"korv\": {\"toode\": kogus}}")
+        ostukorv = korv_sonastikuks(keha["korv"])
+        if not ostukorv:
+            raise HttpViga(400, "ostukorv on tühi")
+        return tulemus_kirjeks(keha.get("id"), await self._hinda(ostukorv))
+
+    async def partii(self, _paring: Dict[str, List[str]], keha: dict | None) -> dict:
+        if not isinstance(keha, dict) or not isinstance(keha.get("korvid"), list):
+            raise HttpViga(400, "oodatud JSON: {\"korvid\": [{\"id\": ..., \"korv\": {...}}]}")
+
+        kirjed = []
+        for jrk, kirje in enumerate(keha["korvid"]):
+            korvi_id = kirje.get("id", jrk) if isinstance(kirje, dict) else jrk
+            try:
+                kirjed.append((korvi_id, korv_sonastikuks(kirje["korv"])))
+            except (ValueError, TypeError, KeyError, IndexError, AttributeError) as viga:
+                kirjed.append((korvi_id, str(viga)))
+
+        async def uks(korvi_id, ostukorv):
+            if isinstance(ostukorv, str):
+                return {"id": korvi_id, "viga": ostukorv}
+            return tulemus_kirjeks(korvi_id, await self._hinda(ostukorv))
+
+        return {"tulemused": await asyncio.gather(*(uks(i, k) for i, k in kirjed))}
+
+    async def statistika(self, _paring: Dict[str, List[str]], _keha: dict | None) -> dict:
+        otspunktid = {}
+        for tee, ajad in self.latentsused.items():
+            jarjestatud = sorted(ajad)
+
+            def protsentiil(p: float) -> float:
+                return round(jarjestatud[min(len(jarjestatud) - 1, int(p * len(jarjestatud)))], 3)
+
+            otspunktid[tee] = {
+                "paringuid": self.paringuid[tee],
+                "p50_ms": protsentiil(0.50),
+                "p95_ms": protsentiil(0.95),
+                "p99_ms": protsentiil(0.99),
+                "max_ms": round(jarjestatud[-1], 3),
+            }
+        return {
+            "poed": [pood.nimi for pood in self.poed],
+            "otspunktid": otspunktid,
+            "vahemalu": self.vahemalu.statistika(),
+        }
+
+    def _marsruut(self, meetod: str, tee: str):
+        marsruudid = {
+            "/soovitused": ("GET", self.soovitused),
+            "/arvuta": ("POST", self.arvuta),
+            "/partii": ("POST", self.partii),
+            "/statistika": ("GET", self.statistika),
+        }
+        if tee not in marsruudid:
+            raise HttpViga(404, f"tundmatu tee: {tee}")
+        lubatud, kasitleja = marsruudid[tee]
+        if meetod != lubatud:
+            raise HttpViga(405, f"{tee} ootab {lubatud} päringut")
+        return kasitleja
+
+    def _moodetud(self, tee: str, algus: float):
+        ms = (time.perf_counter() - algus) * 1000
+        self.latentsused.setdefault(tee, deque(maxlen=LATENTSUSE_AKEN)).append(ms)
+        self.paringuid[tee] = self.paringuid.get(tee, 0) + 1
+
+    async def uhendus(self, lugeja: asyncio.StreamReader, kirjutaja: asyncio.StreamWriter):
+        # Üks TCP-ühendus; toetab keep-alive päringuid järjest
+        try:
+            while True:
+                paise_rida = await lugeja.readline()
+                if not paise_rida:
+                    break
+                algus = time.perf_counter()
+
+                paised: Dict[str, str] = {}
+                while True:
+                    rida = await lugeja.readline()
+                    if rida in (b"\r\n", b"\n", b""):
+                        break
+                    nimi, _, vaartus = rida.decode("latin-1").partition(":")
+                    paised[nimi.strip().lower()] = vaartus.strip()
+
+                tee = "?"
+                try:
+                    try:
+                        meetod, sihtmark, _versioon = paise_rida.decode("latin-1").split()
+                    except ValueError:
+                        raise HttpViga(400, "vigane päringu rida")
+                    osad = urlsplit(sihtmark)
+                    tee = osad.path
+
+                    pikkus = int(paised.get("content-length", "0") or 0)
+                    if pikkus > SUURIM_KEHA:
+                        raise HttpViga(413, "päringu keha on liiga suur")
+                    keha = None
+                    if pikkus:
+                        toorkeha = await lugeja.readexactly(pikkus)
+                        try:
+                            keha = json.loads(toorkeha)
+                        except ValueError:
+                            raise HttpViga(400, "keha ei ole korrektne JSON")
+
+                    kasitleja = self._marsruut(meetod, tee)
+                    olek, vastus = 200, await kasitleja(parse_qs(osad.query), keha)
+                except HttpViga as viga:
+                    olek, vastus = viga.olek, {"viga": str(viga)}
+                except Exception as viga:
+                    olek, vastus = 500, {"viga": str(viga)}
+
+                sisu = json.dumps(vastus, ensure_ascii=False).encode("utf-8")
+                sulge = paised.get("connection", "").lower() == "close"
+                kirjutaja.write(
+                    f"HTTP/1.1 {olek} {OLEKUD.get(olek, '')}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(sisu)}\r\n"
+                    f"Connection: {'close' if sulge else 'keep-alive'}\r\n\r\n".encode("latin-1")
+                    + sisu
+                )
+                await kirjutaja.drain()
+                # Tundmatuid teid ei loe, et statistika ei kasvaks piiramatult
+                if olek != 404:
+                    self._moodetud(tee, algus)
+                if sulge:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            kirjutaja.close()
+
+    def sulge(self):
+        self._loim.shutdown(wait=False)
+        if self.arvutaja is not None:
+            self.arvutaja.sulge()
+
+
+async def kaivita(host: str, port: int, protsesse: int):
+    teenus = Teenus(protsesse)
+    server = await asyncio.start_server(teenus.uhendus, host, port)
+    jalgija = asyncio.create_task(teenus.jalgi_kausta())
+    print(f"Teenus töötab: http://{host}:{port} (poed: {', '.join(p.nimi for p in teenus.poed)})")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        jalgija.cancel()
+        teenus.sulge()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Odavaima ostukorvi kohalik HTTP/JSON teenus.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("-j", "--protsesse", type=int, default=1, help="arvutusprotsesside arv")
+    args = parser.parse_args()
+    try:
+        asyncio.run(kaivita(args.host, args.port, args.protsesse))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
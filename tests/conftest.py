@@ -0,0 +1,7 @@
+# Testid impordivad repo juurest poed.py ja tools/ moodulid
+import os
+import sys
+
+JUUR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, JUUR)
+sys.path.insert(0, os.path.join(JUUR, "tools"))
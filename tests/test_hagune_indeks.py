@@ -0,0 +1,50 @@
+# HaguneIndeks peab andma sama vaste mis leia_parim_vaste (difflib)
+import os
+import random
+
+import pytest
+
+import poed
+
+JUUR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _moonuta(nimi: str, rng: random.Random) -> str:
+    # Trükiviga, puuduv või lisatud täht, lühem nimi või täiesti muu tekst
+    valik = rng.randrange(5)
+    i = rng.randrange(len(nimi))
+    if valik == 0:
+        return nimi[:i] + nimi[i + 1:]
+    if valik == 1:
+        return nimi[:i] + rng.choice("aeiousõäöü ") + nimi[i:]
+    if valik == 2:
+        return nimi[:i] + rng.choice("abcdefghijklmnoprstuv") + nimi[i + 1:]
+    if valik == 3:
+        return " ".join(nimi.split()[:2])
+    return "".join(rng.choice("abcdefg ") for _ in range(rng.randrange(1, 20)))
+
+
+def _poed():
+    return [
+        poed.loe_json_pood(os.path.join(JUUR, "data", faili_nimi), faili_nimi)
+        for faili_nimi in sorted(os.listdir(os.path.join(JUUR, "data")))
+        if faili_nimi.endswith(".json")
+    ]
+
+
+@pytest.mark.parametrize("seeme", [1, 2, 3])
+def test_sama_mis_difflib(seeme):
+    rng = random.Random(seeme)
+    for pood in _poed():
+        nimed = list(pood.kaubad.keys())
+        for _ in range(100):
+            otsitav = _moonuta(rng.choice(nimed), rng)
+            assert pood.indeks.leia(otsitav) == poed.leia_parim_vaste(otsitav, nimed), otsitav
+
+
+def test_vordsed_skoorid_ja_lyhikesed_nimed():
+    # Võrdse skooriga kandidaatide korral peab valik olema sama mis difflibil
+    nimed = ["ab", "ba", "abc", "acb", "bac", "a", "b", "abcd", "dcba", "piim", "piima", "piimad"]
+    pood = poed.Pood("test", {nimi: 1.0 for nimi in nimed})
+    for otsitav in ["ab", "abx", "x", "a", "cab", "piim", "iimp", "piimaa", "", "dc"]:
+        assert pood.indeks.leia(otsitav) == poed.leia_parim_vaste(otsitav, list(pood.kaubad.keys()))
@@ -0,0 +1,74 @@
+# Hetkeseisu (.bin) kirjutamine ja lugemine ning katkise faili korral JSON-ist laadimine
+import json
+import os
+
+import pytest
+
+import poed
+
+TOOTED = [
+    {"name": "Tere Või 82% 200g", "price": "2,89 €"},
+    {"name": "Farmi piim 2,5% 1l", "price": "0,99 €"},
+    {"name": "Banaan", "price": "1,49 €"},
+    {"name": "Õun Gala 6tk", "price": "2,10 €"},
+]
+
+
+@pytest.fixture
+def kaust(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(poed.ANDMETE_KAUST)
+    with open(os.path.join(poed.ANDMETE_KAUST, "pood.json"), "w", encoding="utf-8") as f:
+        json.dump(TOOTED, f)
+    return tmp_path
+
+
+def _bin():
+    return os.path.join(poed.HETKESEISU_KAUST, "pood.bin")
+
+
+def _sama(a: poed.Pood, b: poed.Pood):
+    assert a.nimi == b.nimi
+    assert dict(a.kaubad.items()) == dict(b.kaubad.items())
+    for otsitav in ["tere või", "piim 1l", "banaan", "õun", "xyz"]:
+        assert a.indeks.leia(otsitav) == b.indeks.leia(otsitav)
+
+
+def test_edasi_tagasi(kaust):
+    json_pood = poed.lae_pood(os.path.join(poed.ANDMETE_KAUST, "pood.json"))
+    assert os.path.isfile(_bin())
+    bin_pood = poed.loe_hetkeseis(_bin(), os.path.join(poed.ANDMETE_KAUST, "pood.json"), "pood")
+    assert bin_pood is not None
+    _sama(json_pood, bin_pood)
+    assert list(bin_pood.kaubad.uhikud) == list(json_pood.kaubad.uhikud)
+
+
+def test_ajutist_faili_ei_jaa(kaust):
+    poed.lae_pood(os.path.join(poed.ANDMETE_KAUST, "pood.json"))
+    assert os.listdir(poed.HETKESEISU_KAUST) == ["pood.bin"]
+
+
+@pytest.mark.parametrize("jatta", [0.1, 0.5, 0.9, -1])
+def test_poolik_fail_laetakse_json_ist(kaust, jatta):
+    faili_tee = os.path.join(poed.ANDMETE_KAUST, "pood.json")
+    oige = poed.lae_pood(faili_tee)
+    with open(_bin(), "rb") as f:
+        sisu = f.read()
+    pikkus = len(sisu) - 1 if jatta == -1 else int(len(sisu) * jatta)
+    with open(_bin(), "wb") as f:
+        f.write(sisu[:pikkus])
+
+    assert poed.loe_hetkeseis(_bin(), faili_tee, "pood") is None
+    _sama(poed.lae_pood(faili_tee), oige)
+    # Hetkeseis kirjutati uuesti ja on jälle kasutatav
+    assert os.path.getsize(_bin()) == len(sisu)
+    assert poed.loe_hetkeseis(_bin(), faili_tee, "pood") is not None
+
+
+def test_muutunud_json_teeb_uue_hetkeseisu(kaust):
+    faili_tee = os.path.join(poed.ANDMETE_KAUST, "pood.json")
+    poed.lae_pood(faili_tee)
+    with open(faili_tee, "w", encoding="utf-8") as f:
+        json.dump(TOOTED[:2] + [{"name": "Uus toode", "price": "5,00"}], f)
+    pood = poed.lae_pood(faili_tee)
+    assert "uus toode" in pood.kaubad and "banaan" not in pood.kaubad
@@ -0,0 +1,14 @@
+# Käsurea tööriistad peavad poed.py importima ka masinas, kus tkinterit pole
+import os
+import subprocess
+import sys
+
+import pytest
+
+JUUR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize("moodul", ["hinda_korvid", "teenus"])
+def test_import_ilma_tkinterita(moodul):
+    kood = f"import sys; sys.modules['tkinter'] = None; import {moodul}"
+    subprocess.run([sys.executable, "-c", kood], cwd=JUUR, check=True)
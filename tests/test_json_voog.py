@@ -0,0 +1,37 @@
+# _json_massiivi_read peab andma samad elemendid mis json.load, ka siis, kui
+# element (eriti arv) jääb lugemisplokkide piirile
+import io
+import json
+
+import pytest
+
+import poed
+
+DOKUMENDID = [
+    "[]",
+    " [ ] ",
+    "[1.5e3, 2]",
+    "[-0.25E-2,1e+10 , 3 ,\n4.0]",
+    "[123456789, -1, 0]",
+    '["a, b]", true, false, null, {"x": [1, 2.5e1]}]',
+    json.dumps([
+        {"name": "Piim 2,5% 1l", "price": 1.29, "kogus": 1000.0, "uhik": "ml"},
+        {"name": 'Leib "Rukki"', "price": 2, "hinnad": [1.5e3, 0.99]},
+        {"name": "Õun", "price": 1.99e0},
+    ], ensure_ascii=False),
+]
+
+
+@pytest.mark.parametrize("plokk", [1, 2, 3, 5, 7, 64, 1 << 20])
+@pytest.mark.parametrize("dokument", DOKUMENDID)
+def test_sama_mis_json_load(monkeypatch, dokument, plokk):
+    monkeypatch.setattr(poed, "LUGEMISE_PLOKK", plokk)
+    assert list(poed._json_massiivi_read(io.StringIO(dokument))) == json.loads(dokument)
+
+
+@pytest.mark.parametrize("plokk", [1, 3, 1 << 20])
+@pytest.mark.parametrize("dokument", ["[1, 2", "[1.5e]", "[1 2]", '[{"a": 1}'])
+def test_vigane_json(monkeypatch, dokument, plokk):
+    monkeypatch.setattr(poed, "LUGEMISE_PLOKK", plokk)
+    with pytest.raises(ValueError):
+        list(poed._json_massiivi_read(io.StringIO(dokument)))
@@ -0,0 +1,99 @@
+# Inkrementaalne režiim: muudatuse rakendamine kataloogile ja see, et pooleli
+# jäänud lugemine tooteid ei eemalda
+import json
+
+import pytest
+
+import coop_tooted
+from muudatused import loe_kataloog, muutuste_tee, salvesta_muutusega
+
+VANAD = [
+    {"nimi": "piim", "hind": "1.29"},
+    {"nimi": "leib", "hind": "2.10"},
+    {"nimi": "või", "hind": "3.49"},
+]
+
+
+@pytest.fixture
+def valjund(tmp_path):
+    tee = str(tmp_path / "pood.json")
+    with open(tee, "w", encoding="utf-8") as f:
+        json.dump(VANAD, f)
+    return tee
+
+
+def _logi(valjund):
+    with open(muutuste_tee(valjund), encoding="utf-8") as f:
+        return [json.loads(rida) for rida in f]
+
+
+def test_lisatud_eemaldatud_ja_hinnamuutus(valjund):
+    uued = [{"nimi": "leib", "hind": "1.99"}, {"nimi": "või", "hind": "3.49"},
+            {"nimi": "juust", "hind": "4.50"}]
+    muutus = salvesta_muutusega(valjund, uued)
+
+    assert muutus["lisatud"] == [{"nimi": "juust", "hind": "4.50"}]
+    assert muutus["eemaldatud"] == ["piim"]
+    assert muutus["hinnamuutused"] == [{"nimi": "leib", "vana": "2.10", "uus": "1.99"}]
+    # Olemasolevate toodete järjekord säilib, uued lõppu
+    assert loe_kataloog(valjund) == uued
+    assert len(_logi(valjund)) == 1
+
+
+def test_muutuseta_ei_kirjutata(valjund):
+    muutus = salvesta_muutusega(valjund, list(reversed(VANAD)))
+    assert not any(muutus.values())
+    assert loe_kataloog(valjund) == VANAD
+    with pytest.raises(OSError):
+        _logi(valjund)
+
+
+def test_pooleli_lugemine_ei_eemalda(valjund):
+    uued = [{"nimi": "leib", "hind": "1.99"}, {"nimi": "juust", "hind": "4.50"}]
+    muutus = salvesta_muutusega(valjund, uued, taielik=False)
+
+    assert muutus["eemaldatud"] == []
+    assert loe_kataloog(valjund) == [
+        {"nimi": "piim", "hind": "1.29"},
+        {"nimi": "leib", "hind": "1.99"},
+        {"nimi": "või", "hind": "3.49"},
+        {"nimi": "juust", "hind": "4.50"},
+    ]
+    assert _logi(valjund)[0]["eemaldatud"] == []
+
+
+def _coop_leht(nimed):
+    return "".join(
+        f'<app-product-card><p class="product-name">{nimi}</p>'
+        f'<div class="integer">1</div><div class="decimal">99</div></app-product-card>'
+        for nimi in nimed
+    )
+
+
+def _coop_lugeja(lehed, vigased=()):
+    # Võltslugeja: lehe_nr -> HTML; vigased lehed annavad vea, puuduvad on tühjad
+    class Lugeja:
+        def loe(self, url):
+            lehe_nr = int(url.rsplit("=", 1)[1])
+            if lehe_nr in vigased:
+                raise OSError("ühendus katkes")
+            return _coop_leht(lehed.get(lehe_nr, []))
+
+        def sulge(self):
+            pass
+
+    return Lugeja
+
+
+@pytest.mark.parametrize("vigased, lehti, taielik", [
+    ((), 10, True),
+    ((2,), 10, False),
+    ((5,), 10, True),
+    ((), 3, False),
+])
+def test_coop_lugemise_lopp(vigased, lehti, taielik):
+    lehed = {1: ["piim"], 2: ["leib"], 3: ["või"]}
+    tulemus, on_taielik = coop_tooted.loe_coop_lehed(
+        lehti=lehti, tootajaid=1, lugeja=_coop_lugeja(lehed, vigased), eraldaja="skanner")
+    assert on_taielik == taielik
+    assert sorted(tulemus) == ([1] if 2 in vigased else [1, 2, 3])
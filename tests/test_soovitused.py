@@ -0,0 +1,35 @@
+# Poodide kaupa kokku pandud SoovitusteKogum peab andma sama tulemuse mis üks
+# SoovitusteIndeks kõigist nimedest
+import random
+
+import poed
+
+from test_hagune_indeks import _poed
+
+
+def test_kogum_sama_mis_indeks():
+    rng = random.Random(1)
+    poodide_nimed = [list(pood.kaubad.keys()) for pood in _poed()]
+    # Kattuvad nimed eri poodides
+    poodide_nimed.append(poodide_nimed[0][::3] + ["täiesti uus toode"])
+
+    kogum = poed.SoovitusteKogum()
+    for nimed in poodide_nimed:
+        kogum = kogum.lisa(nimed)
+    indeks = poed.SoovitusteIndeks(nimi for nimed in poodide_nimed for nimi in nimed)
+
+    for _ in range(300):
+        nimi = rng.choice(indeks.nimed)
+        algus = rng.randrange(len(nimi))
+        otsing = nimi[algus:algus + rng.randint(1, 8)]
+        for i in range(1, len(otsing) + 1):
+            assert kogum.otsi(otsing[:i]) == indeks.otsi(otsing[:i]), otsing[:i]
+    assert kogum.otsi("zzzqqq") == []
+
+
+def test_lisa_ei_muuda_vana_kogumit():
+    vana = poed.SoovitusteKogum().lisa(["piim", "leib"])
+    uus = vana.lisa(["piimashokolaad", "piim"])
+    assert vana.otsi("piim") == ["piim"]
+    assert uus.otsi("piim") == ["piim", "piimashokolaad"]
+    assert uus.lisa(["leib"]) is uus
@@ -0,0 +1,58 @@
+# Poodidevaheline vastavustabel: ühendamine, puuduva vaste korral hägune
+# otsing ja töötajate ainult lugev laadimine
+import pytest
+
+import poed
+
+from test_hagune_indeks import _poed
+
+
+@pytest.fixture(scope="module")
+def poodide_vastavus():
+    koik = _poed()
+    return koik, poed.lahenda_tooted(koik)
+
+
+def _sama_toode(vastavus, nimi_a, nimi_b):
+    kanoon = vastavus.kanoon(nimi_a)
+    return kanoon is not None and kanoon == vastavus.kanoon(nimi_b)
+
+
+def test_uhendamine(poodide_vastavus):
+    _koik, vastavus = poodide_vastavus
+    assert _sama_toode(vastavus, "tere või 82% 200g", "tere või 82%, 200 g")
+    assert _sama_toode(vastavus, "captain morgan spiced gold 35% vol 0.7l piiritusjook",
+                       "captain morgan spiced gold rumm 35%vol 700ml")
+    # Sama tootja eri õlled
+    assert not _sama_toode(vastavus, "a. le coq saaremaa tuulik hele õlu 4.7% vol 0.5l",
+                           "a. le coq premium hele õlu 4,7%vol 500ml")
+
+
+def test_erinev_variant():
+    sonad = poed.toote_sonad
+    assert poed._erinev_variant(sonad("a. le coq saaremaa tuulik hele õlu"),
+                                sonad("a. le coq premium hele õlu"))
+    assert not poed._erinev_variant(sonad("valio atleet originaal juust 150g viil"),
+                                    sonad("valio juust atleet originaal, viilutatud, 150 g"))
+
+
+def test_puuduv_vaste_otsitakse_indeksist():
+    # Toote klastris on ainult pood a, kuid poes b on see teise nimega
+    pood_b = poed.Pood(nimi="b", kaubad={"alma piim 2,5% 1l": 1.0, "leib": 2.0})
+    vastavus = poed.TooteVastavus([(0, "a", "alma piim 2.5% 1l"), (1, "b", "leib")])
+    assert vastavus.poe_vaste(pood_b, "alma piim 2.5% 1l") == (False, None)
+
+    vahemalu = poed.VasteteVahemalu(vastavus=vastavus)
+    assert vahemalu.leia(pood_b, "alma piim 2.5% 1l") == "alma piim 2,5% 1l"
+
+
+def test_lae_vastavus_ainult_lugedes(tmp_path, poodide_vastavus):
+    koik, _vastavus = poodide_vastavus
+    tee = str(tmp_path / "vastavus.tsv")
+    assert poed.lae_vastavus(koik, tee, arvuta=False) is None
+
+    vastavus = poed.lae_vastavus(koik, tee)
+    loetud = poed.lae_vastavus(koik, tee, arvuta=False)
+    assert loetud is not None and sorted(loetud.read()) == sorted(vastavus.read())
+    # Aegunud tabelit töötaja uuesti ei arvuta
+    assert poed.lae_vastavus(koik[:1], tee, arvuta=False) is None
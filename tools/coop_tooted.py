@@ -1,107 +1,303 @@
+#Pealkiri: Coop e-poe toodete kraapija
+#Käivitamiseks tuleb panna bash terminali:
+# python tools/coop_tooted.py -j 4
+#
+# Lehti loevad paralleelselt mitu töötajat (igaühel oma brauser või HTTP-lugeja),
+# kes võtavad lehtede numbreid ühisest järjekorrast. Kui mõni töötaja leiab
+# tühja lehe, ei loe keegi enam sellest kaugemaid lehti.
+#
+# Ilma võrguta testimiseks saab lehed salvestada ja neid kohalikult serveerida:
+# python tools/coop_tooted.py --salvesta tools/lehed/coop
+# python tools/lehtede_server.py tools/lehed/coop --port 8800
+# python tools/coop_tooted.py --baas-url http://127.0.0.1:8800 --http -j 8
+#
+# --muutused: lehti, mille tootekaartide sisu pole eelmisest korrast muutunud,
+# ei parsita; väljundfaili rakendatakse ainult muudatus (vt tools/muudatused.py).
+
+import argparse
 import json
+import os
+import queue
+import threading
 import time
+import urllib.request
+from typing import Dict, List, Tuple
 
-# Selenium avab päris veebilehe (nagu brauseris)
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
+from eraldajad import ERALDAJAD, vali_eraldaja
+from muudatused import kirjuta_rasid, kokkuvote, loe_rasid, salvesta_muutusega, sisu_rasi
 
-# BeautifulSoup aitab HTML-ist otsida vajalikke elemente
-from bs4 import BeautifulSoup
+# Selenium avab päris veebilehe (nagu brauseris); vaja ainult brauseriga lugemiseks
+try:
+    from selenium import webdriver
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+except ImportError:
+    webdriver = None
 
+COOP_URL = "https://vandra.ecoop.ee"
 
-# 1. Brauseri käivitamine taustal (headless)
-
-# Loome Chrome’i seadete objekti
-brauseri_seaded = Options()
+# Mitu lehte kõige rohkem läbi käia
+LEHTE_KOKKU = 50
 
-# --headless tähendab, et Chrome ei avane nähtava aknana
-# Programm töötab taustal
-brauseri_seaded.add_argument("--headless")
+# Mitu lehte korraga loetakse
+TOOTAJAID = 4
 
-# Käivitame Chrome’i Seleniumi abil
-brauser = webdriver.Chrome(options=brauseri_seaded)
+# Kaua kõige rohkem oodatakse, kuni lehele ilmuvad tootekaardid (sekundites)
+OOTE_AEG_S = 15
 
+# Kaartideta leht on valmis (tühi), kui dokument on laetud ja selle
+# elementide arv pole nii kaua muutunud (sekundites)
+VAIKUSE_AEG_S = 1.0
 
-# 2. Funktsioon, mis loeb Coop e-poe tooted veebilehelt
 
-def loe_coop_tooted(lehti=1):
-    koik_tooted = []
+# 1. Lehe aadress ja toodete lugemine lehe HTML-ist
 
-    # Käime läbi mitu lehte
-    for lehe_nr in range(1, lehti + 1):
+def lehe_url(baas_url: str, lehe_nr: int) -> str:
+    # Iga lehe aadress: ...page=1, ...page=2 jne
+    return f"{baas_url.rstrip('/')}/et/tooted?page={lehe_nr}"
 
-        # Iga lehe aadress: ...page=1, ...page=2 jne
-        url = f"https://vandra.ecoop.ee/et/tooted?page={lehe_nr}"
-        print(f"Loen Coop lehte {lehe_nr}/{lehti} ...")
 
-        try:
-            # Avame lehe brauseris
-            brauser.get(url)
+def kaartide_osa(html: str) -> str:
+    # Lehe osa esimesest kuni viimase tootekaardini: selle räsi ei muutu,
+    # kui leht erineb ainult päise, skriptide vms poolest
+    algus = html.find("<app-product-card")
+    lopp = html.rfind("</app-product-card>")
+    if algus < 0 or lopp < 0:
+        return ""
+    return html[algus:lopp]
 
-            # Ootame natuke, et leht jõuaks ära laadida
-            time.sleep(1)
 
-            # Võtame HTML-i ja anname BeautifulSoupile lugemiseks
-            soup = BeautifulSoup(brauser.page_source, "html.parser")
+def loe_lehe_tooted(html: str, eraldaja: str = "kiire") -> List[Dict[str, str]]:
+    # Ühe lehe tooted; tühi list, kui lehel tooteid pole.
+    # Coop lehel on tooted <app-product-card> elementides (vt tools/eraldajad.py).
+    return vali_eraldaja("coop", eraldaja)(html)
 
-            # Coop lehel on tooted <app-product-card> elementides
-            toote_kaardid = soup.find_all("app-product-card")
 
-            # Kui lehel ei ole enam tooteid, siis lõpetame
-            if not toote_kaardid:
-                print(f"Lehel {lehe_nr} ei leitud tooteid. Lõpetan.")
-                break
+# 2. Lugejad: üks töötaja kasutab kogu aeg sama lugejat
 
+class BrauseriLugeja:
+    # Headless Chrome; ootab, kuni tootekaardid on lehel või leht on ilma
+    # kaartideta valmis, mitte kindlat aega
 
-            # 3. Iga toote nime ja hinna lugemine
-            for kaart in toote_kaardid:
-                # Toote nimi asub <p class="product-name">
-                nimi_element = kaart.find("p", class_="product-name")
+    def __init__(self, ooteaeg: float = OOTE_AEG_S):
+        if webdriver is None:
+            raise RuntimeError("Brauseriga lugemiseks on vaja paketti selenium (või kasuta --http)")
+        brauseri_seaded = Options()
+        # --headless tähendab, et Chrome ei avane nähtava aknana
+        brauseri_seaded.add_argument("--headless")
+        self.brauser = webdriver.Chrome(options=brauseri_seaded)
+        self.ooteaeg = ooteaeg
 
-                # Hind on jagatud täisarvuliseks ja komakohaks:
-                # integer= "1" ja decimal= "99 €"
-                euro_osa = kaart.find("div", class_="integer")
-                senti_osa = kaart.find("div", class_="decimal")
+    def loe(self, url: str) -> str:
+        self.brauser.get(url)
+        # Viimati nähtud elementide arv ja millest alates see pole muutunud
+        seis = {"arv": -1, "alates": time.monotonic()}
 
-                # Kui vajalikud osad on olemas, saame toote kokku panna
-                if nimi_element and euro_osa and senti_osa:
-                    nimi = nimi_element.get_text(strip=True)
+        def valmis(brauser) -> bool:
+            # Kaardid on olemas või kaartideta leht on vaikseks jäänud
+            if brauser.find_elements(By.CSS_SELECTOR, "app-product-card p.product-name"):
+                return True
+            if brauser.execute_script("return document.readyState") != "complete":
+                seis["arv"] = -1
+                return False
+            arv = brauser.execute_script("return document.getElementsByTagName('*').length")
+            nuud = time.monotonic()
+            if arv != seis["arv"]:
+                seis["arv"], seis["alates"] = arv, nuud
+                return False
+            return nuud - seis["alates"] >= VAIKUSE_AEG_S
 
-                    # Eemaldame senti osa seest "€" märgi
-                    sendid = senti_osa.get_text(strip=True).replace("€", "").strip()
+        try:
+            # Ooteaeg on ainult ülempiir (nt kui leht ei jää kunagi vaikseks)
+            WebDriverWait(self.brauser, self.ooteaeg, poll_frequency=0.1).until(valmis)
+        except TimeoutException:
+            pass
+        return self.brauser.page_source
+
+    def sulge(self):
+        self.brauser.quit()
+
+
+class HttpLugeja:
+    # Tavaline HTTP-päring: kiire, kuid ei käivita lehe JavaScripti.
+    # Sobib salvestatud lehtede serveri (tools/lehtede_server.py) jaoks.
+
+    def __init__(self, ooteaeg: float = OOTE_AEG_S):
+        self.ooteaeg = ooteaeg
+
+    def loe(self, url: str) -> str:
+        paring = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
+        with urllib.request.urlopen(paring, timeout=self.ooteaeg) as vastus:
+            return vastus.read().decode(vastus.headers.get_content_charset() or "utf-8")
+
+    def sulge(self):
+        pass
+
+
+# 3. Töötajate kogum
+
+def loe_coop_lehed(lehti: int = LEHTE_KOKKU, tootajaid: int = TOOTAJAID,
+                   baas_url: str = COOP_URL, lugeja=BrauseriLugeja,
+                   salvesta_kaust: str | None = None,
+                   eelmised: Dict[str, dict] | None = None,
+                   eraldaja: str = "kiire") -> Tuple[Dict[int, dict], bool]:
+    # Loeb lehed 1..lehti paralleelselt: { lehe_nr: {"rasi": ..., "tooted": [...]} }
+    # ja kas lugemine lõppes tavapäraselt (tühja lehega, mitte vea või
+    # lehtede ülempiiri tõttu).
+    # lugeja: klass (või funktsioon), mis loob igale töötajale oma lugeja.
+    # eelmised: eelmise käivituse lehed (JSON-ist, seega võtmed on sõned);
+    # kui lehe räsi on sama, võetakse tooted sealt ja lehte ei parsita.
+    eelmised = eelmised or {}
+    eralda = vali_eraldaja("coop", eraldaja)
+    jarjekord: queue.Queue = queue.Queue()
+    for lehe_nr in range(1, lehti + 1):
+        jarjekord.put(lehe_nr)
 
-                    # Teeme hinna teksti kujule "1.99 €"
-                    hind = f"{euro_osa.get_text(strip=True)}.{sendid} €"
+    lukk = threading.Lock()
+    # Esimene tühi (või vigane) leht: sellest kaugemaid lehti pole vaja lugeda
+    lopp = [lehti + 1]
+    lehed: Dict[int, dict] = {}
+    # Lehed, mille lugemine ebaõnnestus (mitte tühjad lehed)
+    vigased: List[int] = []
+    vahele_jaetud = [0]
+    kaivitunud = [0]
 
-                    # Lisame listi
-                    koik_tooted.append({
-                        "nimi": nimi,
-                        "hind": hind
-                    })
+    if salvesta_kaust:
+        os.makedirs(salvesta_kaust, exist_ok=True)
 
+    def tootaja():
+        try:
+            lehe_lugeja = lugeja()
         except Exception as viga:
-            print(f"Tekkis viga lehel {lehe_nr}: {viga}")
-            break
-
-    return koik_tooted
+            print(f"Lugeja käivitamine ebaõnnestus: {viga}")
+            return
+        with lukk:
+            kaivitunud[0] += 1
+        try:
+            while True:
+                try:
+                    lehe_nr = jarjekord.get_nowait()
+                except queue.Empty:
+                    return
+                if lehe_nr >= lopp[0]:
+                    continue
+
+                print(f"Loen Coop lehte {lehe_nr}/{lehti} ...")
+                muutumata = False
+                try:
+                    html = lehe_lugeja.loe(lehe_url(baas_url, lehe_nr))
+                    rasi = sisu_rasi(kaartide_osa(html))
+                    eelmine = eelmised.get(str(lehe_nr))
+                    if eelmine and eelmine.get("rasi") == rasi and eelmine.get("tooted"):
+                        tooted = eelmine["tooted"]
+                        muutumata = True
+                    else:
+                        tooted = eralda(html)
+                except Exception as viga:
+                    print(f"Tekkis viga lehel {lehe_nr}: {viga}")
+                    tooted = []
+                    with lukk:
+                        vigased.append(lehe_nr)
+                else:
+                    if salvesta_kaust:
+                        tee = os.path.join(salvesta_kaust, f"leht-{lehe_nr}.html")
+                        with open(tee, "w", encoding="utf-8") as f:
+                            f.write(html)
+
+                with lukk:
+                    if not tooted:
+                        # Kui lehel ei ole enam tooteid, siis lõpetame
+                        if lehe_nr < lopp[0]:
+                            print(f"Lehel {lehe_nr} ei leitud tooteid. Lõpetan.")
+                            lopp[0] = lehe_nr
+                    else:
+                        lehed[lehe_nr] = {"rasi": rasi, "tooted": tooted}
+                        vahele_jaetud[0] += muutumata
+        finally:
+            lehe_lugeja.sulge()
+
+    loimed = [threading.Thread(target=tootaja, daemon=True)
+              for _ in range(max(1, min(tootajaid, lehti)))]
+    for loim in loimed:
+        loim.start()
+    for loim in loimed:
+        loim.join()
+
+    if not kaivitunud[0]:
+        raise RuntimeError("Ühtegi lugejat ei õnnestunud käivitada.")
+    if vahele_jaetud[0]:
+        print(f"{vahele_jaetud[0]} lehte polnud muutunud.")
+
+    # Lõpp leiti tühja lehega ja sellest varasemad lehed said kõik loetud
+    taielik = lopp[0] <= lehti and all(lehe_nr > lopp[0] for lehe_nr in vigased)
+    if not taielik:
+        print("Lugemine jäi pooleli (viga või lehtede ülempiir).")
+
+    # Tühjast lehest kaugemal loetud lehed jäetakse välja (nagu järjestikku lugedes)
+    return {lehe_nr: leht for lehe_nr, leht in sorted(lehed.items()) if lehe_nr < lopp[0]}, taielik
+
+
+def loe_coop_tooted(lehti: int = LEHTE_KOKKU, tootajaid: int = TOOTAJAID,
+                    baas_url: str = COOP_URL, lugeja=BrauseriLugeja,
+                    salvesta_kaust: str | None = None,
+                    eraldaja: str = "kiire") -> List[Dict[str, str]]:
+    # Kõik tooted lehtede järjekorras
+    lehed, _ = loe_coop_lehed(lehti, tootajaid, baas_url, lugeja, salvesta_kaust, eraldaja=eraldaja)
+    return [toode for leht in lehed.values() for toode in leht["tooted"]]
 
 
 # 4. Programmi käivitamine
-# Mitu lehte tahame läbi käia
-LEHTE_KOKKU = 50
-
-# Loeme tooted
-tooted = loe_coop_tooted(lehti=LEHTE_KOKKU)
-
-
-# 5. Tulemuse salvestamine JSON-faili
-faili_nimi = "coop_products.json"
-
-with open(faili_nimi, "w", encoding="utf-8") as f:
-    json.dump(tooted, f, ensure_ascii=False, indent=4)
-
-print(f"\nValmis! Leidsin {len(tooted)} toodet.")
-print(f"Andmed salvestatud faili: {faili_nimi}")
 
-# Sulgeme brauseri
-brauser.quit()
+def main():
+    parser = argparse.ArgumentParser(description="Loeb Coop e-poe tooted JSON-faili.")
+    parser.add_argument("--lehti", type=int, default=LEHTE_KOKKU, help="mitu lehte kõige rohkem")
+    parser.add_argument("-j", "--tootajaid", type=int, default=TOOTAJAID, help="paralleelsete lugejate arv")
+    parser.add_argument("--baas-url", default=COOP_URL, help="nt salvestatud lehtede server")
+    parser.add_argument("--http", action="store_true", help="loe lehti ilma brauserita")
+    parser.add_argument("--salvesta", metavar="KAUST", help="salvesta loetud lehtede HTML")
+    parser.add_argument("--eraldaja", default="kiire", choices=["kiire", *ERALDAJAD["coop"]],
+                        help="HTML-i lugemise viis (bs4 = vana BeautifulSoupi tee)")
+    parser.add_argument("--muutused", action="store_true",
+                        help="jäta muutumata lehed vahele ja rakenda väljundile ainult muudatus")
+    parser.add_argument("-o", "--valjund", default="coop_products.json")
+    args = parser.parse_args()
+
+    algus = time.perf_counter()
+    try:
+        lehed, taielik = loe_coop_lehed(
+            lehti=args.lehti,
+            tootajaid=args.tootajaid,
+            baas_url=args.baas_url,
+            lugeja=HttpLugeja if args.http else BrauseriLugeja,
+            salvesta_kaust=args.salvesta,
+            eelmised=loe_rasid(args.valjund).get("lehed") if args.muutused else None,
+            eraldaja=args.eraldaja,
+        )
+    except RuntimeError as viga:
+        raise SystemExit(str(viga))
+    tooted = [toode for leht in lehed.values() for toode in leht["tooted"]]
+
+    if not tooted:
+        # Kui midagi ei õnnestunud lugeda, ei kustuta me olemasolevat kataloogi
+        print("Ühtegi toodet ei leitud, kataloogi ei muudetud.")
+        return
+
+    if args.muutused:
+        muutus = salvesta_muutusega(args.valjund, tooted, taielik)
+        kirjuta_rasid(args.valjund, {"lehed": {str(nr): leht for nr, leht in lehed.items()}})
+        print(f"\nValmis! Leidsin {len(tooted)} toodet ({time.perf_counter() - algus:.1f} s): "
+              f"{kokkuvote(muutus)}.")
+        return
+
+    # Tulemuse salvestamine JSON-faili
+    with open(args.valjund, "w", encoding="utf-8") as f:
+        json.dump(tooted, f, ensure_ascii=False, indent=4)
+
+    print(f"\nValmis! Leidsin {len(tooted)} toodet ({time.perf_counter() - algus:.1f} s).")
+    print(f"Andmed salvestatud faili: {args.valjund}")
+
+
+if __name__ == "__main__":
+    main()
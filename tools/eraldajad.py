@@ -0,0 +1,244 @@
+#Pealkiri: Toodete eraldamine poe lehe HTML-ist
+#
+# Iga poe jaoks mitu samaväärset eraldajat (HTML -> [{"nimi", "hind"}]):
+#   bs4      BeautifulSoup + html.parser: aeglane, kuid lihtne; võrdluseks
+#   lxml     lxml + eelnevalt kompileeritud XPath (kui lxml on paigaldatud)
+#   skanner  standardteegi HTMLParser: loeb silte voona, puud ei ehitata
+# Kiireim saadaolev eraldaja: vali_eraldaja(pood). Võrdlus: tools/eraldajate_vordlus.py
+
+from html.parser import HTMLParser
+from typing import Callable, Dict, List
+
+# BeautifulSoup aitab HTML-ist otsida vajalikke elemente
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+Tooted = List[Dict[str, str]]
+
+
+def _tekst(osad: List[str]) -> str:
+    # Nagu BeautifulSoupi get_text(strip=True): tekstitükid tühikuteta kokku
+    return "".join(osa.strip() for osa in osad if osa.strip())
+
+
+def _coop_hind(euro_osa: str, senti_osa: str) -> str:
+    # Hind on jagatud täisarvuliseks ja komakohaks: "1" ja "99 €" -> "1.99 €"
+    sendid = senti_osa.replace("€", "").strip()
+    return f"{euro_osa}.{sendid} €"
+
+
+# 1. BeautifulSoup (võrdluseks)
+
+def coop_bs4(html: str) -> Tooted:
+    soup = BeautifulSoup(html, "html.parser")
+    tooted = []
+
+    # Coop lehel on tooted <app-product-card> elementides
+    for kaart in soup.find_all("app-product-card"):
+        # Toote nimi asub <p class="product-name">
+        nimi_element = kaart.find("p", class_="product-name")
+        euro_osa = kaart.find("div", class_="integer")
+        senti_osa = kaart.find("div", class_="decimal")
+
+        # Kui vajalikud osad on olemas, saame toote kokku panna
+        if nimi_element and euro_osa and senti_osa:
+            tooted.append({
+                "nimi": nimi_element.get_text(strip=True),
+                "hind": _coop_hind(euro_osa.get_text(strip=True), senti_osa.get_text(strip=True))
+            })
+
+    return tooted
+
+
+def prisma_bs4(html: str) -> Tooted:
+    soup = BeautifulSoup(html, "html.parser")
+    tooted = []
+
+    # Iga toode on Prisma lehel <article> elemendis
+    for kaart in soup.find_all("article", attrs={"data-test-id": "product-card"}):
+        nimi_element = kaart.find("div", attrs={"data-test-id": "product-card__productName"})
+        hind_element = kaart.find("span", attrs={"data-test-id": "display-price"})
+
+        # Kui mõlemad on olemas, loeme andmed välja
+        if nimi_element and hind_element:
+            tooted.append({
+                "nimi": nimi_element.get_text(strip=True),
+                "hind": hind_element.get_text(strip=True)
+            })
+
+    return tooted
+
+
+# 2. lxml ja XPath
+
+def _klassiga(silt: str, klass: str) -> str:
+    # XPath: esimene <silt>, mille class-atribuudis on see klass
+    return f"(.//{silt}[contains(concat(' ', normalize-space(@class), ' '), ' {klass} ')])[1]"
+
+
+if etree is not None:
+    _COOP_KAARDID = etree.XPath("//app-product-card")
+    _COOP_NIMI = etree.XPath(_klassiga("p", "product-name"))
+    _COOP_EURO = etree.XPath(_klassiga("div", "integer"))
+    _COOP_SENDID = etree.XPath(_klassiga("div", "decimal"))
+    _PRISMA_KAARDID = etree.XPath("//article[@data-test-id='product-card']")
+    _PRISMA_NIMI = etree.XPath("(.//div[@data-test-id='product-card__productName'])[1]")
+    _PRISMA_HIND = etree.XPath("(.//span[@data-test-id='display-price'])[1]")
+
+
+def _lxml_puu(html: str):
+    return etree.HTML(html, etree.HTMLParser(remove_comments=True))
+
+
+def coop_lxml(html: str) -> Tooted:
+    puu = _lxml_puu(html)
+    tooted = []
+    if puu is None:
+        return tooted
+    for kaart in _COOP_KAARDID(puu):
+        nimi, euro, sendid = _COOP_NIMI(kaart), _COOP_EURO(kaart), _COOP_SENDID(kaart)
+        if nimi and euro and sendid:
+            tooted.append({
+                "nimi": _tekst(list(nimi[0].itertext())),
+                "hind": _coop_hind(_tekst(list(euro[0].itertext())), _tekst(list(sendid[0].itertext())))
+            })
+    return tooted
+
+
+def prisma_lxml(html: str) -> Tooted:
+    puu = _lxml_puu(html)
+    tooted = []
+    if puu is None:
+        return tooted
+    for kaart in _PRISMA_KAARDID(puu):
+        nimi, hind = _PRISMA_NIMI(kaart), _PRISMA_HIND(kaart)
+        if nimi and hind:
+            tooted.append({
+                "nimi": _tekst(list(nimi[0].itertext())),
+                "hind": _tekst(list(hind[0].itertext()))
+            })
+    return tooted
+
+
+# 3. Voogskanner (ainult standardteek)
+
+class _KaardiSkanner(HTMLParser):
+    # Loeb silte järjest ja kogub kaardi sees olevate väljade teksti.
+    # kaart: (silt, atribuut, väärtus) kaardi elemendi tuvastamiseks;
+    # valjad: välja nimi -> (silt, atribuut, väärtus); atribuut "class"
+    # tähendab, et väärtus peab olema üks klassidest.
+
+    TUHJAD_SILDID = {"area", "base", "br", "col", "embed", "hr", "img", "input",
+                     "link", "meta", "source", "track", "wbr"}
+
+    def __init__(self, kaart, valjad):
+        super().__init__(convert_charrefs=True)
+        self.kaart = kaart
+        self.valjad = valjad
+        self.kaardid: List[Dict[str, str]] = []
+        self._sugavus = 0          # avatud siltide arv kaardi sees (0 = kaardist väljas)
+        self._valjad: Dict[str, List[str]] = {}
+        self._avatud: List[tuple] = []   # (väli, sügavus) parajasti loetavad väljad
+        self._vahele = 0           # <script>/<style> sees
+
+    @staticmethod
+    def _sobib(silt, attrs, tingimus) -> bool:
+        oodatud_silt, atribuut, vaartus = tingimus
+        if silt != oodatud_silt:
+            return False
+        if atribuut is None:
+            return True
+        for nimi, sisu in attrs:
+            if nimi == atribuut:
+                if atribuut == "class":
+                    return vaartus in (sisu or "").split()
+                return sisu == vaartus
+        return False
+
+    def handle_starttag(self, silt, attrs):
+        if silt in ("script", "style"):
+            self._vahele += 1
+        if self._sugavus == 0:
+            if self._sobib(silt, attrs, self.kaart):
+                self._sugavus = 1
+                self._valjad = {}
+                self._avatud = []
+            return
+        if silt in self.TUHJAD_SILDID:
+            return
+        self._sugavus += 1
+        for vali, tingimus in self.valjad.items():
+            # Iga välja kohta loeme ainult esimese sobiva elemendi (nagu find)
+            if vali not in self._valjad and self._sobib(silt, attrs, tingimus):
+                self._valjad[vali] = []
+                self._avatud.append((vali, self._sugavus))
+
+    def handle_endtag(self, silt):
+        if silt in ("script", "style") and self._vahele:
+            self._vahele -= 1
+        if self._sugavus == 0 or silt in self.TUHJAD_SILDID:
+            return
+        self._avatud = [(vali, sugavus) for vali, sugavus in self._avatud if sugavus < self._sugavus]
+        self._sugavus -= 1
+        if self._sugavus == 0:
+            self.kaardid.append({vali: _tekst(osad) for vali, osad in self._valjad.items()})
+
+    def handle_data(self, tekst):
+        if self._avatud and not self._vahele:
+            for vali, _sugavus in self._avatud:
+                self._valjad[vali].append(tekst)
+
+
+def _skanni(html: str, kaart, valjad) -> List[Dict[str, str]]:
+    skanner = _KaardiSkanner(kaart, valjad)
+    skanner.feed(html)
+    skanner.close()
+    return skanner.kaardid
+
+
+def coop_skanner(html: str) -> Tooted:
+    tooted = []
+    for kaart in _skanni(html, ("app-product-card", None, None), {
+        "nimi": ("p", "class", "product-name"),
+        "euro": ("div", "class", "integer"),
+        "sendid": ("div", "class", "decimal"),
+    }):
+        if len(kaart) == 3:
+            tooted.append({"nimi": kaart["nimi"], "hind": _coop_hind(kaart["euro"], kaart["sendid"])})
+    return tooted
+
+
+def prisma_skanner(html: str) -> Tooted:
+    tooted = []
+    for kaart in _skanni(html, ("article", "data-test-id", "product-card"), {
+        "nimi": ("div", "data-test-id", "product-card__productName"),
+        "hind": ("span", "data-test-id", "display-price"),
+    }):
+        if len(kaart) == 2:
+            tooted.append({"nimi": kaart["nimi"], "hind": kaart["hind"]})
+    return tooted
+
+
+# 4. Valik
+
+ERALDAJAD: Dict[str, Dict[str, Callable[[str], Tooted]]] = {
+    "coop": {"bs4": coop_bs4, "skanner": coop_skanner},
+    "prisma": {"bs4": prisma_bs4, "skanner": prisma_skanner},
+}
+if etree is not None:
+    ERALDAJAD["coop"]["lxml"] = coop_lxml
+    ERALDAJAD["prisma"]["lxml"] = prisma_lxml
+
+
+def vali_eraldaja(pood: str, nimi: str = "kiire") -> Callable[[str], Tooted]:
+    # "kiire" = lxml, kui see on olemas, muidu skanner
+    eraldajad = ERALDAJAD[pood]
+    if nimi == "kiire":
+        nimi = "lxml" if "lxml" in eraldajad else "skanner"
+    if nimi not in eraldajad:
+        raise ValueError(f"Eraldaja '{nimi}' pole saadaval (valikud: {', '.join(eraldajad)})")
+    return eraldajad[nimi]
@@ -0,0 +1,122 @@
+#Pealkiri: HTML-eraldajate kiiruse võrdlus
+#Käivitamiseks tuleb panna bash terminali:
+# python tools/eraldajate_vordlus.py --coop tools/lehed/coop --prisma tools/lehed/prisma
+#
+# Loeb salvestatud lehed (kraapijate --salvesta), kontrollib, et iga eraldaja
+# annab sama tulemuse mis BeautifulSoup, ja näitab lehti sekundis.
+# Kui salvestatud lehti pole, tehakse näidislehed data/*.json toodetest
+# (sama märgistus, mida kraapijad ootavad).
+
+import argparse
+import glob
+import html
+import json
+import os
+import time
+from typing import Dict, List
+
+from eraldajad import ERALDAJAD
+
+# Vähemalt nii kaua mõõdetakse iga eraldajat (sekundites)
+MOOTMISE_AEG_S = 1.0
+
+KAARTE_LEHEL = 24
+
+
+def loe_lehed(kaust: str) -> List[str]:
+    lehed = []
+    for tee in sorted(glob.glob(os.path.join(kaust, "*.html"))):
+        with open(tee, encoding="utf-8") as f:
+            lehed.append(f.read())
+    return lehed
+
+
+def _lehe_raam(kaardid: List[str], nr: int) -> str:
+    # Päris lehe sarnane ümbris: päis, skriptid ja mitu kihti div-e
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Tooted</title>"
+        f"<script>window.__STATE__ = {{\"leht\": {nr}, \"html\": \"<div>\"}};</script>"
+        "<style>.product-name { color: #222 }</style></head><body>"
+        "<header><nav><a href='/'>Avaleht</a><img src='/logo.svg'></nav></header>"
+        "<main><div class='grid'>" + "".join(kaardid) + "</div></main>"
+        "<footer><p class='footer'>&copy; pood</p></footer></body></html>"
+    )
+
+
+def naidislehed(pood: str, faili_tee: str) -> List[str]:
+    # Näidislehed ühe poe JSON-failist
+    with open(faili_tee, encoding="utf-8") as f:
+        tooted = json.load(f)
+
+    kaardid = []
+    for i, toode in enumerate(tooted):
+        nimi = html.escape(toode["nimi"])
+        if pood == "coop":
+            euro, _, sendid = toode["hind"].replace("€", "").strip().partition(".")
+            kaardid.append(
+                f"<app-product-card _ngcontent-c1='' class='ng-star-inserted'>"
+                f"<div class='card'><a href='/toode/{i}'><img src='/pilt/{i}.jpg' alt='{nimi}'></a>"
+                f"<p class='product-name text-truncate'> {nimi} </p>"
+                f"<div class='price'><div class='integer'>{euro}</div>"
+                f"<div class='decimal'>{sendid} <span>€</span></div></div>"
+                f"<button class='btn add'>Lisa korvi</button></div></app-product-card>"
+            )
+        else:
+            kaardid.append(
+                f"<article data-test-id='product-card' class='sc-card'>"
+                f"<div class='img'><img src='/p/{i}.webp' alt=''></div>"
+                f"<div data-test-id='product-card__productName'><span>{nimi}</span></div>"
+                f"<div class='price'><span data-test-id='display-price'>{toode['hind']}</span>"
+                f"<span class='unit'>/tk</span></div></article>"
+            )
+
+    return [_lehe_raam(kaardid[algus:algus + KAARTE_LEHEL], algus // KAARTE_LEHEL + 1)
+            for algus in range(0, len(kaardid), KAARTE_LEHEL)]
+
+
+def mooda(eralda, lehed: List[str]) -> float:
+    # Lehti sekundis
+    lehti = 0
+    algus = time.perf_counter()
+    while True:
+        for leht in lehed:
+            eralda(leht)
+        lehti += len(lehed)
+        kulunud = time.perf_counter() - algus
+        if kulunud >= MOOTMISE_AEG_S:
+            return lehti / kulunud
+
+
+def vordle(pood: str, lehed: List[str]) -> Dict[str, float]:
+    eraldajad = ERALDAJAD[pood]
+    viide = [eraldajad["bs4"](leht) for leht in lehed]
+    tooteid = sum(len(tooted) for tooted in viide)
+    print(f"\n{pood}: {len(lehed)} lehte, {tooteid} toodet")
+
+    tulemused = {}
+    for nimi, eralda in eraldajad.items():
+        erinevaid = sum(eralda(leht) != oodatud for leht, oodatud in zip(lehed, viide))
+        tulemused[nimi] = mooda(eralda, lehed)
+        marge = "sama mis bs4" if not erinevaid else f"ERINEB {erinevaid} lehel"
+        print(f"  {nimi:8} {tulemused[nimi]:9.1f} lehte/s  "
+              f"{tulemused[nimi] / tulemused['bs4']:5.1f}x  {marge}")
+    return tulemused
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Võrdleb HTML-eraldajate kiirust salvestatud lehtedel.")
+    parser.add_argument("--coop", metavar="KAUST", help="Coopi salvestatud lehed (*.html)")
+    parser.add_argument("--prisma", metavar="KAUST", help="Prisma salvestatud lehed (*.html)")
+    args = parser.parse_args()
+
+    for pood, kaust, faili_tee in (("coop", args.coop, "data/coop_products.json"),
+                                   ("prisma", args.prisma, "data/prisma_products.json")):
+        lehed = loe_lehed(kaust) if kaust else naidislehed(pood, faili_tee)
+        if not lehed:
+            print(f"\n{pood}: lehti ei leitud ({kaust})")
+            continue
+        vordle(pood, lehed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#Pealkiri: Salvestatud poe lehtede kohalik server
+#Käivitamiseks tuleb panna bash terminali:
+# python tools/lehtede_server.py tools/lehed/coop --port 8800
+#
+# Serveerib kraapijate salvestatud HTML-i, et kraapijaid saaks proovida ilma
+# päris poe lehte koormamata:
+#   /...?page=N      -> KAUST/leht-N.html (puuduv leht = tühi leht, nagu poes)
+#   /muu/tee         -> KAUST/muu/tee või KAUST/muu/tee.html
+# --viivitus lisab igale vastusele päris lehe sarnase ooteaja.
+
+import argparse
+import os
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+TUHI_LEHT = b"<html><body></body></html>"
+
+
+def leia_fail(kaust: str, sihtmark: str) -> str | None:
+    # Päringu aadressile vastav salvestatud fail; None, kui seda pole
+    osad = urlsplit(sihtmark)
+    leht = parse_qs(osad.query).get("page")
+    if leht and leht[0].isdigit():
+        tee = os.path.join(kaust, f"leht-{int(leht[0])}.html")
+        return tee if os.path.isfile(tee) else None
+
+    suhteline = osad.path.strip("/") or "index.html"
+    tee = os.path.normpath(os.path.join(kaust, suhteline))
+    # Ei luba kaustast välja minna (../)
+    if os.path.commonpath([os.path.abspath(tee), os.path.abspath(kaust)]) != os.path.abspath(kaust):
+        return None
+    for kandidaat in (tee, tee + ".html"):
+        if os.path.isfile(kandidaat):
+            return kandidaat
+    return None
+
+
+def loo_server(kaust: str, host: str = "127.0.0.1", port: int = 8800,
+               viivitus_ms: int = 0) -> ThreadingHTTPServer:
+    # Server, mis vastab igale päringule eraldi lõimes (nagu päris veebileht)
+
+    class Kasitleja(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if viivitus_ms:
+                time.sleep(viivitus_ms / 1000)
+            tee = leia_fail(kaust, self.path)
+            if tee is None:
+                sisu = TUHI_LEHT
+            else:
+                with open(tee, "rb") as f:
+                    sisu = f.read()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(sisu)))
+            self.end_headers()
+            self.wfile.write(sisu)
+
+        def log_message(self, *_args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Kasitleja)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveerib salvestatud poe lehti kohalikult.")
+    parser.add_argument("kaust", help="salvestatud lehtede kaust")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--viivitus", type=int, default=0, metavar="MS", help="ooteaeg iga vastuse ees")
+    args = parser.parse_args()
+
+    server = loo_server(args.kaust, args.host, args.port, args.viivitus)
+    print(f"Serveerin {args.kaust}: http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
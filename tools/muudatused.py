@@ -0,0 +1,113 @@
+#Pealkiri: Kraapijate inkrementaalne režiim (sisuräsid ja muudatused)
+#
+# Kraapijad jätavad eelmise käivituse lehtede (Coop) või kaartide (Prisma)
+# sisuräsid faili <väljund>.rasid.json. Muutumata lehte/kaarti uuesti ei
+# parsita. Uut kataloogi ei kirjutata üle tervikuna: võrreldakse olemasolevaga,
+# muudatus (lisatud, eemaldatud, hinnamuutused) lisatakse logisse
+# <väljund>.muutused.jsonl ja rakendatakse olemasolevale kataloogile.
+# Kui lugemine jäi pooleli (viga, lehtede ülempiir), ei tähenda puuduv toode,
+# et see poest kadus: siis rakendatakse ainult lisatud tooted ja hinnamuutused.
+
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List
+
+
+def sisu_rasi(tekst: str) -> str:
+    # Lühike räsi lehe või kaardi sisust
+    return hashlib.blake2b(tekst.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def rasside_tee(valjund: str) -> str:
+    return valjund + ".rasid.json"
+
+
+def muutuste_tee(valjund: str) -> str:
+    return os.path.splitext(valjund)[0] + ".muutused.jsonl"
+
+
+def loe_rasid(valjund: str) -> dict:
+    # Eelmise käivituse räsid; tühi, kui neid pole või fail on vigane
+    try:
+        with open(rasside_tee(valjund), encoding="utf-8") as f:
+            rasid = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return rasid if isinstance(rasid, dict) else {}
+
+
+def kirjuta_rasid(valjund: str, rasid: dict):
+    _kirjuta_json(rasside_tee(valjund), rasid, taane=None)
+
+
+def loe_kataloog(valjund: str) -> List[Dict[str, str]]:
+    # Olemasolev kataloog; tühi list, kui faili veel pole
+    try:
+        with open(valjund, encoding="utf-8") as f:
+            tooted = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return tooted if isinstance(tooted, list) else []
+
+
+def arvuta_muutus(vanad: List[Dict[str, str]], uued: List[Dict[str, str]]) -> dict:
+    # Lisatud ja eemaldatud tooted ning hinnamuutused (toote nime järgi)
+    vanad_hinnad = {toode["nimi"]: toode["hind"] for toode in vanad}
+    uued_hinnad = {toode["nimi"]: toode["hind"] for toode in uued}
+    return {
+        "lisatud": [{"nimi": nimi, "hind": hind}
+                    for nimi, hind in uued_hinnad.items() if nimi not in vanad_hinnad],
+        "eemaldatud": [nimi for nimi in vanad_hinnad if nimi not in uued_hinnad],
+        "hinnamuutused": [{"nimi": nimi, "vana": vanad_hinnad[nimi], "uus": hind}
+                          for nimi, hind in uued_hinnad.items()
+                          if nimi in vanad_hinnad and vanad_hinnad[nimi] != hind],
+    }
+
+
+def muutus_tuhi(muutus: dict) -> bool:
+    return not (muutus["lisatud"] or muutus["eemaldatud"] or muutus["hinnamuutused"])
+
+
+def rakenda_muutus(vanad: List[Dict[str, str]], muutus: dict) -> List[Dict[str, str]]:
+    # Olemasolev kataloog + muudatus; olemasolevate toodete järjekord säilib
+    eemaldatud = set(muutus["eemaldatud"])
+    uued_hinnad = {rida["nimi"]: rida["uus"] for rida in muutus["hinnamuutused"]}
+    tooted = [
+        {"nimi": toode["nimi"], "hind": uued_hinnad.get(toode["nimi"], toode["hind"])}
+        for toode in vanad if toode["nimi"] not in eemaldatud
+    ]
+    tooted.extend(muutus["lisatud"])
+    return tooted
+
+
+def salvesta_muutusega(valjund: str, uued: List[Dict[str, str]], taielik: bool = True) -> dict:
+    # Võrdleb uusi tooteid olemasoleva kataloogiga, logib muudatuse ja
+    # kirjutab kataloogi ainult siis, kui midagi muutus. taielik=False:
+    # lugemine jäi pooleli, seega tooteid ei eemaldata.
+    vanad = loe_kataloog(valjund)
+    muutus = arvuta_muutus(vanad, uued)
+    if not taielik:
+        muutus["eemaldatud"] = []
+    if muutus_tuhi(muutus):
+        return muutus
+
+    with open(muutuste_tee(valjund), "a", encoding="utf-8") as f:
+        f.write(json.dumps({"aeg": time.strftime("%Y-%m-%dT%H:%M:%S"), **muutus},
+                           ensure_ascii=False) + "\n")
+    _kirjuta_json(valjund, rakenda_muutus(vanad, muutus), taane=4)
+    return muutus
+
+
+def kokkuvote(muutus: dict) -> str:
+    return (f"{len(muutus['lisatud'])} lisatud, {len(muutus['eemaldatud'])} eemaldatud, "
+            f"{len(muutus['hinnamuutused'])} hinnamuutust")
+
+
+def _kirjuta_json(tee: str, sisu, taane: int | None):
+    # Ajutisse faili ja siis asemele, et pooleli jäänud kirjutamine faili ei rikuks
+    ajutine = tee + ".tmp"
+    with open(ajutine, "w", encoding="utf-8") as f:
+        json.dump(sisu, f, ensure_ascii=False, indent=taane)
+    os.replace(ajutine, tee)
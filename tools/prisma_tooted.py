@@ -1,104 +1,230 @@
+#Pealkiri: Prisma e-poe toodete kraapija
+#Käivitamiseks tuleb panna bash terminali:
+# python tools/prisma_tooted.py
+#
+# Prisma laeb uusi tooteid alles siis, kui alla kerida. Kerime seni, kuni
+# tootekaartide arv enam ei kasva, ja loeme igal sammul ainult uued kaardid
+# (mitte kogu lehte korraga lõpus).
+#
+# Ilma võrguta kontrollimiseks:
+# python tools/prisma_tooted.py --salvesta tools/lehed/prisma/tooted.html
+# python tools/prisma_tooted.py --failist tools/lehed/prisma/tooted.html
+# (või serveeri kausta tools/lehtede_server.py-ga ja anna --url)
+#
+# --muutused: kaarte, mille sisu on sama mis eelmisel korral, ei parsita;
+# väljundfaili rakendatakse ainult muudatus (vt tools/muudatused.py).
+
+import argparse
 import json
 import time
-
-# Selenium avab päris veebilehe (nagu brauseris)
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-
-# BeautifulSoup aitab HTML-koodi „lugeda“
-from bs4 import BeautifulSoup
-
-
-# 1. Brauseri seadistamine (Chrome töötab taustal)
-
-# Loob Chrome’i seadete objekti
-brauseri_seaded = Options()
-
-# --headless tähendab, et Chrome ei avane nähtava aknana
-# Programm töötab „taustal“
-brauseri_seaded.add_argument("--headless")
-
-# Käivitame Chrome’i Seleniumi kaudu
-brauser = webdriver.Chrome(options=brauseri_seaded)
-
-
-# 2. Funktsioon, mis loeb Prisma tooted veebilehelt
-
-def loe_prisma_tooted(kerimise_kordi=10):
-    koik_tooted = []
+from typing import Dict, List, Set, Tuple
+
+from eraldajad import ERALDAJAD, vali_eraldaja
+from muudatused import kirjuta_rasid, kokkuvote, loe_rasid, salvesta_muutusega, sisu_rasi
+
+# Selenium avab päris veebilehe (nagu brauseris); --failist korral pole vaja
+try:
+    from selenium import webdriver
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.support.ui import WebDriverWait
+except ImportError:
+    webdriver = None
+
+PRISMA_URL = "https://www.prismamarket.ee/tooted"
+
+KAARDI_VALIJA = 'article[data-test-id="product-card"]'
+
+# Kerimiste ülempiir (kaitse lõputu lehe vastu)
+KERIMISTE_ARV = 200
+
+# Kaua oodatakse pärast kerimist uusi kaarte (sekundites)
+KERIMISE_OOTE_S = 4
+
+# Mitu kerimist järjest ilma uute kaartideta tähendab, et tooted said otsa
+KASVUTA_KERIMISI = 2
+
+
+# 1. Kaartide lugemine (vt tools/eraldajad.py)
+
+def loe_kaardid(kaartide_html: List[str], eelmised: Dict[str, dict] | None = None,
+                eraldaja: str = "kiire") -> Dict[str, dict]:
+    # Uute kaartide HTML (iga kaart eraldi, seega väikesed parsimised):
+    # { kaardi_rasi: toode }. Eelmisest korrast tuttavat kaarti ei parsita.
+    eelmised = eelmised or {}
+    eralda = vali_eraldaja("prisma", eraldaja)
+    tooted = {}
+    for html in kaartide_html:
+        rasi = sisu_rasi(html)
+        if rasi in eelmised:
+            tooted[rasi] = eelmised[rasi]
+            continue
+        kaardi_tooted = eralda(html)
+        if kaardi_tooted:
+            tooted[rasi] = kaardi_tooted[0]
+    return tooted
+
+
+def loe_lehe_tooted(html: str, eraldaja: str = "kiire") -> List[Dict[str, str]]:
+    # Salvestatud lehe kõik tooted (võrguta kontrollimiseks).
+    # Iga toode on Prisma lehel <article data-test-id="product-card"> elemendis.
+    return vali_eraldaja("prisma", eraldaja)(html)
+
+
+# 2. Kerimine, kuni uusi tooteid enam ei tule
+
+def loe_prisma_kaardid(url: str = PRISMA_URL, kerimisi: int = KERIMISTE_ARV,
+                       ooteaeg: float = KERIMISE_OOTE_S, salvesta: str | None = None,
+                       eelmised: Dict[str, dict] | None = None,
+                       eraldaja: str = "kiire") -> Tuple[Dict[str, dict], bool]:
+    # Kõik lehe kaardid: { kaardi_rasi: toode } (vt loe_kaardid) ja kas
+    # kerimine lõppes tavapäraselt (tooted said otsa, mitte viga või ülempiir)
+    if webdriver is None:
+        raise RuntimeError("Brauseriga lugemiseks on vaja paketti selenium (või kasuta --failist)")
+
+    # Chrome töötab taustal (--headless: akent ei avata)
+    brauseri_seaded = Options()
+    brauseri_seaded.add_argument("--headless")
+    brauser = webdriver.Chrome(options=brauseri_seaded)
+
+    # Sama kaart (sama räsi) ei teki topelt, kui leht kaarte ümber joonistab
+    kaardid: Dict[str, dict] = {}
+    # Kasvu mõõdetakse eri toodete (nimede) järgi: ümber joonistatud kaardi
+    # HTML ja räsi võivad muutuda, kuigi uut toodet ei tulnud
+    nimed: Set[str] = set()
+    taielik = False
+
+    def kaarte() -> int:
+        return brauser.execute_script(f"return document.querySelectorAll('{KAARDI_VALIJA}').length;")
 
     try:
-        url = "https://www.prismamarket.ee/tooted"
-
-        # Avame lehe brauseris
         brauser.get(url)
         print("Laen Prisma veebilehte...")
 
-        # Ootame natuke, et leht jõuaks ära laadida
-        time.sleep(2)
-
-        # 3. Lehe allapoole kerimine
-        # Prisma laeb uusi tooteid alles siis, kui alla kerida.
-        for i in range(kerimise_kordi):
-            print(f"Kerimine {i + 1}/{kerimise_kordi}")
-            brauser.execute_script(
-                "window.scrollTo(0, document.body.scrollHeight);"
-            )
-            time.sleep(2)  # ootame, et uued tooted ilmuksid
-
-        # 4. HTML-i lugemine BeautifulSoupiga
-        # Võtame kogu lehe HTML-koodi
-        soup = BeautifulSoup(brauser.page_source, "html.parser")
-
-        # Iga toode on Prisma lehel <article> elemendis
-        toote_kaardid = soup.find_all(
-            "article", attrs={"data-test-id": "product-card"}
-        )
-
-        print(f"Leidsin {len(toote_kaardid)} toodet")
-
-        # 5. Iga toote nime ja hinna lugemine
-        for kaart in toote_kaardid:
-            nimi_element = kaart.find(
-                "div", attrs={"data-test-id": "product-card__productName"}
+        # Ootame esimesi kaarte, mitte kindlat aega
+        try:
+            WebDriverWait(brauser, ooteaeg * 3, poll_frequency=0.1).until(lambda _b: kaarte() > 0)
+        except TimeoutException:
+            print("Lehel ei leitud tooteid.")
+
+        loetud = 0
+
+        def loe_juurde(koik: bool = False) -> int:
+            # Loeb pärast eelmist lugemist lisandunud kaardid ja tagastab uute
+            # toodete (seni nägemata nimede) arvu. Kui kaarte on lehel vähem kui loetud (leht eemaldab
+            # ekraanilt väljunud kaarte), loetakse kõik praegused kaardid uuesti;
+            # topelt tooteid räsi järgi ei teki.
+            nonlocal loetud
+            if koik or kaarte() < loetud:
+                loetud = 0
+            uued = brauser.execute_script(
+                f"return Array.from(document.querySelectorAll('{KAARDI_VALIJA}'))"
+                ".slice(arguments[0]).map(k => k.outerHTML);",
+                loetud,
             )
-
-            hind_element = kaart.find(
-                "span", attrs={"data-test-id": "display-price"}
-            )
-
-            # Kui mõlemad on olemas, loeme andmed välja
-            if nimi_element and hind_element:
-                nimi = nimi_element.get_text(strip=True)
-                hind = hind_element.get_text(strip=True)
-
-                # Lisame toote listi
-                koik_tooted.append({
-                    "nimi": nimi,
-                    "hind": hind
-                })
+            loetud += len(uued)
+            uued_kaardid = loe_kaardid(uued, eelmised, eraldaja)
+            kaardid.update(uued_kaardid)
+            enne = len(nimed)
+            nimed.update(toode["nimi"] for toode in uued_kaardid.values())
+            return len(nimed) - enne
+
+        kasvuta = 0
+        for i in range(kerimisi):
+            loe_juurde()
+            print(f"Kerimine {i + 1}: {loetud} kaarti, {len(nimed)} toodet")
+
+            brauser.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            try:
+                # Ootame, kuni kaarte tuleb juurde
+                WebDriverWait(brauser, ooteaeg, poll_frequency=0.1).until(lambda _b: kaarte() > loetud)
+                kasvuta = 0
+            except TimeoutException:
+                # Kaartide arv ei kasvanud, kuid leht võib neid välja vahetada
+                if loe_juurde(koik=True):
+                    kasvuta = 0
+                    continue
+                kasvuta += 1
+                if kasvuta >= KASVUTA_KERIMISI:
+                    taielik = True
+                    break
+
+        # Viimase kerimise järel lisandunud kaardid
+        loe_juurde()
+        print(f"Kokku {len(nimed)} toodet")
+
+        if salvesta:
+            with open(salvesta, "w", encoding="utf-8") as f:
+                f.write(brauser.page_source)
 
     except Exception as viga:
         print(f"Tekkis viga: {viga}")
+        taielik = False
 
     finally:
         brauser.quit()
 
-    return koik_tooted
-
-# 6. Programmi käivitamine
-
-# Mitu korda lehte alla kerime
-KERIMISTE_ARV = 15
-
-# Kutsume funktsiooni välja
-tooted = loe_prisma_tooted(kerimise_kordi=KERIMISTE_ARV)
-
-
-# 7. Andmete salvestamine JSON-faili
-faili_nimi = "prisma_products.json"
-
-with open(faili_nimi, "w", encoding="utf-8") as f:
-    json.dump(tooted, f, ensure_ascii=False, indent=4)
-
-print(f"\nValmis! Salvestasin {len(tooted)} toodet faili {faili_nimi}")
+    if not taielik:
+        print("Lugemine jäi pooleli (viga või kerimiste ülempiir).")
+    return kaardid, taielik
+
+
+def loe_prisma_tooted(url: str = PRISMA_URL, kerimisi: int = KERIMISTE_ARV,
+                      ooteaeg: float = KERIMISE_OOTE_S,
+                      salvesta: str | None = None,
+                      eraldaja: str = "kiire") -> List[Dict[str, str]]:
+    # Kõik tooted; nime järgi ainult üks kord
+    kaardid, _ = loe_prisma_kaardid(url, kerimisi, ooteaeg, salvesta, eraldaja=eraldaja)
+    return list({toode["nimi"]: toode for toode in kaardid.values()}.values())
+
+
+# 3. Programmi käivitamine
+
+def main():
+    parser = argparse.ArgumentParser(description="Loeb Prisma e-poe tooted JSON-faili.")
+    parser.add_argument("--url", default=PRISMA_URL, help="nt salvestatud lehtede server")
+    parser.add_argument("--kerimisi", type=int, default=KERIMISTE_ARV, help="kerimiste ülempiir")
+    parser.add_argument("--salvesta", metavar="FAIL", help="salvesta lõplik lehe HTML")
+    parser.add_argument("--failist", metavar="FAIL", help="loe tooted salvestatud lehest (ilma brauserita)")
+    parser.add_argument("--eraldaja", default="kiire", choices=["kiire", *ERALDAJAD["prisma"]],
+                        help="HTML-i lugemise viis (bs4 = vana BeautifulSoupi tee)")
+    parser.add_argument("--muutused", action="store_true",
+                        help="jäta tuttavad kaardid vahele ja rakenda väljundile ainult muudatus")
+    parser.add_argument("-o", "--valjund", default="prisma_products.json")
+    args = parser.parse_args()
+
+    algus = time.perf_counter()
+    if args.failist:
+        with open(args.failist, encoding="utf-8") as f:
+            tooted = list({t["nimi"]: t for t in loe_lehe_tooted(f.read(), args.eraldaja)}.values())
+    elif args.muutused:
+        kaardid, taielik = loe_prisma_kaardid(args.url, args.kerimisi, salvesta=args.salvesta,
+                                     eelmised=loe_rasid(args.valjund).get("kaardid"),
+                                     eraldaja=args.eraldaja)
+        tooted = list({t["nimi"]: t for t in kaardid.values()}.values())
+    else:
+        tooted = loe_prisma_tooted(args.url, args.kerimisi, salvesta=args.salvesta,
+                                   eraldaja=args.eraldaja)
+
+    if not tooted:
+        # Kui midagi ei õnnestunud lugeda, ei kustuta me olemasolevat kataloogi
+        print("Ühtegi toodet ei leitud, kataloogi ei muudetud.")
+        return
+
+    if args.muutused:
+        muutus = salvesta_muutusega(args.valjund, tooted, taielik)
+        kirjuta_rasid(args.valjund, {"kaardid": kaardid})
+        print(f"\nValmis! Leidsin {len(tooted)} toodet ({time.perf_counter() - algus:.1f} s): "
+              f"{kokkuvote(muutus)}.")
+        return
+
+    # Andmete salvestamine JSON-faili
+    with open(args.valjund, "w", encoding="utf-8") as f:
+        json.dump(tooted, f, ensure_ascii=False, indent=4)
+
+    print(f"\nValmis! Salvestasin {len(tooted)} toodet faili {args.valjund} "
+          f"({time.perf_counter() - algus:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()